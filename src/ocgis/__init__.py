@@ -11,6 +11,7 @@ from ocgis.driver.dimension_map import DimensionMap
 from ocgis.driver.request.core import RequestDataset
 from ocgis.driver.request.multi_request import MultiRequestDataset
 from ocgis.ops.core import OcgOperations
+from ocgis.ops.plan import OperationsPlan
 from ocgis.calc.library.register import FunctionRegistry
 from ocgis.spatial.grid import Grid
 from ocgis.spatial.geom_cabinet import GeomCabinet, GeomCabinetIterator, ShpCabinet, ShpCabinetIterator
@@ -12,6 +12,8 @@ from ocgis import constants
 from ocgis import env
 from ocgis.base import get_variables, get_dimension_names, AbstractOcgisObject
 from ocgis.constants import TagName, DimensionMapKey, HeaderName
+from ocgis.calc.kernel import get_kernel
+from ocgis.calc.segment import get_segment_counts
 from ocgis.exc import SampleSizeNotImplemented, DefinitionValidationError, UnitsValidationError
 from ocgis.util.conformer import conform_array_by_dimension_names
 from ocgis.util.helpers import get_default_or_apply, get_iter
@@ -86,6 +88,14 @@ class AbstractFunction(AbstractOcgisObject):
     #: units attribute value. The string flag is used to allow ``None`` units to be applied.
     units = '_input_'
 
+    #: If ``True``, each time step is calculated independently of all other time steps. These functions may be chunked
+    #: along the time dimension.
+    time_independent = False
+
+    #: If ``True``, the function implements :meth:`calculate_segments` and all temporal groups are reduced in a single
+    #: call instead of calling :meth:`calculate` once per group.
+    batched_reduction = False
+
     # standard empty dictionary to use for calculation outputs when the operation is file only
     _empty_fill = {'fill': None, 'sample_size': None}
 
@@ -150,6 +160,38 @@ class AbstractFunction(AbstractOcgisObject):
 
         pass
 
+    def calculate_segments(self, values, offsets, **kwargs):
+        """
+        Optional method to overload for batched temporal group reductions. Only called when :attr:`batched_reduction` is
+        ``True``. All temporal groups are concatenated along the time axis and ``offsets`` contains the start index of
+        each group. Each group must be reduced exactly as :meth:`calculate` would reduce it.
+
+        :param values: A three-dimensional array with dimensions (time, row, column).
+        :type values: :class:`numpy.ma.MaskedArray`
+        :param offsets: Start index of each temporal group along the time axis.
+        :type offsets: :class:`numpy.ndarray`
+        :param kwargs: Any keyword parameters for the function.
+        :returns: A three-dimensional array with dimensions (group, row, column).
+        :rtype: :class:`numpy.ma.MaskedArray`
+        """
+
+        raise NotImplementedError
+
+    def calculate_segment_statistics(self, statistics, **kwargs):
+        """
+        Optional method to overload for fused batched temporal group reductions. ``statistics`` is shared by all
+        functions reducing the same segmented array so intermediate reductions are only computed once. Defaults to
+        :meth:`calculate_segments`.
+
+        :param statistics: The segmented array and its shared reductions.
+        :type statistics: :class:`~ocgis.calc.segment.SegmentStatistics`
+        :param kwargs: Any keyword parameters for the function.
+        :returns: See :meth:`calculate_segments`.
+        :rtype: :class:`numpy.ma.MaskedArray`
+        """
+
+        return self.calculate_segments(statistics.values, statistics.offsets, **kwargs)
+
     def execute(self):
         """
         Execute the computation over the input field.
@@ -258,6 +300,15 @@ class AbstractFunction(AbstractOcgisObject):
         ret = {'key': self.key, 'alias': self.alias, 'parms': self.parms}
         return ret
 
+    def get_kernel(self):
+        """
+        :returns: The compiled kernel registered for the function key or ``None`` if there is no registered kernel or
+         Numba is not available. See :mod:`ocgis.calc.kernel`.
+        :rtype: function
+        """
+
+        return get_kernel(self.key)
+
     def get_output_units(self, variable):
         """
         Get the output units.
@@ -476,6 +527,15 @@ class AbstractFunction(AbstractOcgisObject):
             else:
                 arr_fill_sample_size = None
 
+            # Reduce all temporal groups at once if the function supports it.
+            if self.batched_reduction and f == self.calculate and not self.spatial_aggregation:
+                group_indices = self.tgd.get_group_indices(variable.shape[time_axis])
+            else:
+                group_indices = None
+            if group_indices is None:
+                # Time selections for each temporal group. Integer indices avoid full-length boolean group arrays.
+                groups = list(self.tgd.iter_groups())
+
             # Extra dimensions are not standard field dimensions.
             for yld in self._iter_conformed_arrays_(crosswalk, variable.shape, arr, arr_fill, arr_fill_sample_size):
                 if not self.calc_sample_size:
@@ -487,13 +547,17 @@ class AbstractFunction(AbstractOcgisObject):
                 # Some variables need access to the entire 5d conformed array.
                 self._current_conformed_array = carr
 
+                if group_indices is not None:
+                    self._set_temporal_agg_fill_batched_(carr, carr_fill, carr_fill_sample_size, group_indices, parms)
+                    continue
+
                 # Standard field dimension iterators.
                 standard_itrs = [list(range(carr.shape[ii])) for ii in [0, 2]]
                 standard_itrs.append(list(range(self.tgd.shape[0])))
 
                 # Execute the calculation.
                 for ir, il, it in itertools.product(*standard_itrs):
-                    self._curr_group = self.tgd.dgroups[it]
+                    self._curr_group = groups[it]
                     calculation_value = carr[ir, self._curr_group, il, :, :]
                     assert calculation_value.ndim == 3
                     res = f(calculation_value, **parms)
@@ -523,42 +587,44 @@ class AbstractFunction(AbstractOcgisObject):
 
         return {'fill': fill, 'sample_size': fill_sample_size}
 
+    def _set_temporal_agg_fill_batched_(self, carr, carr_fill, carr_fill_sample_size, group_indices, parms):
+        indices, offsets = group_indices
+        for ir, il in itertools.product(range(carr.shape[0]), range(carr.shape[2])):
+            # Gather the temporal groups into contiguous segments with a single copy.
+            calculation_value = carr[ir, indices, il, :, :]
+            res = self.calculate_segments(calculation_value, offsets, **parms)
+            carr_fill.data[ir, :, il, :, :] = res.data
+            carr_fill.mask[ir, :, il, :, :] = np.ma.getmaskarray(res)
+
+            if self.calc_sample_size:
+                carr_fill_sample_size.data[ir, :, il, :, :] = get_segment_counts(calculation_value, offsets)
+                carr_fill_sample_size.mask[ir, :, il, :, :] = np.ma.getmaskarray(calculation_value)[offsets]
+
     def _iter_conformed_arrays_(self, crosswalk, variable_shape, arr, arr_fill, arr_fill_sample_size):
         # Allow sample size array to be set to None.
-        if arr_fill_sample_size is None:
-            calc_sample_size = False
+        if arr_fill_sample_size is None or not self.calc_sample_size:
+            arrays = [arr, arr_fill]
         else:
-            calc_sample_size = self.calc_sample_size
+            arrays = [arr, arr_fill, arr_fill_sample_size]
 
+        for yld in self._iter_conformed_(crosswalk, variable_shape, arrays):
+            yield tuple(yld)
+
+    def _iter_conformed_(self, crosswalk, variable_shape, arrays):
         itr_extra_indices, src_names_extra_removed = self._get_extra_indices_itr_and_src_names_(crosswalk,
                                                                                                 variable_shape)
 
         # Loop for the extra dimensions.
         for indices in itr_extra_indices:
             # Slice for the extra dimensions.
-            slc = [slice(None)] * arr.ndim
+            slc = [slice(None)] * arrays[0].ndim
             for ii in indices:
                 slc[ii[0]] = ii[1]
-            extras_removed = arr.__getitem__(slc)
-            extras_removed_fill = arr_fill.__getitem__(slc)
-            if calc_sample_size:
-                extras_removed_fill_sample_size = arr_fill_sample_size.__getitem__(slc)
-
-            # Swap axes for the calculation values, the fill array for the calculation result, and (potentially) the
-            # sample size.
-            carr, carr_fill = [conform_array_by_dimension_names(t, src_names_extra_removed, STANDARD_DIMENSIONS)
-                               for t in [extras_removed, extras_removed_fill]]
-            if calc_sample_size:
-                carr_fill_sample_size = conform_array_by_dimension_names(extras_removed_fill_sample_size,
-                                                                         src_names_extra_removed,
-                                                                         STANDARD_DIMENSIONS)
-
-            if not calc_sample_size:
-                yld = (carr, carr_fill)
-            else:
-                yld = (carr, carr_fill, carr_fill_sample_size)
 
-            yield yld
+            # Swap axes for the calculation values and any arrays sharing its dimensions (i.e. the fill array for the
+            # calculation result and the sample size).
+            yield [conform_array_by_dimension_names(arr.__getitem__(slc), src_names_extra_removed,
+                                                    STANDARD_DIMENSIONS) for arr in arrays]
 
     def _set_derived_variable_alias_(self, dv, parent_variables):
         """
@@ -745,6 +811,10 @@ class AbstractUnivariateSetFunction(AbstractUnivariateFunction):
     Base class for functions operating on a single variable but always reducing input data along the time dimension.
     """
 
+    #: Outputs computed in a fused pass with other set functions. Maps calculation names to fill dictionaries. See
+    #: :func:`~ocgis.calc.fused.get_fused_fills`.
+    fused_fills = None
+
     def aggregate_temporal(self, *args, **kwargs):
         """
         This operations is always implicit to :meth:`~ocgis.calc.base.AbstractFunction.calculate`.
@@ -754,8 +824,11 @@ class AbstractUnivariateSetFunction(AbstractUnivariateFunction):
 
     def _execute_(self):
         for variable, calculation_name in self.iter_calculation_targets():
-            # These executes a calculation with a temporal aggregation.
-            fill = self._get_temporal_agg_fill_(variable, calculation_name, self.file_only)
+            if self.fused_fills is None:
+                # These executes a calculation with a temporal aggregation.
+                fill = self._get_temporal_agg_fill_(variable, calculation_name, self.file_only)
+            else:
+                fill = self.fused_fills[calculation_name]
             # Add the output to the variable collection
             self._add_to_collection_(value=fill)
 
@@ -779,6 +852,9 @@ class AbstractMultivariateFunction(AbstractFunction):
     #: If True, time aggregation is external to the calculation and will require running the standard time aggregation
     #: methods.
     time_aggregation_external = True
+    #: Maximum number of elements read from each required variable at once. Variables are read and calculated in blocks
+    #: of rows along the spatial y-dimension. If ``None``, required variables are read in full.
+    block_size = 2 ** 22
 
     def __init__(self, *args, **kwargs):
         if kwargs.get('calc_sample_size') is True:
@@ -834,30 +910,41 @@ class AbstractMultivariateFunction(AbstractFunction):
         # calculation initialization.
         keys = list(calculation_targets.keys())
         crosswalks = [self._get_dimension_crosswalk_(calculation_targets[k]) for k in keys]
-        variable_shapes = [calculation_targets[k].shape for k in keys]
-        arrs = [self.get_variable_value(calculation_targets[k]) for k in keys]
         archetype = calculation_targets[keys[0]]
         fill = self.get_fill_variable(archetype, self.alias, archetype.dimensions, self.file_only,
                                       add_repeat_record_archetype_name=False)
         fill.units = self.get_output_units()
-        arr_fill = self.get_variable_value(fill)
-
-        itrs = [self._iter_conformed_arrays_(crosswalks[idx], variable_shapes[idx], arrs[idx], arr_fill, None)
-                for idx in range(len(crosswalks))]
-
-        for yld in zip(*itrs):
-            parms = {}
-            for idx in range(len(keys)):
-                parms[keys[idx]] = yld[idx][0]
-            for k, v in self.parms.items():
-                if k not in self.required_variables:
-                    parms.update({k: v})
-            res = self.calculate(**parms)
-            carr_fill = yld[0][1]
-            carr_fill.data[:] = res.data
-            carr_fill.mask[:] = res.mask
 
         if not self.file_only:
+            arr_fill = self.get_variable_value(fill)
+
+            # Read aligned blocks of the required variables from source so only a block of each is in memory at once.
+            for block in self._iter_blocks_(archetype, crosswalks[0]):
+                targets = [calculation_targets[k] for k in keys]
+                if block is None:
+                    arr_fill_block = arr_fill
+                else:
+                    targets = [self._get_variable_block_(t, c, block) for t, c in zip(targets, crosswalks)]
+                    slc = [slice(None)] * arr_fill.ndim
+                    slc[crosswalks[0].index(DimensionMapKey.Y)] = block
+                    arr_fill_block = arr_fill[tuple(slc)]
+                arrs = [self.get_variable_value(t) for t in targets]
+
+                itrs = [self._iter_conformed_arrays_(crosswalks[idx], targets[idx].shape, arrs[idx], arr_fill_block,
+                                                     None) for idx in range(len(crosswalks))]
+
+                for yld in zip(*itrs):
+                    parms = {}
+                    for idx in range(len(keys)):
+                        parms[keys[idx]] = yld[idx][0]
+                    for k, v in self.parms.items():
+                        if k not in self.required_variables:
+                            parms.update({k: v})
+                    res = self.calculate(**parms)
+                    carr_fill = yld[0][1]
+                    carr_fill.data[:] = res.data
+                    carr_fill.mask[:] = res.mask
+
             fill.set_value(arr_fill)
 
         if self.tgd is not None:
@@ -868,6 +955,27 @@ class AbstractMultivariateFunction(AbstractFunction):
 
         self._add_to_collection_(fill)
 
+    def _iter_blocks_(self, archetype, crosswalk):
+        # Yield slices of rows along the y-dimension. None is yielded if the variable should be read in full.
+        if self.block_size is None or DimensionMapKey.Y not in crosswalk:
+            yield None
+            return
+        axis = crosswalk.index(DimensionMapKey.Y)
+        shape = archetype.shape
+        row_size = int(np.prod(shape[:axis] + shape[axis + 1:]))
+        step = max(1, self.block_size // max(1, row_size))
+        if step >= shape[axis]:
+            yield None
+            return
+        for start in range(0, shape[axis], step):
+            yield slice(start, min(start + step, shape[axis]))
+
+    @staticmethod
+    def _get_variable_block_(variable, crosswalk, block):
+        # Slicing a variable sourced from file only reads the block when its value is requested.
+        dimension_name = variable.dimensions[crosswalk.index(DimensionMapKey.Y)].name
+        return variable[{dimension_name: block}]
+
     @classmethod
     def validate(cls, ops):
         if ops.calc_sample_size:
@@ -0,0 +1,150 @@
+"""
+Persistent on-disk cache for percentile bases used by percentile-based indices. Computing a basis from a reference period
+is typically the most expensive step of these indices and the reference period is often shared by many requests. Bases
+are stored as compressed NumPy ``npz`` files in :attr:`ocgis.env.DIR_PERCENTILE_CACHE`.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from ocgis import env
+from ocgis.util.disk_cache import DiskCache
+from ocgis.util.helpers import get_iter
+
+
+class PercentileBasisCache(DiskCache):
+    """
+    Persistent on-disk cache for percentile bases. A basis is either an array or a dictionary mapping calendar day
+    tuples ``(month, day)`` to arrays. Bases are keyed by a fingerprint of everything used to compute them (see
+    :func:`~ocgis.calc.basis_cache.get_basis_fingerprint`). See :class:`~ocgis.util.disk_cache.DiskCache`.
+
+    :param str directory: The cache directory. It is created if it does not exist.
+    :param int max_size: The maximum number of bases to keep in the cache.
+    """
+
+    def __init__(self, directory, max_size=32):
+        super(PercentileBasisCache, self).__init__(directory, ['.npz'], max_size=max_size)
+
+    def get_basis(self, fingerprint, create):
+        """
+        Get a percentile basis loading it from the cache if it is available. Otherwise, create and persist the basis.
+
+        :param str fingerprint: The basis fingerprint.
+        :param create: A callable with no arguments returning the basis.
+        :type create: function
+        :rtype: :class:`numpy.ndarray` | :class:`collections.OrderedDict`
+        """
+
+        def _create_(tmp_path):
+            basis = create()
+            with open(tmp_path + '.npz', 'wb') as f:
+                np.savez_compressed(f, **_get_archive_from_basis_(basis))
+            return basis
+
+        def _load_(path):
+            with np.load(path + '.npz') as archive:
+                return _get_basis_from_archive_(archive)
+
+        return self.get(fingerprint, _create_, _load_)
+
+
+def get_basis_fingerprint(*parts):
+    """
+    :param parts: The basis key elements. Arrays are hashed by value, mask, data type, and shape. Other elements are
+     hashed by their string representation.
+    :returns: A hash of the key elements.
+    :rtype: str
+    """
+
+    sha = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            data = np.ascontiguousarray(np.ma.getdata(part))
+            sha.update('{}|{}|'.format(data.dtype.str, data.shape).encode())
+            if data.dtype == object:
+                sha.update(repr(data.tolist()).encode())
+            else:
+                sha.update(data.tobytes())
+            if isinstance(part, np.ma.MaskedArray):
+                sha.update(np.ascontiguousarray(np.ma.getmaskarray(part)).tobytes())
+        else:
+            sha.update(repr(part).encode())
+        sha.update(b'|')
+    return sha.hexdigest()
+
+
+def get_file_identity(uri):
+    """
+    :param uri: One or more source paths.
+    :type uri: str | sequence
+    :returns: A tuple of absolute paths, sizes, and modification times or ``None`` if any source is not a local file.
+    :rtype: tuple
+    """
+
+    ret = []
+    for u in get_iter(uri):
+        if not os.path.isfile(u):
+            return None
+        stat = os.stat(u)
+        ret.append((os.path.abspath(u), stat.st_size, stat.st_mtime))
+    return tuple(ret)
+
+
+def get_percentile_basis(create, *parts):
+    """
+    Get a percentile basis from the cache in :attr:`ocgis.env.DIR_PERCENTILE_CACHE`. If the cache directory is not set,
+    the basis is created without caching.
+
+    :param create: A callable with no arguments returning the basis.
+    :type create: function
+    :param parts: The basis key elements. See :func:`~ocgis.calc.basis_cache.get_basis_fingerprint`. These must
+     identify everything used to compute the basis.
+    :rtype: :class:`numpy.ndarray` | :class:`collections.OrderedDict`
+    """
+
+    if env.DIR_PERCENTILE_CACHE is None:
+        ret = create()
+    else:
+        cache = PercentileBasisCache(env.DIR_PERCENTILE_CACHE, max_size=env.PERCENTILE_CACHE_SIZE)
+        ret = cache.get_basis(get_basis_fingerprint(*parts), create)
+    return ret
+
+
+def _get_archive_from_basis_(basis):
+    if isinstance(basis, dict):
+        keys = np.array(list(basis.keys()), dtype=int).reshape(-1, 2)
+        values = list(basis.values())
+    else:
+        keys = None
+        values = basis
+    values = np.ma.asarray(values) if _get_is_masked_(values) else np.asarray(values)
+
+    ret = {'data': np.ma.getdata(values)}
+    if keys is not None:
+        ret['keys'] = keys
+    if isinstance(values, np.ma.MaskedArray):
+        ret['mask'] = np.ma.getmaskarray(values)
+        ret['fill_value'] = np.array(values.fill_value)
+    return ret
+
+
+def _get_basis_from_archive_(archive):
+    values = archive['data']
+    if 'mask' in archive:
+        values = np.ma.array(values, mask=archive['mask'], fill_value=archive['fill_value'][()])
+    if 'keys' in archive:
+        ret = OrderedDict()
+        for key, value in zip(archive['keys'].tolist(), values):
+            ret[tuple(key)] = value
+    else:
+        ret = values
+    return ret
+
+
+def _get_is_masked_(values):
+    if isinstance(values, list):
+        return any([isinstance(v, np.ma.MaskedArray) for v in values])
+    return isinstance(values, np.ma.MaskedArray)
+
@@ -1,10 +1,12 @@
 import logging
+from collections import OrderedDict
 
 import numpy as np
 
 from ocgis.base import get_variable_names, orphaned
-from ocgis.calc.base import AbstractMultivariateFunction
+from ocgis.calc.base import AbstractMultivariateFunction, AbstractUnivariateSetFunction
 from ocgis.calc.eval_function import EvalFunction, MultivariateEvalFunction
+from ocgis.calc.fused import get_is_fusable, get_fused_fills
 from ocgis.util.logging_ocgis import ocgis_lh
 
 
@@ -92,14 +94,16 @@ class CalculationEngine(object):
 
                 out_vc = VariableCollection()
 
-                for f in self.funcs:
+                # Set functions sharing the field's temporal grouping are computed together in a single pass.
+                fused_fills = self._get_fused_fills_(field, file_only, new_temporal)
+
+                for idx, f in enumerate(self.funcs):
                     try:
                         ocgis_lh('Calculating: {0}'.format(f['func']), logger='calc.engine')
                         # Initialize the function.
-                        function = f['ref'](alias=f['name'], dtype=None, field=field, file_only=file_only, vc=out_vc,
-                                            parms=f['kwds'], tgd=new_temporal, calc_sample_size=self.calc_sample_size,
-                                            meta_attrs=f.get('meta_attrs'),
-                                            spatial_aggregation=self.spatial_aggregation)
+                        function = self._get_function_(f, field, file_only, out_vc, new_temporal)
+                        if idx in fused_fills:
+                            function.fused_fills = fused_fills[idx]
                         # Allow a calculation to create a temporal aggregation after initialization.
                         if new_temporal is None and function.tgd is not None:
                             new_temporal = function.tgd.extract()
@@ -151,6 +155,33 @@ class CalculationEngine(object):
                 coll.children[ugid].children[field_name] = out_field
         return coll
 
+    def _get_function_(self, f, field, file_only, vc, tgd):
+        return f['ref'](alias=f['name'], dtype=None, field=field, file_only=file_only, vc=vc, parms=f['kwds'], tgd=tgd,
+                        calc_sample_size=self.calc_sample_size, meta_attrs=f.get('meta_attrs'),
+                        spatial_aggregation=self.spatial_aggregation)
+
+    def _get_fused_fills_(self, field, file_only, tgd):
+        """
+        :returns: Fused outputs keyed by function index. Empty if fewer than two functions may be fused.
+        :rtype: dict
+        """
+
+        functions = OrderedDict()
+        if tgd is not None:
+            for idx, f in enumerate(self.funcs):
+                if issubclass(f['ref'], AbstractUnivariateSetFunction) and f['ref'].batched_reduction:
+                    function = self._get_function_(f, field, file_only, None, tgd)
+                    if get_is_fusable(function):
+                        functions[idx] = function
+
+        if len(functions) < 2:
+            ret = {}
+        else:
+            ocgis_lh('Calculating fused: {0}'.format([self.funcs[idx]['func'] for idx in functions]),
+                     logger='calc.engine')
+            ret = dict(zip(functions.keys(), get_fused_fills(list(functions.values()))))
+        return ret
+
 
 def format_return_field(function_tag, out_field, new_temporal=None):
     # Remove the variables used by the calculation.
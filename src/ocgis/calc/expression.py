@@ -0,0 +1,247 @@
+"""
+Compilation of string calculation expressions such as ``'es=6.1078*exp(17.08085*(tas-273.16)/(234.175+(tas-273.16)))'``.
+The right-hand side is parsed into an abstract syntax tree and validated against the supported operators and
+:attr:`~ocgis.constants.ENABLED_NUMPY_UFUNCS`. Expressions are never passed to ``eval``.
+
+Evaluation is blockwise so temporary arrays are bounded by :data:`BLOCK_SIZE` elements. Within a block, each operation
+writes into the buffer of a temporary operand when the data types match so an expression only holds one temporary per
+level of nesting. Masks follow NumPy masked array arithmetic: the output is masked where any input is masked, where a
+function's domain is invalid (i.e. ``log`` of a non-positive value), and where a division or power operator returns a
+non-finite value.
+"""
+import ast
+import operator
+
+import numpy as np
+
+from ocgis import constants
+
+# Maximum number of elements in an evaluation block.
+BLOCK_SIZE = 2 ** 20
+
+# Supported operators. Values are tuples of the array ufunc, the scalar operator, and whether non-finite results are
+# masked.
+_BINARY_OPERATORS = {ast.Add: (np.add, operator.add, False),
+                     ast.Sub: (np.subtract, operator.sub, False),
+                     ast.Mult: (np.multiply, operator.mul, False),
+                     ast.Div: (np.true_divide, operator.truediv, True),
+                     ast.Pow: (np.power, operator.pow, True)}
+_UNARY_OPERATORS = {ast.USub: (np.negative, operator.neg)}
+
+
+class CompiledExpression(object):
+    """
+    A parsed and validated string calculation expression.
+
+    :param str expr: The expression to compile. It must have an equals sign with the output variable name on the
+     left-hand side.
+    :param variable_names: If provided, the only variable names allowed in the expression.
+    :type variable_names: sequence of str
+    :raises: ValueError
+    """
+
+    def __init__(self, expr, variable_names=None):
+        try:
+            name, rhs = expr.split('=')
+        except ValueError:
+            msg = 'Unable to parse expression string: "{0}". The equals sign is likely missing.'
+            raise ValueError(msg.format(expr))
+
+        self.expr = expr
+        #: The output variable name.
+        self.name = name.strip()
+        #: Variable names referenced by the expression in order of appearance.
+        self.variable_names = []
+
+        try:
+            tree = ast.parse(rhs.strip(), mode='eval')
+        except SyntaxError:
+            raise ValueError('Unable to parse expression string: "{0}".'.format(rhs))
+        self._allowed_variable_names = variable_names
+        self._rhs = rhs
+        self._root = self._get_node_(tree.body)
+
+        if len(self.variable_names) == 0:
+            raise ValueError('Expression string "{0}" does not reference any variables.'.format(rhs))
+
+    def evaluate(self, arrays, out=None, block_size=None):
+        """
+        Evaluate the expression.
+
+        :param dict arrays: Maps variable names to arrays. All referenced variables must be present and have the same
+         shape.
+        :param out: An optional output masked array with a mask array. Results are cast to its data type.
+        :type out: :class:`numpy.ma.MaskedArray`
+        :param int block_size: The maximum number of elements evaluated at once. Defaults to :data:`BLOCK_SIZE`.
+        :returns: The evaluated expression. ``out`` is returned if provided.
+        :rtype: :class:`numpy.ma.MaskedArray`
+        """
+
+        block_size = block_size or BLOCK_SIZE
+        arrays = [(name, arrays[name]) for name in self.variable_names]
+        shape = arrays[0][1].shape
+
+        # Resolve the output data type of each operation using single element samples.
+        sample_index = tuple([slice(0, 1)] * len(shape))
+        dtypes = {}
+        self._set_dtypes_(self._root, {name: np.ma.getdata(arr)[sample_index] for name, arr in arrays}, dtypes)
+
+        if out is None:
+            root_dtype = dtypes.get(self._root, arrays[0][1].dtype)
+            out = np.ma.array(np.zeros(shape, dtype=root_dtype), mask=np.zeros(shape, dtype=bool))
+
+        for block in iter_blocks(shape, block_size):
+            data = {}
+            mask = None
+            for name, arr in arrays:
+                block_arr = arr[block]
+                data[name] = np.ma.getdata(block_arr)
+                if mask is None:
+                    mask = np.ma.getmaskarray(block_arr).copy()
+                else:
+                    mask |= np.ma.getmaskarray(block_arr)
+            value, _ = self._evaluate_node_(self._root, data, dtypes, mask)
+            out.data[block] = value
+            out.mask[block] = mask
+
+        return out
+
+    def _evaluate_node_(self, node, data, dtypes, mask):
+        # Returns the node value and whether it is a temporary array that may be overwritten.
+        if node.kind == 'constant':
+            return node.value, False
+        elif node.kind == 'variable':
+            return data[node.name], False
+
+        operands = [self._evaluate_node_(child, data, dtypes, mask) for child in node.children]
+        values = [value for value, _ in operands]
+
+        # Domains depend on the operand values so must be evaluated before an operand buffer is reused.
+        with np.errstate(all='ignore'):
+            if node.domain is not None:
+                mask |= np.ma.filled(node.domain(*values), True)
+
+            # Reuse a temporary operand buffer for the output if it has the output data type.
+            out = None
+            for value, is_temporary in operands:
+                if is_temporary and value.dtype == dtypes[node]:
+                    out = value
+                    break
+            if out is None:
+                ret = node.ufunc(*values)
+            else:
+                ret = node.ufunc(*values, out=out)
+
+            if node.mask_invalid:
+                mask |= np.invert(np.isfinite(ret))
+
+        return ret, True
+
+    def _get_node_(self, node):
+        if type(node).__name__ in ('Num', 'Constant'):
+            # Python 3.8 and later parse numbers as "ast.Constant".
+            value = getattr(node, 'value', getattr(node, 'n', None))
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                self._raise_unsupported_(node)
+            ret = _Node('constant', value=value)
+        elif isinstance(node, ast.Name):
+            name = node.id
+            is_allowed = self._allowed_variable_names is None or name in self._allowed_variable_names
+            if name in constants.ENABLED_NUMPY_UFUNCS or not is_allowed:
+                self._raise_unsupported_(node)
+            if name not in self.variable_names:
+                self.variable_names.append(name)
+            ret = _Node('variable', name=name)
+        elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            ufunc, scalar_operator, mask_invalid = _BINARY_OPERATORS[type(node.op)]
+            children = [self._get_node_(node.left), self._get_node_(node.right)]
+            ret = _Node('operation', children=children, ufunc=ufunc, scalar_operator=scalar_operator,
+                        mask_invalid=mask_invalid)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.UAdd):
+            ret = self._get_node_(node.operand)
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            ufunc, scalar_operator = _UNARY_OPERATORS[type(node.op)]
+            ret = _Node('operation', children=[self._get_node_(node.operand)], ufunc=ufunc,
+                        scalar_operator=scalar_operator)
+        elif isinstance(node, ast.Call):
+            name = getattr(node.func, 'id', None)
+            ufunc = getattr(np, name, None) if name in constants.ENABLED_NUMPY_UFUNCS else None
+            has_extra_arguments = len(node.keywords) > 0 or any([type(a).__name__ == 'Starred' for a in node.args]) \
+                                  or getattr(node, 'starargs', None) is not None \
+                                  or getattr(node, 'kwargs', None) is not None
+            if not isinstance(ufunc, np.ufunc) or has_extra_arguments or len(node.args) != ufunc.nin:
+                self._raise_unsupported_(node)
+            children = [self._get_node_(a) for a in node.args]
+            # The function is applied to scalars with NumPy like the operators.
+            ret = _Node('operation', children=children, ufunc=ufunc, scalar_operator=ufunc)
+        else:
+            self._raise_unsupported_(node)
+
+        # Fold operations on constants into a single constant.
+        if ret.kind == 'operation' and all([child.kind == 'constant' for child in ret.children]):
+            ret = _Node('constant', value=ret.scalar_operator(*[child.value for child in ret.children]))
+
+        return ret
+
+    def _raise_unsupported_(self, node):
+        if isinstance(node, ast.Name):
+            problem = node.id
+        elif isinstance(node, ast.Call):
+            problem = getattr(node.func, 'id', type(node.func).__name__)
+        else:
+            problem = type(node).__name__
+        raise ValueError('Unable to parse expression string: "{0}". Ensure the NumPy functions are enabled and '
+                         'appropriate variables have been requested. The problem string value is "{1}".'.format(
+            self._rhs, problem))
+
+    def _set_dtypes_(self, node, data, dtypes):
+        if node.kind == 'constant':
+            ret = node.value
+        elif node.kind == 'variable':
+            ret = data[node.name]
+        else:
+            values = [self._set_dtypes_(child, data, dtypes) for child in node.children]
+            with np.errstate(all='ignore'):
+                ret = node.ufunc(*values)
+            dtypes[node] = ret.dtype
+        return ret
+
+
+def iter_blocks(shape, block_size):
+    """
+    Yield indices of blocks covering an array. Blocks are contiguous along the last axes and contain at most
+    ``block_size`` elements unless a single element of the blocked axis is larger.
+
+    :param tuple shape: The array shape.
+    :param int block_size: The maximum number of elements in a block.
+    :rtype: tuple
+    """
+
+    # Find the first axis where the trailing axes fit in a block.
+    axis = 0
+    trailing_size = int(np.prod(shape[1:]))
+    while axis < len(shape) - 1 and trailing_size > block_size:
+        axis += 1
+        trailing_size = int(np.prod(shape[axis + 1:]))
+
+    if len(shape) == 0:
+        yield ()
+        return
+    step = max(1, block_size // max(1, trailing_size))
+    for leading in np.ndindex(*shape[:axis]):
+        for start in range(0, shape[axis], step):
+            yield tuple(leading) + (slice(start, start + step),)
+
+
+class _Node(object):
+    def __init__(self, kind, children=(), ufunc=None, scalar_operator=None, mask_invalid=False, name=None,
+                 value=None):
+        self.kind = kind
+        self.children = children
+        self.ufunc = ufunc
+        self.scalar_operator = scalar_operator
+        self.mask_invalid = mask_invalid
+        self.name = name
+        self.value = value
+        # Invalid domains follow NumPy masked array ufuncs.
+        self.domain = None if ufunc is None else np.ma.core.ufunc_domain.get(ufunc)
@@ -0,0 +1,109 @@
+"""
+Fused execution of batched set functions. Set functions sharing a field and temporal grouping are reduced in a single
+pass over each source variable: the value is read and conformed once, each temporal group segment is gathered once, and
+intermediate reductions (unmasked counts, sums, and means) are shared through
+:class:`~ocgis.calc.segment.SegmentStatistics`. Outputs are equal to executing each function separately.
+"""
+import itertools
+from collections import OrderedDict
+
+import numpy as np
+
+from ocgis.calc.base import AbstractUnivariateSetFunction
+from ocgis.calc.segment import SegmentStatistics
+from ocgis.constants import DimensionMapKey
+
+
+def get_is_fusable(function):
+    """
+    :param function: An initialized calculation function.
+    :type function: :class:`~ocgis.calc.base.AbstractFunction`
+    :returns: ``True`` if the function may be executed in a fused pass.
+    :rtype: bool
+    """
+
+    return isinstance(function, AbstractUnivariateSetFunction) and function.batched_reduction and \
+           function.tgd is not None and not function.file_only and not function.spatial_aggregation
+
+
+def get_fused_fills(functions):
+    """
+    Compute the outputs of fusable set functions in a single pass. Each function's calculation targets are validated
+    as they are during separate execution.
+
+    :param functions: Sequence of functions for which :func:`get_is_fusable` is ``True``. The functions must share the
+     same field and temporal grouping.
+    :type functions: sequence of :class:`~ocgis.calc.base.AbstractUnivariateSetFunction`
+    :returns: An ordered dictionary for each function mapping calculation names to fill dictionaries. Use these to set
+     :attr:`~ocgis.calc.base.AbstractUnivariateSetFunction.fused_fills`.
+    :rtype: list
+    """
+
+    archetype = functions[0]
+    calc_sample_size = archetype.calc_sample_size
+    ret = [OrderedDict() for _ in functions]
+    targets = [list(function.iter_calculation_targets()) for function in functions]
+
+    for function_targets in zip(*targets):
+        variable = function_targets[0][0]
+        names = [calculation_name for _, calculation_name in function_targets]
+
+        crosswalk = archetype._get_dimension_crosswalk_(variable)
+        time_axis = crosswalk.index(DimensionMapKey.TIME)
+        group_indices = archetype.tgd.get_group_indices(variable.shape[time_axis])
+
+        # Segment reductions are not defined for empty temporal groups. Execute the functions separately.
+        if group_indices is None:
+            for idx, (function, name) in enumerate(zip(functions, names)):
+                ret[idx][name] = function._get_temporal_agg_fill_(variable, name, function.file_only)
+            continue
+        indices, offsets = group_indices
+
+        # Create the fill variables.
+        fill_dimensions = list(variable.dimensions)
+        fill_dimensions[time_axis] = archetype.tgd.dimensions[0]
+        fills = [function.get_fill_variable(variable, name, fill_dimensions, False)
+                 for function, name in zip(functions, names)]
+        if calc_sample_size:
+            fill_sample_sizes = [function.get_fill_sample_size_variable(fill, False)
+                                 for function, fill in zip(functions, fills)]
+        else:
+            fill_sample_sizes = []
+
+        # Get value arrays. The source value is only read once.
+        arr = archetype.get_variable_value(variable)
+        arr_fills = [function.get_variable_value(fill) for function, fill in zip(functions, fills)]
+        arr_fill_sample_sizes = [function.get_variable_value(f) for function, f in zip(functions, fill_sample_sizes)]
+        arrays = [arr] + arr_fills + arr_fill_sample_sizes
+
+        for conformed in archetype._iter_conformed_(crosswalk, variable.shape, arrays):
+            carr = conformed[0]
+            carr_fills = conformed[1:len(functions) + 1]
+            carr_fill_sample_sizes = conformed[len(functions) + 1:]
+
+            for ir, il in itertools.product(range(carr.shape[0]), range(carr.shape[2])):
+                # Gather the temporal groups into contiguous segments once for all functions.
+                statistics = SegmentStatistics(carr[ir, indices, il, :, :], offsets)
+                for function, carr_fill in zip(functions, carr_fills):
+                    res = function.calculate_segment_statistics(statistics, **function.parms)
+                    carr_fill.data[ir, :, il, :, :] = res.data
+                    carr_fill.mask[ir, :, il, :, :] = np.ma.getmaskarray(res)
+
+                if calc_sample_size:
+                    sample_size_mask = np.ma.getmaskarray(statistics.values)[offsets]
+                    for carr_fill_sample_size in carr_fill_sample_sizes:
+                        carr_fill_sample_size.data[ir, :, il, :, :] = statistics.counts
+                        carr_fill_sample_size.mask[ir, :, il, :, :] = sample_size_mask
+
+        # Setting the values ensures the mask is updated on the output variables.
+        for idx, (fill, arr_fill, name) in enumerate(zip(fills, arr_fills, names)):
+            fill.set_value(arr_fill)
+            if calc_sample_size:
+                fill_sample_size = fill_sample_sizes[idx]
+                fill_sample_size.set_value(arr_fill_sample_sizes[idx])
+                fill_sample_size.set_mask(fill.get_mask())
+            else:
+                fill_sample_size = None
+            ret[idx][name] = {'fill': fill, 'sample_size': fill_sample_size}
+
+    return ret
@@ -0,0 +1,123 @@
+"""
+Registry of compiled kernels for calculation functions. A kernel is a plain Python function restricted to the subset of
+Python and NumPy supported by Numba's ``nopython`` mode. Kernels are registered with :func:`register_kernel` using the
+calculation function key and are compiled on first use when :attr:`ocgis.env.USE_NUMBA` is ``True``. Functions fall back
+to their NumPy implementation when Numba is not available.
+
+Kernels operate on plain arrays since masked arrays are not supported by Numba. There are two kernel types:
+
+* **cube**: ``kernel(data, mask, out, *args)`` fills ``out`` for all series. ``data`` and ``mask`` are two-dimensional
+  with time as the leading axis and one column for each series (grid cell).
+* **cell**: ``kernel(series, series_mask, *args)`` returns a scalar for a single one-dimensional series. Cell kernels
+  are applied to each series in parallel by a generated cube kernel.
+
+Registered kernels must match the NumPy implementation of their function. This is checked for every registered kernel
+by the conformance tests.
+"""
+import numpy as np
+
+from ocgis import env
+
+try:
+    import numba
+    from numba import prange
+except ImportError:
+    numba = None
+    # Kernels use "prange" for parallel loops. This is a normal range when the kernels are not compiled.
+    prange = range
+
+# Maps calculation function keys to registered kernels and their types.
+_KERNELS = {}
+# Compiled cube kernels keyed by calculation function key.
+_COMPILED = {}
+
+
+def register_kernel(key, per_cell=False):
+    """
+    Decorator registering a kernel for a calculation function.
+
+    :param str key: The calculation function key (i.e. ``'duration'``).
+    :param bool per_cell: If ``True``, the kernel is a cell kernel. Otherwise, it is a cube kernel.
+    :raises: ValueError
+    """
+
+    def _register_(kernel):
+        if key in _KERNELS:
+            raise ValueError('A kernel is already registered for function key: {}'.format(key))
+        _KERNELS[key] = (kernel, per_cell)
+        return kernel
+
+    return _register_
+
+
+def get_kernel(key, compiled=True):
+    """
+    Get the cube kernel for a calculation function. Cell kernels are wrapped in a cube kernel.
+
+    :param str key: The calculation function key.
+    :param bool compiled: If ``True``, return the kernel compiled by Numba. ``None`` is returned if Numba is not
+     available or is disabled with :attr:`ocgis.env.USE_NUMBA`. If ``False``, return the uncompiled kernel which is
+     useful for testing.
+    :returns: The cube kernel or ``None`` if no kernel is registered for ``key``.
+    :rtype: function
+    """
+
+    if key not in _KERNELS:
+        return None
+    kernel, per_cell = _KERNELS[key]
+
+    if not compiled:
+        return _get_cube_kernel_(kernel) if per_cell else kernel
+    if numba is None or not env.USE_NUMBA:
+        return None
+
+    try:
+        ret = _COMPILED[key]
+    except KeyError:
+        if per_cell:
+            ret = numba.njit(parallel=True)(_get_cube_kernel_(numba.njit(kernel)))
+        else:
+            ret = numba.njit(parallel=True)(kernel)
+        _COMPILED[key] = ret
+    return ret
+
+
+def apply_kernel(kernel, values, dtype, *args):
+    """
+    Apply a cube kernel with one output value for each series along the leading axis of an array.
+
+    :param kernel: The cube kernel returned by :func:`get_kernel`.
+    :type kernel: function
+    :param values: The array with the time axis first.
+    :type values: :class:`numpy.ma.MaskedArray`
+    :param dtype: The output data type.
+    :type dtype: type
+    :param args: Extra kernel arguments.
+    :returns: The kernel output with the shape of the trailing axes of ``values``.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    # Series are contiguous in memory since kernels typically iterate over each series.
+    ntime = values.shape[0]
+    data = np.asfortranarray(np.ma.getdata(values).reshape(ntime, -1))
+    mask = np.asfortranarray(np.ma.getmaskarray(values).reshape(ntime, -1))
+    out = np.zeros(data.shape[1], dtype=dtype)
+    kernel(data, mask, out, *args)
+    return out.reshape(values.shape[1:])
+
+
+def get_kernel_keys():
+    """
+    :returns: The calculation function keys with registered kernels.
+    :rtype: list
+    """
+
+    return sorted(_KERNELS.keys())
+
+
+def _get_cube_kernel_(cell_kernel):
+    def _cube_kernel_(data, mask, out, *args):
+        for ii in prange(data.shape[1]):
+            out[ii] = cell_kernel(data[:, ii], mask[:, ii], *args)
+
+    return _cube_kernel_
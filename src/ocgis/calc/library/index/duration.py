@@ -4,8 +4,13 @@ import numpy as np
 
 from ocgis import env
 from ocgis.calc import base
+from ocgis.calc.kernel import register_kernel, apply_kernel
+from ocgis.calc.runs import get_run_summary, get_run_frequencies
 from ocgis.exc import DefinitionValidationError
-from ocgis.util.helpers import iter_array
+
+# Summary operation codes for the duration kernel. The standard deviation is not computed by the kernel since NumPy's
+# summation order is not reproduced.
+KERNEL_SUMMARIES = {'mean': 0, 'median': 1, 'max': 2, 'min': 3}
 
 
 class Duration(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFunction):
@@ -28,26 +33,14 @@ class Duration(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFun
         """
 
         assert (len(values.shape) == 3)
-        # storage array for counts
-        shp_out = values.shape[-2:]
-        store = np.zeros(shp_out, dtype=self.dtype).flatten()
-        # get the summary operation from the numpy library
-        summary_operation = getattr(np, summary)
-
-        # find longest sequence for each geometry across time dimension
-        for ii, fill in enumerate(self._iter_consecutive_(values, threshold, operation)):
-            # case of only a singular occurrence
-            if len(fill) > 1:
-                fill = summary_operation(fill)
-            else:
-                try:
-                    fill = fill[0]
-                # value is likely masked
-                except IndexError:
-                    fill = 0
-            store[ii] = fill
-
-        store.resize(shp_out)
+        # summarize the spells for all geometries at once
+        arr = self._get_logical_(values, threshold, operation)
+        kernel = self.get_kernel()
+        if kernel is not None and summary in KERNEL_SUMMARIES:
+            store = apply_kernel(kernel, arr, float, KERNEL_SUMMARIES[summary])
+        else:
+            store = get_run_summary(arr, summary=summary)
+        store = store.astype(self.dtype)
 
         # update the output mask. this only applies to geometries so pick the
         # first masked time field
@@ -55,10 +48,9 @@ class Duration(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFun
 
         return store
 
-    def _iter_consecutive_(self, values, threshold, operation):
-        # time index reference
-        ref = np.arange(0, values.shape[0])
-        # perform requested logical operation
+    @staticmethod
+    def _get_logical_(values, threshold, operation):
+        # perform requested logical operation. masked values end a spell.
         if operation == 'gt':
             arr = values > threshold
         elif operation == 'lt':
@@ -67,27 +59,9 @@ class Duration(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFun
             arr = values >= threshold
         elif operation == 'lte':
             arr = values <= threshold
-
-        # find longest sequence for each geometry across time dimension
-        for rowidx, colidx in iter_array(values[0, :, :], use_mask=False):
-            vec = arr[:, rowidx, colidx].reshape(-1)
-            # check first if there is a longer series than 1
-            if np.any(np.diff(ref[vec]) == 1):
-                # find locations where the values switch
-                diff_idx = np.diff(vec)
-                if diff_idx.shape != ref.shape:
-                    diff_idx = np.append(diff_idx, [False])
-                split_idx = ref[diff_idx] + 1
-                splits = np.array_split(vec, split_idx)
-                fill = [a.sum() for a in splits if np.all(a)]
-            # case of only a singular occurrence
-            elif np.any(vec):
-                fill = [1]
-            # case for no occurrence
-            else:
-                fill = [0]
-
-            yield (fill)
+        else:
+            raise NotImplementedError(operation)
+        return np.ma.filled(arr, False)
 
     @classmethod
     def validate(cls, ops):
@@ -115,9 +89,12 @@ class FrequencyDuration(base.AbstractKeyedOutputFunction, Duration):
 
         shp_out = values.shape[-2:]
         store = np.zeros(shp_out, dtype=object).flatten()
-        for ii, duration in enumerate(self._iter_consecutive_(values, threshold, operation)):
-            summary = self._get_summary_(duration)
-            store[ii] = summary
+        arr = self._get_logical_(values, threshold, operation)
+        element, duration, count = get_run_frequencies(arr)
+        # Split the flat frequency table into a structure for each geometry.
+        splits = np.nonzero(np.diff(element))[0] + 1
+        for ii, (sub_duration, sub_count) in enumerate(zip(np.split(duration, splits), np.split(count, splits))):
+            store[ii] = self._get_summary_(sub_duration, sub_count)
         store.resize(shp_out)
 
         # Update the output mask. this only applies to geometries so pick the first masked time field
@@ -133,22 +110,64 @@ class FrequencyDuration(base.AbstractKeyedOutputFunction, Duration):
     def validate(cls, ops):
         Duration.validate(ops)
 
-    def _get_summary_(self, duration):
+    def _get_summary_(self, duration, count):
         """
-        :param duration: List of duration elements for frequency target.
-        :type duration: list
-        
-        >>> duration = [3, 5, 2, 2]
-        
+        :param duration: Unique duration elements for the frequency target.
+        :type duration: :class:`numpy.ndarray`
+        :param count: Occurrence count for each duration element.
+        :type count: :class:`numpy.ndarray`
+
+        >>> duration = [2, 3, 5]
+        >>> count = [2, 1, 1]
+
         :returns: NumPy structure with dimension equal to the count of unique elements
          in the `duration` sequence.
         """
 
-        set_duration = set(duration)
-        ret = np.empty(len(set_duration), dtype=self.structure_dtype)
-        for ii, sd in enumerate(set_duration):
-            idx = np.array(duration) == sd
-            count = idx.sum()
-            ret[ii]['duration'] = sd
-            ret[ii]['count'] = count
+        ret = np.empty(len(duration), dtype=self.structure_dtype)
+        ret['duration'] = duration
+        ret['count'] = count
         return ret
+
+
+@register_kernel(Duration.key, per_cell=True)
+def duration_kernel(series, series_mask, summary):
+    """
+    Compiled kernel equivalent to :func:`~ocgis.calc.runs.get_run_summary` for a single series. See
+    :mod:`ocgis.calc.kernel`.
+
+    :param series: The boolean series. Masked values end a run.
+    :param series_mask: The series mask.
+    :param int summary: The summary operation code from :data:`KERNEL_SUMMARIES`.
+    :rtype: float
+    """
+
+    lengths = np.zeros(series.shape[0] // 2 + 1, dtype=np.int64)
+    nruns = 0
+    current = 0
+    for ii in range(series.shape[0]):
+        if series[ii] and not series_mask[ii]:
+            current += 1
+        elif current > 0:
+            lengths[nruns] = current
+            nruns += 1
+            current = 0
+    if current > 0:
+        lengths[nruns] = current
+        nruns += 1
+
+    if nruns == 0:
+        return 0.
+    runs = lengths[:nruns]
+    if nruns == 1:
+        ret = float(runs[0])
+    elif summary == 0:
+        ret = runs.sum() / float(nruns)
+    elif summary == 1:
+        ordered = np.sort(runs)
+        ret = (ordered[(nruns - 1) // 2] + ordered[nruns // 2]) / 2.
+    elif summary == 2:
+        ret = float(runs.max())
+    else:
+        ret = float(runs.min())
+    return ret
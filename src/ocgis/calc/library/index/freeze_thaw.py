@@ -1,10 +1,14 @@
 from ocgis import env
 from ocgis.calc import base
-from ocgis.util.helpers import iter_array
+from ocgis.calc.kernel import register_kernel, apply_kernel
 from ocgis.util.units import get_are_units_equal_by_string_or_cfunits
 import numpy as np
 import datetime as dt
 
+# Maximum number of elements in the range extreme tables of a block of grid cells used by "freezethawnd".
+BLOCK_SIZE = 2 ** 24
+
+
 class FreezeThaw(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFunction):
     key = 'freezethaw'
     description = "Number of freeze-thaw events, where freezing and thawing occurs once a threshold of degree days below or above 0C is reached. A complete cycle (freeze-thaw-freeze) will return a value of 2. "
@@ -38,16 +42,14 @@ class FreezeThaw(base.AbstractUnivariateSetFunction, base.AbstractParameterizedF
                                                       try_cfunits=env.USE_CFUNITS):
             tas = values - 273.15
 
-        # Storage array for count
-        shp_out = values.shape[-2:]
-        out = np.zeros(shp_out, dtype=int).flatten()
-
-        # Actual computations, grid cell by grid cell.
-        for ii, (rowidx, colidx) in enumerate(iter_array(values[0, :, :], use_mask=True)):
-            x = tas[:, rowidx, colidx].reshape(-1)
-            out[ii] = freezethaw1d(x, threshold)
-
-        out.resize(shp_out)
+        # Count transitions for all grid cells at once. Cells masked at the first time step are zero.
+        kernel = self.get_kernel()
+        if kernel is None:
+            out = np.ma.filled(freezethawnd(tas, threshold), 0)
+        else:
+            out = apply_kernel(kernel, tas, int, threshold)
+            out[np.ma.getmaskarray(tas).all(axis=0)] = 0
+        out[np.ma.getmaskarray(values)[0]] = 0
 
         # update the output mask. this only applies to geometries so pick the
         # first masked time field
@@ -114,3 +116,185 @@ def freezethaw1d(x, threshold):
 
     # Return the numbe  r of transitions from frozen to thawed or vice-versa
     return len(cycles) - 2 # There are two "artificial" transitions
+
+
+def freezethawnd(x, threshold):
+    """
+    Return the number of freeze-thaw transitions for each series along the
+    leading axis. Equivalent to calling :func:`freezethaw1d` on each series
+    but all series are processed at once.
+
+    The first time the cumulative degree-days from each origin reach the
+    threshold is found with binary searches on tables of range extremes, so
+    the cost is O(T log T) per series instead of O(T**2).
+
+    Parameters
+    ----------
+    x : ndarray
+      The daily temperature series (C) with time as the leading axis.
+      Masked values are skipped like in :func:`freezethaw1d`.
+    threshold : float
+      The threshold in degree-days above or below the freezing point at
+      which we consider the soil thawed or frozen.
+
+    Returns
+    -------
+    out : MaskedArray
+      The number of transitions with the shape of the trailing axes of `x`.
+      Series with all values masked are masked.
+    """
+
+    shp_out = x.shape[1:]
+    ntime = x.shape[0]
+    x = x.reshape(ntime, -1)
+    mask = np.ma.getmaskarray(x)
+    out = np.zeros(x.shape[1], dtype=int)
+
+    # Size cell blocks by the range extreme tables which dominate memory use.
+    nlevels = int(np.log2(ntime + 1)) + 1
+    block_size = max(1, BLOCK_SIZE // ((ntime + 1) * nlevels))
+    for start in range(0, x.shape[1], block_size):
+        block = slice(start, start + block_size)
+        out[block] = _freezethaw_block_(x[:, block], mask[:, block], threshold)
+
+    out = out.reshape(shp_out)
+    return np.ma.array(out, mask=mask.all(axis=0).reshape(shp_out))
+
+
+def _freezethaw_block_(x, mask, threshold):
+    # Series are columns of "x". Masked values are removed from the series in "freezethaw1d". Here they add nothing to
+    # the cumulative sum and do not change the sign state, which gives the same transitions.
+    ntime, ncells = x.shape
+    cols = np.arange(ncells)
+
+    # This avoids issues when the threshold is reached right at the first value.
+    valid = np.zeros((ntime + 1, ncells), dtype=bool)
+    valid[0] = True
+    valid[1:] = np.invert(mask)
+    filled = np.zeros((ntime + 1, ncells), dtype=float)
+    filled[1:] = np.ma.filled(x, 0)
+
+    # Compute the cumulative degree days relative to the freezing point.
+    cx = np.cumsum(filled, axis=0)
+
+    # The freezing point is crossed at an origin when the sign of the last unmasked value differs from the next unmasked
+    # value. The first origin is always considered.
+    over = filled >= 0
+    if mask.any():
+        last_valid = np.where(valid, np.arange(ntime + 1)[:, None], 0)
+        np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+        over_filled = np.take(over, last_valid * ncells + cols)
+    else:
+        over_filled = over
+    cross = np.zeros((ntime + 1, ncells), dtype=bool)
+    cross[0] = True
+    cross[:-1] |= np.logical_and(valid[1:], over_filled[:-1] != over[1:])
+
+    # Only crossings are origins of a search for the threshold. These are ordered by time then by cell.
+    origin, cell = np.nonzero(cross)
+    anchor = cx[origin, cell]
+
+    # The first index from each origin where the degree days reach the threshold from above and below.
+    up = _get_first_passage_(cx, np.maximum, origin, cell, lambda extreme: extreme - anchor < threshold)
+    down = _get_first_passage_(cx, np.minimum, origin, cell, lambda extreme: extreme - anchor > -threshold)
+    passage = np.minimum(up, down)
+    sign = np.sign(down - up)
+    found = passage <= ntime
+
+    # Test for the alternance of freeze and thaw events in time order. Crossings occurring before the last event are
+    # skipped. Only store an event if it is different from the last.
+    last_passage = np.zeros(ncells, dtype=int)
+    last_sign = np.zeros(ncells, dtype=sign.dtype)
+    count = np.zeros(ncells, dtype=int)
+    bounds = np.searchsorted(origin, np.arange(ntime + 2))
+    for ii in range(ntime + 1):
+        select = slice(bounds[ii], bounds[ii + 1])
+        cell_select = cell[select]
+        is_event = found[select] & (ii >= last_passage[cell_select]) & (sign[select] != last_sign[cell_select])
+        cell_event = cell_select[is_event]
+        last_passage[cell_event] = passage[select][is_event]
+        last_sign[cell_event] = sign[select][is_event]
+        count[cell_event] += 1
+
+    # There is one "artificial" transition. See "freezethaw1d".
+    return count - 1
+
+
+@register_kernel(FreezeThaw.key, per_cell=True)
+def freezethaw_kernel(x, mask, threshold):
+    """
+    Compiled kernel equivalent to :func:`freezethaw1d`. See :mod:`ocgis.calc.kernel`.
+
+    Parameters
+    ----------
+    x : ndarray
+      The daily temperature series (C).
+    mask : ndarray
+      The series mask. Masked values are skipped.
+    threshold : float
+      See :func:`freezethaw1d`.
+
+    Returns
+    -------
+    out : int
+      See :func:`freezethaw1d`. Series with all values masked return -1.
+    """
+
+    # Compress the series after a leading zero value and compute the cumulative degree days.
+    cx = np.zeros(x.shape[0] + 1)
+    over = np.ones(x.shape[0] + 1, dtype=np.bool_)
+    n = 0
+    for ii in range(x.shape[0]):
+        if not mask[ii]:
+            n += 1
+            cx[n] = cx[n - 1] + x[ii]
+            over[n] = x[ii] >= 0
+
+    # The first value is always a crossing followed by the places where the temperature crosses the freezing point.
+    last = 0.
+    count = 0
+    for jj in range(n + 1):
+        if jj == 0:
+            ci = 0
+        else:
+            ci = jj - 1
+            if over[ci] == over[ci + 1]:
+                continue
+
+        # Skip the crossing if it occurs before the threshold is reached.
+        if ci < abs(last):
+            continue
+
+        # Find the first place where the threshold is exceeded and store an event if it is different from the last.
+        for w in range(ci, n + 1):
+            d = cx[w] - cx[ci]
+            if abs(d) >= threshold:
+                s = np.sign(d)
+                if s != np.sign(last):
+                    last = s * w
+                    count += 1
+                break
+
+    # There is one "artificial" transition. See "freezethaw1d".
+    return count - 1
+
+
+def _get_first_passage_(cx, ufunc, origin, cell, is_before):
+    # Return the first time index at or after each origin where "is_before" is False for a range extreme. The length of
+    # the time axis is returned if there is no such index. Ranges with power of two lengths are reduced once into a
+    # table. Each origin then advances greedily by decreasing power of two ranges while the range extreme is before the
+    # passage.
+    size, ncells = cx.shape
+    tables = [cx]
+    while 2 ** len(tables) <= size:
+        previous = tables[-1]
+        half = 2 ** (len(tables) - 1)
+        tables.append(ufunc(previous[:-half], previous[half:]))
+
+    position = origin.copy()
+    for level in range(len(tables) - 1, -1, -1):
+        width = 2 ** level
+        is_inside = position + width <= size
+        extreme = np.take(tables[level], np.where(is_inside, position, 0) * ncells + cell)
+        position += width * np.logical_and(is_inside, is_before(extreme))
+    return position
@@ -8,6 +8,7 @@ class HeatIndex(base.AbstractMultivariateFunction):
     required_variables = ['tas', 'rhs']
     required_units = {'tas': 'fahrenheit', 'rhs': 'percent'}
     key = 'heat_index'
+    time_independent = True
     units = None
     standard_name = 'heat_index'
     long_name = 'Heat Index'
@@ -1,11 +1,15 @@
+import itertools
+
 import numpy as np
 
-from ocgis.calc import base
+from ocgis.calc import base, segment
+from ocgis.calc.kernel import register_kernel, prange
 from ocgis.util.helpers import iter_array
 
 
 class Divide(base.AbstractMultivariateFunction):
     key = 'divide'
+    time_independent = True
     description = 'Divide arr1 by arr2.'
     required_variables = ['arr1', 'arr2']
 
@@ -18,6 +22,7 @@ class Divide(base.AbstractMultivariateFunction):
 
 class NaturalLogarithm(base.AbstractUnivariateFunction):
     key = 'ln'
+    time_independent = True
     description = 'Compute the natural logarithm.'
 
     standard_name = 'natural_logarithm'
@@ -32,6 +37,7 @@ class NaturalLogarithm(base.AbstractUnivariateFunction):
 
 class Sum(base.AbstractUnivariateSetFunction):
     key = 'sum'
+    batched_reduction = True
     description = 'Compute the algebraic sum of a series.'
 
     standard_name = 'sum'
@@ -40,6 +46,12 @@ class Sum(base.AbstractUnivariateSetFunction):
     def calculate(self, values):
         return np.ma.sum(values, axis=0)
 
+    def calculate_segments(self, values, offsets):
+        return segment.segment_sum(values, offsets)
+
+    def calculate_segment_statistics(self, statistics):
+        return statistics.sum()
+
     def aggregate_spatial(self, values, weights):
         # All element values contribute in their entirety. Weights are not applied.
         return np.ma.sum(values)
@@ -79,16 +91,20 @@ class Convolve1D(base.AbstractUnivariateFunction, base.AbstractParameterizedFunc
         fill = np.zeros(shape_fill, dtype=self.dtype)
 
         # perform the convolution on the time axis
-        itr = iter_array(values)
-        for ie, it, il, ir, ic in itr:
-            a = values[ie, :, il, ir, ic]
-            res_convolve = np.convolve(a, v, mode=mode)
-            if mode == 'valid':
-                time_slice = slice(0, max(values.shape[1], v.shape[0]) - min(values.shape[1], v.shape[0]) + 1)
-                # fill[ie, :, il, ir, ic] = res_convolve
-            else:
-                time_slice = slice(None)
-            fill[ie, time_slice, il, ir, ic] = res_convolve
+        kernel = self.get_kernel()
+        if kernel is not None:
+            self._set_convolution_kernel_(kernel, values, v, mode, fill)
+        else:
+            itr = iter_array(values)
+            for ie, it, il, ir, ic in itr:
+                a = values[ie, :, il, ir, ic]
+                res_convolve = np.convolve(a, v, mode=mode)
+                if mode == 'valid':
+                    time_slice = slice(0, max(values.shape[1], v.shape[0]) - min(values.shape[1], v.shape[0]) + 1)
+                    # fill[ie, :, il, ir, ic] = res_convolve
+                else:
+                    time_slice = slice(None)
+                fill[ie, time_slice, il, ir, ic] = res_convolve
 
         if mode == 'valid':
             # generate the mask for the output data and convert the output to a masked array
@@ -107,3 +123,43 @@ class Convolve1D(base.AbstractUnivariateFunction, base.AbstractParameterizedFunc
             fill = np.ma.array(fill, mask=values.mask)
 
         return fill
+
+    @staticmethod
+    def _set_convolution_kernel_(kernel, values, v, mode, fill):
+        # Indices of the full convolution kept by the convolution mode. See "numpy.convolve".
+        ntime, nv = values.shape[1], v.shape[0]
+        if mode == 'valid':
+            start, size = min(ntime, nv) - 1, max(ntime, nv) - min(ntime, nv) + 1
+        else:
+            start, size = (min(ntime, nv) - 1) // 2, max(ntime, nv)
+
+        for ie, il in itertools.product(range(values.shape[0]), range(values.shape[2])):
+            sub = values[ie, :, il, :, :]
+            data = np.asfortranarray(np.ma.getdata(sub).reshape(ntime, -1))
+            mask = np.asfortranarray(np.ma.getmaskarray(sub).reshape(ntime, -1))
+            out = np.zeros((size, data.shape[1]), dtype=values.dtype, order='F')
+            kernel(data, mask, out, v, start)
+            # Series with all values masked are not convolved.
+            out[:, mask.all(axis=0)] = 0
+            fill[ie, 0:size, il, :, :] = out.reshape([size] + list(sub.shape[1:]))
+
+
+@register_kernel(Convolve1D.key)
+def convolve_1d_kernel(data, mask, out, v, start):
+    """
+    Compiled kernel equivalent to calling :func:`numpy.convolve` for each series. Masked values are convolved like
+    :func:`numpy.convolve` which uses the underlying data. See :mod:`ocgis.calc.kernel`.
+
+    :param data: The series values with time as the leading axis.
+    :param mask: The series mask. This is not used.
+    :param out: The zero-initialized output array with the kept convolution indices as the leading axis.
+    :param v: The one-dimensional array to convolve with each series.
+    :param int start: The index in the full convolution of the first output value.
+    """
+
+    ntime, nv = data.shape[0], v.shape[0]
+    for ii in prange(data.shape[1]):
+        for kk in range(out.shape[0]):
+            index = kk + start
+            for jj in range(max(0, index - nv + 1), min(ntime - 1, index) + 1):
+                out[kk, ii] += data[jj, ii] * v[index - jj]
@@ -1,13 +1,17 @@
 import calendar
-import itertools
 from collections import OrderedDict, defaultdict
 from datetime import datetime
+from functools import partial
+
+import warnings
 
 import numpy as np
 
-from ocgis.calc import base
+from ocgis.calc import base, segment, window
 from ocgis.calc.base import AbstractUnivariateFunction, AbstractParameterizedFunction
+from ocgis.calc.basis_cache import get_file_identity, get_percentile_basis
 from ocgis.exc import DefinitionValidationError
+from ocgis.util.date_parts import get_days_from_date
 
 
 class MovingWindow(AbstractUnivariateFunction, AbstractParameterizedFunction):
@@ -44,35 +48,12 @@ class MovingWindow(AbstractUnivariateFunction, AbstractParameterizedFunction):
         assert values.ndim == 5
         assert operation in self._potential_operations
 
-        operation = getattr(np, operation)
-
-        fill = values.copy()
+        operation = getattr(window, 'window_{}'.format(operation))
 
-        # perform the moving average on the time axis
-        axes = [0, 2]
-        itrs = [list(range(values.shape[axis])) for axis in axes]
-        for ie, il in itertools.product(*itrs):
-            values_slice = values[ie, :, il, :, :]
-            build = True
-            for origin, values_kernel in self._iter_kernel_values_(values_slice, k, mode=mode):
-                if build:
-                    # if only the valid region is returned, this index will determine where the start index for the
-                    # field/fill slice is
-                    idx_start = origin
-                    build = False
-                fill[ie, origin, il, :, :] = operation(values_kernel, axis=0)
-
-        if mode == 'valid':
-            # slice the field and fill arrays
-            # self.field = self.field[:, idx_start:origin + 1, :, :, :]
-            # Mask the invalid regions.
-            fill.mask[:] = True
-            fill.mask[:, idx_start:origin + 1, :, :, :] = False
-            # self._finalize_slice = [slice(None), slice(idx_start, origin + 1), slice(None), slice(None), slice(None)]
-        elif mode == 'same':
-            pass
-        else:
-            raise NotImplementedError(mode)
+        # Reduce all windows at once with the time axis first. Windows outside the valid region are masked.
+        ret = operation(np.moveaxis(values, 1, 0), k, mode=mode)
+        ret = np.moveaxis(ret, 0, 1)
+        fill = np.ma.array(ret.filled(0), mask=np.ma.getmaskarray(ret), dtype=values.dtype)
 
         return fill
 
@@ -146,6 +127,9 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
 
     should_temporally_aggregate = False
 
+    # Maximum number of elements in a stacked window block passed to the percentile reduction.
+    _block_size = 2 ** 24
+
     def __init__(self, *args, **kwargs):
         super(DailyPercentile, self).__init__(*args, **kwargs)
 
@@ -158,8 +142,11 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
         assert (values.shape[2] == 1)
         arr = values[0, :, 0, :, :]
         assert (arr.ndim == 3)
-        dt_arr = self.field.temporal.value_datetime
-        dp = self.get_daily_percentile(arr, dt_arr, percentile, window_width, only_leap_years=only_leap_years)
+        date_parts = self.field.temporal._get_date_parts_()
+        # The basis is loaded from the percentile cache if it was computed previously.
+        create = partial(self.get_daily_percentile_from_date_parts, arr, date_parts, percentile, window_width,
+                         only_leap_years=only_leap_years)
+        dp = get_percentile_basis(create, self.key, arr, date_parts, percentile, window_width, only_leap_years)
         shape_fill = list(values.shape)
         shape_fill[1] = len(dp)
         fill = np.zeros(shape_fill, dtype=self.dtype)
@@ -173,8 +160,29 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
 
     @staticmethod
     def get_daily_percentile_from_request_dataset(rd, alias=None):
-        ret = {}
+        """
+        Read a daily percentile dictionary from a request dataset. If the percentile cache is enabled and the source
+        is a local file, the dictionary is read from the cache when the source is unchanged.
+
+        :param rd: The request dataset containing a daily percentile calculation output.
+        :type rd: :class:`~ocgis.RequestDataset`
+        :param str alias: The percentile variable name. Defaults to the request dataset's variable.
+        :rtype: dict
+        """
+
         alias = alias or rd.variable
+        create = partial(DailyPercentile._read_daily_percentile_, rd, alias)
+        identity = get_file_identity(rd.uri)
+        if identity is None:
+            ret = create()
+        else:
+            ret = get_percentile_basis(create, 'daily_percentile_request_dataset', identity, alias, rd.time_range,
+                                       rd.time_region, rd.time_subset_func, rd.level_range, rd.conform_units_to)
+        return ret
+
+    @staticmethod
+    def _read_daily_percentile_(rd, alias):
+        ret = {}
         field = rd.get()
         dt = field.temporal.value_datetime
         value = field[alias].get_masked_value()
@@ -201,6 +209,24 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
         :rtype: dict
         """
 
+        dt_arr = np.ma.getdata(dt_arr).reshape(-1)
+        date_parts = np.array([(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second) for dt in dt_arr], dtype=int)
+        return self.get_daily_percentile_from_date_parts(arr, date_parts, percentile, window_width,
+                                                         only_leap_years=only_leap_years)
+
+    def get_daily_percentile_from_date_parts(self, arr, date_parts, percentile, window_width, only_leap_years=False):
+        """
+        Vectorized implementation of :meth:`~ocgis.calc.library.statistics.DailyPercentile.get_daily_percentile`. The
+        window membership of each time step is computed for all calendar days at once from integer date parts. The
+        percentiles are computed for blocks of calendar days with a single reduction over stacked window values. Masked
+        values are excluded from the percentiles.
+
+        :param arr: See :meth:`~ocgis.calc.library.statistics.DailyPercentile.get_daily_percentile`.
+        :param date_parts: Integer date parts with shape ``(n, 6)`` ordered as year, month, day, hour, minute, second.
+        :type date_parts: :class:`numpy.ndarray`
+        :rtype: dict
+        """
+
         # we reduce the number of dimensions
         if arr.ndim == 5:
             arr = arr[0, :, 0, :, :]
@@ -208,41 +234,85 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
             pass
         else:
             raise NotImplementedError(arr.ndim)
-        dt_arr = dt_arr.squeeze()
+        date_parts = date_parts.reshape(-1, 6)
 
-        # step1: creation of the dictionary with all calendar days:
-        dic_caldays = self.get_dict_caldays(dt_arr)
+        # Unique calendar days are the percentile dictionary keys.
+        caldays = np.unique(date_parts[:, 1:3], axis=0)
+        include = self.get_window_membership(date_parts, caldays, window_width, only_leap_years)
 
-        percentile_dict = OrderedDict()
+        data = np.ma.filled(np.ma.array(arr, dtype=float), np.nan)
+        counts = include.sum(axis=1)
+        max_count = max(1, counts.max())
+        block_size = max(1, self._block_size // (max_count * int(np.prod(data.shape[1:]))))
+        # Order included time indices first for each calendar day.
+        order = np.argsort(np.invert(include), axis=1, kind='mergesort')[:, 0:max_count]
+        is_padding = np.arange(max_count).reshape(1, -1) >= counts.reshape(-1, 1)
 
-        dt_hour = dt_arr[
-            0].hour  # (we get hour of a date only one time, because usually the hour is the same for all dates in input dt_arr)
-
-        for month in list(dic_caldays.keys()):
-            for day in dic_caldays[month]:
-                # step2: we do a mask for the datetime vector for current calendar day (day/month)
-                dt_arr_mask = self.get_mask_dt_arr(dt_arr, month, day, dt_hour, window_width, only_leap_years)
-
-                # step3: we are looking for the indices of non-masked dates (i.e. where dt_arr_mask==False)
-                indices_non_masked = np.where(dt_arr_mask == False)[0]
-
-                # step4: we subset our arr
-                arr_subset = arr[indices_non_masked, :, :]
-
-                # step5: we compute the percentile for current arr_subset
-                ############## WARNING: type(arr_subset) = numpy.ndarray. Numpy.percentile does not work with masked arrays,
-                ############## so if arr_subset has aberrant values like 999999 or 1e+20, the result will be wrong.
-                ############## Check with numpy.nanpercentile (Numpy version 1.9) !!!
-                arr_percentille_current_calday = np.percentile(arr_subset, percentile, axis=0)
+        percentile_dict = OrderedDict()
+        with warnings.catch_warnings():
+            # Fully masked windows return NaN.
+            warnings.simplefilter('ignore', RuntimeWarning)
+            for start in range(0, caldays.shape[0], block_size):
+                block = slice(start, start + block_size)
+                stacked = data[order[block]]
+                stacked[is_padding[block]] = np.nan
+                block_percentile = np.nanpercentile(stacked, percentile, axis=1)
+                for (month, day), value in zip(caldays[block].tolist(), block_percentile):
+                    percentile_dict[month, day] = value
 
-                # step6: we add to the dictionnary...
-                percentile_dict[month, day] = arr_percentille_current_calday
+        return percentile_dict
 
-                # print 'Creating percentile dictionary: month ', month, '---> OK'
+    @staticmethod
+    def get_window_membership(date_parts, caldays, window_width, only_leap_years):
+        """
+        Vectorized :meth:`~ocgis.calc.library.statistics.DailyPercentile.get_masked` for all time steps and calendar days.
 
-        # print 'Percentile dictionary is created.'
+        :param date_parts: Integer date parts with shape ``(n, 6)`` ordered as year, month, day, hour, minute, second.
+        :type date_parts: :class:`numpy.ndarray`
+        :param caldays: Calendar days with shape ``(m, 2)`` ordered as month, day.
+        :type caldays: :class:`numpy.ndarray`
+        :param window_width: Window width - must be odd.
+        :type window_width: int
+        :param only_leap_years: See :meth:`~ocgis.calc.library.statistics.DailyPercentile.get_masked`.
+        :type only_leap_years: bool
+        :returns: Boolean array with shape ``(m, n)``. ``True`` if the time step is in the calendar day's window.
+        :rtype: :class:`numpy.ndarray`
+        """
 
-        return percentile_dict
+        year, month, day = date_parts[:, 0], date_parts[:, 1], date_parts[:, 2]
+        days = get_days_from_date(year, month, day)
+        # Time of day relative to the hour of the first time step which is used for the calendar day dates.
+        seconds = date_parts[:, 3] * 3600 + date_parts[:, 4] * 60 + date_parts[:, 5] - date_parts[0, 3] * 3600
+        is_leap = np.logical_or(np.logical_and(year % 4 == 0, year % 100 != 0), year % 400 == 0)
+        half_width = window_width / 2.
+
+        def _get_elapsed_days_(target_days):
+            # Equivalent to "(current_date - target_date).days".
+            return np.floor_divide((days - target_days) * 86400 + seconds, 86400)
+
+        def _get_absolute_days_(target_days):
+            # Equivalent to "abs(current_date - target_date).days".
+            return np.abs((days - target_days) * 86400 + seconds) // 86400
+
+        cal_month = caldays[:, 0].reshape(-1, 1)
+        cal_day = caldays[:, 1].reshape(-1, 1)
+        # Compare to the calendar day in the previous, current, and next year to handle windows wrapping the year.
+        diff = None
+        for offset in (-1, 0, 1):
+            target_days = get_days_from_date(year + offset, cal_month, cal_day)
+            curr = _get_absolute_days_(target_days)
+            diff = curr if diff is None else np.minimum(diff, curr)
+        ret = diff <= half_width
+
+        is_leap_day = np.logical_and(caldays[:, 0] == 2, caldays[:, 1] == 29)
+        if is_leap_day.any():
+            leap_include = np.logical_and(is_leap, _get_absolute_days_(get_days_from_date(year, 2, 29)) <= half_width)
+            if not only_leap_years:
+                elapsed = _get_elapsed_days_(get_days_from_date(year, 2, 28))
+                non_leap_include = np.logical_and(elapsed >= -half_width + 1, elapsed <= half_width)
+                leap_include = np.logical_or(leap_include, np.logical_and(np.invert(is_leap), non_leap_include))
+            ret[is_leap_day] = leap_include
+        return ret
 
     @staticmethod
     def get_dict_caldays(dt_arr):
@@ -355,6 +425,7 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
 
 class FrequencyPercentile(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFunction):
     key = 'freq_perc'
+    batched_reduction = True
     parms_definition = {'percentile': float}
     description = 'The percentile value along the time axis. See: http://docs.scipy.org/doc/numpy-dev/reference/generated/numpy.percentile.html.'
 
@@ -371,10 +442,23 @@ class FrequencyPercentile(base.AbstractUnivariateSetFunction, base.AbstractParam
         ret = np.ma.array(ret, mask=values.mask[0, :, :])
         return ret
 
+    def calculate_segments(self, values, offsets, percentile=None):
+        data = np.ma.getdata(values)
+        lengths = segment.get_segment_lengths(offsets, values.shape[0])
+        if np.all(lengths == lengths[0]):
+            # Equal length groups are stacked so the percentile is computed with a single call.
+            stacked = data.reshape([offsets.shape[0], lengths[0]] + list(data.shape[1:]))
+            ret = np.percentile(stacked, percentile, axis=1)
+        else:
+            ret = np.array([np.percentile(s, percentile, axis=0) for s in segment.iter_segments(data, offsets)])
+        ret = np.ma.array(ret, mask=np.ma.getmaskarray(values)[offsets])
+        return ret
+
 
 class Max(base.AbstractUnivariateSetFunction):
     description = 'Max value for the series.'
     key = 'max'
+    batched_reduction = True
 
     standard_name = 'max'
     long_name = 'max'
@@ -382,10 +466,17 @@ class Max(base.AbstractUnivariateSetFunction):
     def calculate(self, values):
         return np.ma.max(values, axis=0)
 
+    def calculate_segments(self, values, offsets):
+        return segment.segment_max(values, offsets)
+
+    def calculate_segment_statistics(self, statistics):
+        return statistics.max()
+
 
 class Min(base.AbstractUnivariateSetFunction):
     description = 'Min value for the series.'
     key = 'min'
+    batched_reduction = True
 
     standard_name = 'min'
     long_name = 'Min'
@@ -393,16 +484,29 @@ class Min(base.AbstractUnivariateSetFunction):
     def calculate(self, values):
         return np.ma.min(values, axis=0)
 
+    def calculate_segments(self, values, offsets):
+        return segment.segment_min(values, offsets)
+
+    def calculate_segment_statistics(self, statistics):
+        return statistics.min()
+
 
 class Mean(base.AbstractUnivariateSetFunction):
     description = 'Compute mean value of the set.'
     key = 'mean'
+    batched_reduction = True
     standard_name = 'mean'
     long_name = 'Mean'
 
     def calculate(self, values):
         return np.ma.mean(values, axis=0)
 
+    def calculate_segments(self, values, offsets):
+        return segment.segment_mean(values, offsets)
+
+    def calculate_segment_statistics(self, statistics):
+        return statistics.mean()
+
 
 class Median(base.AbstractUnivariateSetFunction):
     description = 'Compute median value of the set.'
@@ -418,9 +522,16 @@ class Median(base.AbstractUnivariateSetFunction):
 class StandardDeviation(base.AbstractUnivariateSetFunction):
     description = 'Compute standard deviation of the set.'
     key = 'std'
+    batched_reduction = True
 
     standard_name = 'standard_deviation'
     long_name = 'Standard Deviation'
 
     def calculate(self, values):
         return np.ma.std(values, axis=0)
+
+    def calculate_segments(self, values, offsets):
+        return segment.segment_std(values, offsets)
+
+    def calculate_segment_statistics(self, statistics):
+        return statistics.std()
@@ -1,6 +1,6 @@
 import numpy as np
 
-from ocgis.calc import base
+from ocgis.calc import base, segment
 
 
 class Between(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFunction):
@@ -29,6 +29,7 @@ class Threshold(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFu
     parms_definition = {'threshold': float, 'operation': str}
     dtype_default = 'int'
     key = 'threshold'
+    batched_reduction = True
     standard_name = 'threshold'
     long_name = 'threshold'
     parms_required = ('threshold', 'operation')
@@ -41,6 +42,16 @@ class Threshold(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFu
         :type operation: str
         """
 
+        idx = self._get_logical_(values, threshold, operation)
+        ret = np.ma.sum(idx, axis=0)
+        return ret
+
+    def calculate_segments(self, values, offsets, threshold=None, operation=None):
+        idx = self._get_logical_(values, threshold, operation)
+        return segment.segment_sum(idx.astype(int), offsets)
+
+    @staticmethod
+    def _get_logical_(values, threshold, operation):
         # perform requested logical operation
         if operation == 'gt':
             idx = values > threshold
@@ -52,9 +63,7 @@ class Threshold(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFu
             idx = values <= threshold
         else:
             raise NotImplementedError
-
-        ret = np.ma.sum(idx, axis=0)
-        return ret
+        return idx
 
     def _aggregate_spatial_(self, values, weights):
         return np.ma.sum(values)
@@ -0,0 +1,114 @@
+"""
+Run-length encoding of boolean arrays along the leading (time) axis. Runs of ``True`` values are found for all
+elements of the trailing axes at once by differencing the padded array. Runs are returned as flat arrays sorted by
+element and then by time so per-element summaries may use ``numpy.ufunc.reduceat``. Used by spell indices such as
+:class:`~ocgis.calc.library.index.duration.Duration`.
+"""
+import numpy as np
+
+
+def get_runs(arr):
+    """
+    :param arr: Boolean array with the time axis first. Masked elements are ``False`` and end runs.
+    :type arr: :class:`numpy.ndarray`
+    :returns: A tuple ``(element, start, length)`` of flat arrays with one entry per run. ``element`` is the flat index
+     into the trailing axes. ``start`` is the time index of the run's first value.
+    :rtype: tuple
+    """
+
+    arr = np.ma.filled(arr, False).astype(bool)
+    flat = arr.reshape(arr.shape[0], -1).T
+    padded = np.zeros((flat.shape[0], flat.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = flat
+    diff = np.diff(padded, axis=1)
+    # Row-major ordering of the nonzero indices sorts runs by element then by time.
+    element, start = np.nonzero(diff == 1)
+    _, stop = np.nonzero(diff == -1)
+    return element, start, stop - start
+
+
+def get_run_offsets(element, size):
+    """
+    :param element: Element index for each run from :func:`get_runs`.
+    :type element: :class:`numpy.ndarray`
+    :param int size: The number of elements.
+    :returns: A tuple ``(counts, offsets)``. ``counts`` is the number of runs for each element. ``offsets`` is the
+     index of each element's first run.
+    :rtype: tuple
+    """
+
+    counts = np.bincount(element, minlength=size)
+    offsets = np.cumsum(counts) - counts
+    return counts, offsets
+
+
+def get_run_summary(arr, summary='mean'):
+    """
+    Summarize the run lengths for each element. Elements without runs are zero. Elements with a single run are that
+    run's length.
+
+    :param arr: See :func:`get_runs`.
+    :type arr: :class:`numpy.ndarray`
+    :param str summary: One of ``'mean'``, ``'median'``, ``'std'``, ``'max'``, or ``'min'``.
+    :returns: An array with the shape of the trailing axes of ``arr``.
+    :rtype: :class:`numpy.ndarray`
+    :raises: ValueError
+    """
+
+    size = int(np.prod(arr.shape[1:]))
+    element, _, length = get_runs(arr)
+    counts, offsets = get_run_offsets(element, size)
+    has_runs = counts > 0
+    ret = np.zeros(size, dtype=float)
+    if not has_runs.any():
+        return ret.reshape(arr.shape[1:])
+
+    # Only reduce elements with runs. Empty segments are not supported by "reduceat".
+    counts, offsets = counts[has_runs], offsets[has_runs]
+    if summary == 'max':
+        reduced = np.maximum.reduceat(length, offsets)
+    elif summary == 'min':
+        reduced = np.minimum.reduceat(length, offsets)
+    elif summary == 'mean':
+        reduced = np.add.reduceat(length, offsets) / counts.astype(float)
+    elif summary == 'std':
+        means = np.add.reduceat(length, offsets) / counts.astype(float)
+        anomalies = length - np.repeat(means, counts)
+        reduced = np.sqrt(np.add.reduceat(anomalies * anomalies, offsets) / counts)
+    elif summary == 'median':
+        ordered = length[np.lexsort((length, element))]
+        lower = ordered[offsets + (counts - 1) // 2]
+        upper = ordered[offsets + counts // 2]
+        reduced = (lower + upper) / 2.
+    else:
+        raise ValueError('Run summary not supported: {}'.format(summary))
+    # A single run is summarized by its length.
+    reduced = np.where(counts == 1, length[offsets], reduced)
+
+    ret[has_runs] = reduced
+    return ret.reshape(arr.shape[1:])
+
+
+def get_run_frequencies(arr):
+    """
+    Count the occurrences of each run length for each element.
+
+    :param arr: See :func:`get_runs`.
+    :type arr: :class:`numpy.ndarray`
+    :returns: A tuple ``(element, length, count)`` of flat arrays with one entry per unique run length for each element.
+     Entries are sorted by element then by run length. Elements without runs have a single entry with zero length and
+     a count of one.
+    :rtype: tuple
+    """
+
+    size = int(np.prod(arr.shape[1:]))
+    element, _, length = get_runs(arr)
+    # Add the zero-length entries for elements without runs.
+    counts, _ = get_run_offsets(element, size)
+    no_runs = np.nonzero(counts == 0)[0]
+    element = np.append(element, no_runs)
+    length = np.append(length, np.zeros(no_runs.shape[0], dtype=length.dtype))
+
+    key = element.astype(np.int64) * (arr.shape[0] + 1) + length
+    unique_key, count = np.unique(key, return_counts=True)
+    return unique_key // (arr.shape[0] + 1), unique_key % (arr.shape[0] + 1), count
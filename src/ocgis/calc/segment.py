@@ -0,0 +1,208 @@
+"""
+Segment reductions along the leading axis of an array. A segmented array is the concatenation of all temporal groups
+along the time axis with ``offsets`` holding the start index of each group. Extrema are reduced with
+``numpy.ufunc.reduceat`` so all groups are reduced in a single call. Sums reduce each segment with ``numpy.add.reduce``
+to match the summation order (and hence the floating point result) of the NumPy masked array reductions.
+"""
+import numpy as np
+
+
+def get_segment_counts(values, offsets):
+    """
+    :param values: The segmented masked array with the segment axis first.
+    :type values: :class:`numpy.ma.MaskedArray`
+    :param offsets: Start index of each segment.
+    :type offsets: :class:`numpy.ndarray`
+    :returns: The count of unmasked elements in each segment.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    valid = np.invert(np.ma.getmaskarray(values))
+    return np.add.reduceat(valid, offsets, axis=0, dtype=np.int64)
+
+
+def get_segment_lengths(offsets, size):
+    """
+    :param offsets: Start index of each segment.
+    :type offsets: :class:`numpy.ndarray`
+    :param int size: Total length of the segmented axis.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    return np.diff(np.append(offsets, size))
+
+
+def segment_sum(values, offsets, counts=None):
+    """
+    Equivalent to ``numpy.ma.sum(values[segment], axis=0)`` for each segment.
+
+    :param values: The segmented masked array with the segment axis first.
+    :type values: :class:`numpy.ma.MaskedArray`
+    :param offsets: Start index of each segment.
+    :type offsets: :class:`numpy.ndarray`
+    :param counts: Optional precomputed unmasked counts from :func:`get_segment_counts`.
+    :type counts: :class:`numpy.ndarray`
+    :rtype: :class:`numpy.ma.MaskedArray`
+    """
+
+    if counts is None:
+        counts = get_segment_counts(values, offsets)
+    data = np.ma.filled(values, 0)
+    # "reduceat" sums sequentially while "reduce" may use pairwise summation. Reduce each segment for identical results.
+    stops = np.append(offsets[1:], data.shape[0])
+    ret = np.empty((offsets.shape[0],) + data.shape[1:], dtype=np.add.reduce(data[0:1], axis=0).dtype)
+    for idx, (start, stop) in enumerate(zip(offsets, stops)):
+        ret[idx] = np.add.reduce(data[start:stop], axis=0)
+    return np.ma.array(ret, mask=counts == 0)
+
+
+def segment_mean(values, offsets, counts=None):
+    """
+    Equivalent to ``numpy.ma.mean(values[segment], axis=0)`` for each segment. See :func:`segment_sum`.
+    """
+
+    if counts is None:
+        counts = get_segment_counts(values, offsets)
+    sums = segment_sum(values, offsets, counts=counts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret = sums.data / counts
+    return np.ma.array(ret, mask=counts == 0)
+
+
+def segment_var(values, offsets, counts=None, ddof=0, means=None):
+    """
+    Equivalent to ``numpy.ma.var(values[segment], axis=0, ddof=ddof)`` for each segment. A two-pass algorithm is used
+    for numerical stability. See :func:`segment_sum`.
+
+    :param means: Optional precomputed segment means from :func:`segment_mean`.
+    :type means: :class:`numpy.ma.MaskedArray`
+    """
+
+    if counts is None:
+        counts = get_segment_counts(values, offsets)
+    if means is None:
+        means = segment_mean(values, offsets, counts=counts)
+    lengths = get_segment_lengths(offsets, values.shape[0])
+    anomalies = values - np.repeat(means.data, lengths, axis=0)
+    sum_squares = segment_sum(anomalies * anomalies, offsets, counts=counts)
+    denominator = counts - ddof
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret = sum_squares.data / denominator
+    return np.ma.array(ret, mask=denominator <= 0)
+
+
+def segment_std(values, offsets, counts=None, ddof=0):
+    """
+    Equivalent to ``numpy.ma.std(values[segment], axis=0, ddof=ddof)`` for each segment. See :func:`segment_sum`.
+    """
+
+    ret = segment_var(values, offsets, counts=counts, ddof=ddof)
+    return np.ma.sqrt(ret)
+
+
+def segment_max(values, offsets, counts=None):
+    """
+    Equivalent to ``numpy.ma.max(values[segment], axis=0)`` for each segment. See :func:`segment_sum`.
+    """
+
+    if counts is None:
+        counts = get_segment_counts(values, offsets)
+    data = np.ma.filled(values, np.ma.maximum_fill_value(values))
+    ret = np.maximum.reduceat(data, offsets, axis=0)
+    return np.ma.array(ret, mask=counts == 0)
+
+
+def segment_min(values, offsets, counts=None):
+    """
+    Equivalent to ``numpy.ma.min(values[segment], axis=0)`` for each segment. See :func:`segment_sum`.
+    """
+
+    if counts is None:
+        counts = get_segment_counts(values, offsets)
+    data = np.ma.filled(values, np.ma.minimum_fill_value(values))
+    ret = np.minimum.reduceat(data, offsets, axis=0)
+    return np.ma.array(ret, mask=counts == 0)
+
+
+def iter_segments(values, offsets):
+    """
+    Yield views of each segment. Used by reductions without a ``reduceat`` formulation.
+
+    :param values: The segmented array with the segment axis first.
+    :type values: :class:`numpy.ndarray`
+    :param offsets: Start index of each segment.
+    :type offsets: :class:`numpy.ndarray`
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    stops = np.append(offsets[1:], values.shape[0])
+    for start, stop in zip(offsets, stops):
+        yield values[start:stop]
+
+
+class SegmentStatistics(object):
+    """
+    Segment reductions of a single segmented array sharing intermediate results. Unmasked counts, sums, and means are
+    computed once and reused by all reductions. Used to reduce the same temporal groups for multiple set functions in a
+    single pass. Each reduction is equal to its segment function equivalent.
+
+    :param values: The segmented masked array with the segment axis first.
+    :type values: :class:`numpy.ma.MaskedArray`
+    :param offsets: Start index of each segment.
+    :type offsets: :class:`numpy.ndarray`
+    """
+
+    def __init__(self, values, offsets):
+        self.values = values
+        self.offsets = offsets
+
+        self._counts = None
+        self._sum = None
+        self._mean = None
+
+    @property
+    def counts(self):
+        """
+        :returns: See :func:`get_segment_counts`.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        if self._counts is None:
+            self._counts = get_segment_counts(self.values, self.offsets)
+        return self._counts
+
+    def max(self):
+        """See :func:`segment_max`."""
+
+        return segment_max(self.values, self.offsets, counts=self.counts)
+
+    def mean(self):
+        """See :func:`segment_mean`."""
+
+        if self._mean is None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ret = self.sum().data / self.counts
+            self._mean = np.ma.array(ret, mask=self.counts == 0)
+        return self._mean
+
+    def min(self):
+        """See :func:`segment_min`."""
+
+        return segment_min(self.values, self.offsets, counts=self.counts)
+
+    def std(self, ddof=0):
+        """See :func:`segment_std`."""
+
+        return np.ma.sqrt(self.var(ddof=ddof))
+
+    def sum(self):
+        """See :func:`segment_sum`."""
+
+        if self._sum is None:
+            self._sum = segment_sum(self.values, self.offsets, counts=self.counts)
+        return self._sum
+
+    def var(self, ddof=0):
+        """See :func:`segment_var`."""
+
+        return segment_var(self.values, self.offsets, counts=self.counts, ddof=ddof, means=self.mean())
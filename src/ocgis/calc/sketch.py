@@ -0,0 +1,165 @@
+"""
+Mergeable quantile sketches for approximate percentiles. Each cell of an array is summarized by at most ``size`` weighted
+centroids. Values are added incrementally in blocks along the leading axis and sketches of disjoint values (i.e. time
+chunks or ranks) are merged. Memory is set by the sketch size and not the series length.
+"""
+import numpy as np
+
+
+class QuantileSketch(object):
+    """
+    Approximate quantile summary for each cell of an array. Centroids partition the sorted values of a cell into
+    contiguous groups of roughly equal count (a t-digest with a uniform scale function). Each centroid summarizes about
+    ``error`` of the values in a cell, so the rank error of a percentile is on the order of ``error``. The exact minimum
+    and maximum are tracked. If a cell has no more values than centroids, percentiles are exact and equal to
+    ``numpy.percentile`` with linear interpolation. Masked values are excluded.
+
+    :param tuple shape: The cell shape. This is the value shape without the leading (time) axis.
+    :param float error: The relative rank error bound. The sketch keeps ``ceil(1 / error)`` centroids per cell.
+    :raises: ValueError
+    """
+
+    def __init__(self, shape, error=0.01):
+        if not 0 < error < 1:
+            raise ValueError('The sketch error must be between 0 and 1 (exclusive).')
+
+        self.shape = tuple(shape)
+        self.error = error
+        #: The number of centroids for each cell.
+        self.size = int(np.ceil(1. / error))
+
+        # Centroids are stored with cells first so sorting is along contiguous memory.
+        ncell = int(np.prod(self.shape))
+        self._means = np.zeros((ncell, self.size))
+        self._weights = np.zeros((ncell, self.size))
+        self._minimum = np.full(ncell, np.inf)
+        self._maximum = np.full(ncell, -np.inf)
+
+    @property
+    def count(self):
+        """
+        :returns: The count of values added to each cell.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        return self._weights.sum(axis=1).reshape(self.shape)
+
+    def merge(self, other):
+        """
+        Merge the values summarized by another sketch with the same shape and error in-place.
+
+        :param other: The sketch to merge.
+        :type other: :class:`~ocgis.calc.sketch.QuantileSketch`
+        :raises: ValueError
+        """
+
+        if other.shape != self.shape or other.size != self.size:
+            raise ValueError('Only sketches with the same shape and error may be merged.')
+        self._minimum = np.minimum(self._minimum, other._minimum)
+        self._maximum = np.maximum(self._maximum, other._maximum)
+        self._compress_(np.concatenate([self._means, other._means], axis=1),
+                        np.concatenate([self._weights, other._weights], axis=1))
+
+    def percentile(self, percentile):
+        """
+        :param float percentile: The percentile to compute on the interval [0, 100].
+        :returns: The approximate percentile for each cell. Cells without values are masked.
+        :rtype: :class:`numpy.ma.MaskedArray`
+        """
+
+        means, weights = _get_sorted_(self._means, self._weights)
+        count = weights.sum(axis=1)
+        has_weight = weights > 0
+        ncell = count.shape[0]
+
+        # Centroid positions are the mean rank of their values. The minimum and maximum are the end points. Empty
+        # centroids are placed on the maximum so positions are monotonic.
+        last = np.maximum(count - 1, 0).reshape(-1, 1)
+        starts = np.cumsum(weights, axis=1) - weights
+        positions = np.where(has_weight, starts + (weights - 1) / 2., last)
+        positions = np.concatenate([np.zeros((ncell, 1)), positions, last], axis=1)
+        maximum = self._maximum.reshape(-1, 1)
+        values = np.where(has_weight, means, maximum)
+        values = np.concatenate([self._minimum.reshape(-1, 1), values, maximum], axis=1)
+
+        # Interpolate linearly between the positions surrounding the target rank.
+        target = percentile / 100. * last
+        idx = np.sum(positions <= target, axis=1).reshape(-1, 1)
+        lower = np.maximum(idx - 1, 0)
+        upper = np.minimum(idx, positions.shape[1] - 1)
+        plower = np.take_along_axis(positions, lower, axis=1)
+        pupper = np.take_along_axis(positions, upper, axis=1)
+        vlower = np.take_along_axis(values, lower, axis=1)
+        vupper = np.take_along_axis(values, upper, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(pupper > plower, (target - plower) / (pupper - plower), 0.)
+            ret = (vlower + np.clip(fraction, 0., 1.) * (vupper - vlower))[:, 0]
+
+        mask = count == 0
+        ret[mask] = 0.
+        return np.ma.array(ret.reshape(self.shape), mask=mask.reshape(self.shape))
+
+    def update(self, values):
+        """
+        Add values to the sketch in-place.
+
+        :param values: Values with the leading axis to summarize followed by the sketch shape.
+        :type values: :class:`numpy.ma.MaskedArray` | :class:`numpy.ndarray`
+        """
+
+        values = np.ma.asarray(values)
+        if values.shape[0] == 0:
+            return
+        ncell = self._weights.shape[0]
+        data = np.ma.getdata(values).reshape(values.shape[0], ncell).T.astype(float)
+        weights = np.invert(np.ma.getmaskarray(values)).reshape(values.shape[0], ncell).T.astype(float)
+
+        has_weight = weights > 0
+        self._minimum = np.minimum(self._minimum, np.where(has_weight, data, np.inf).min(axis=1))
+        self._maximum = np.maximum(self._maximum, np.where(has_weight, data, -np.inf).max(axis=1))
+        self._compress_(np.concatenate([self._means, data], axis=1), np.concatenate([self._weights, weights], axis=1))
+
+    def _compress_(self, means, weights):
+        means, weights = _get_sorted_(means, weights)
+        ncell = means.shape[0]
+
+        # Assign the sorted values to centroids of equal rank width using the rank midpoint of each value.
+        count = weights.sum(axis=1).reshape(-1, 1)
+        midpoints = np.cumsum(weights, axis=1) - weights / 2.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bucket = np.floor(midpoints / count * self.size)
+        bucket = np.clip(np.nan_to_num(bucket), 0, self.size - 1).astype(int)
+
+        flat = (bucket + (np.arange(ncell) * self.size).reshape(-1, 1)).ravel()
+        minlength = self.size * ncell
+        new_weights = np.bincount(flat, weights=weights.ravel(), minlength=minlength)
+        sums = np.bincount(flat, weights=np.where(weights > 0, means * weights, 0.).ravel(), minlength=minlength)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            new_means = np.where(new_weights > 0, sums / new_weights, 0.)
+        self._means = new_means.reshape(ncell, self.size)
+        self._weights = new_weights.reshape(ncell, self.size)
+
+
+def get_sketch_percentile(values, percentile, error, block_size=None):
+    """
+    Stream values through a :class:`~ocgis.calc.sketch.QuantileSketch` in blocks along the leading axis.
+
+    :param values: The values with the axis to reduce first.
+    :type values: :class:`numpy.ma.MaskedArray`
+    :param float percentile: The percentile to compute on the interval [0, 100].
+    :param float error: See :class:`~ocgis.calc.sketch.QuantileSketch`.
+    :param int block_size: The number of leading axis elements added at once. Defaults to ten times the sketch size.
+    :rtype: :class:`numpy.ma.MaskedArray`
+    """
+
+    sketch = QuantileSketch(values.shape[1:], error=error)
+    block_size = block_size or 10 * sketch.size
+    for start in range(0, values.shape[0], block_size):
+        sketch.update(values[start:start + block_size])
+    return sketch.percentile(percentile)
+
+
+def _get_sorted_(means, weights):
+    # Sort centroids along the last axis by their means placing empty centroids last.
+    order = np.argsort(np.where(weights > 0, means, np.inf), axis=1)
+    return np.take_along_axis(means, order, axis=1), np.take_along_axis(weights, order, axis=1)
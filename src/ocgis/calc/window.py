@@ -0,0 +1,216 @@
+"""
+Centered moving window reductions along the leading axis of an array. All windows are reduced at once:
+
+* Sums and means use cumulative sums so each window costs two subtractions. Variances accumulate squared deviations
+  from the window means once per window offset.
+* Minimums and maximums use block prefix/suffix accumulations (van Herk/Gil-Werman) so each window costs one comparison.
+* Medians use a strided window view reduced in blocks of window origins to bound memory.
+
+Masked elements are excluded from the reductions. A window with no unmasked elements is masked. Windows are centered on
+each element of the leading axis with width ``k``. With ``mode='same'``, windows are truncated at the array edges. With
+``mode='valid'``, elements without a full window are masked.
+"""
+import warnings
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+# Maximum number of elements in a stacked window block used by the median reduction.
+MEDIAN_BLOCK_SIZE = 2 ** 24
+
+
+def get_window_indices(size, k, mode='valid'):
+    """
+    :param int size: Length of the windowed axis.
+    :param int k: The window width. Must be odd and greater than or equal to three.
+    :param str mode: ``'valid'`` or ``'same'``.
+    :returns: A tuple ``(start, stop, is_valid)``. ``start`` and ``stop`` are the truncated window limits for each
+     window origin. ``is_valid`` is ``True`` for origins returned in the output mode.
+    :rtype: tuple
+    :raises: AssertionError, NotImplementedError
+    """
+
+    assert k % 2 != 0
+    assert k >= 3
+
+    shift = (k - 1) // 2
+    origin = np.arange(size)
+    start = origin - shift
+    stop = origin + shift + 1
+    if mode == 'valid':
+        is_valid = np.logical_and(start >= 0, stop <= size)
+    elif mode == 'same':
+        is_valid = np.ones(size, dtype=bool)
+    else:
+        raise NotImplementedError(mode)
+    return np.maximum(start, 0), np.minimum(stop, size), is_valid
+
+
+def get_window_counts(values, k, mode='valid'):
+    """
+    :param values: The masked array with the windowed axis first.
+    :type values: :class:`numpy.ma.MaskedArray`
+    :param int k: See :func:`get_window_indices`.
+    :param str mode: See :func:`get_window_indices`.
+    :returns: The count of unmasked elements in each window.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    start, stop, _ = get_window_indices(values.shape[0], k, mode=mode)
+    valid = np.invert(np.ma.getmaskarray(values))
+    cumulative = _get_cumulative_(valid.astype(np.int64))
+    return cumulative[stop] - cumulative[start]
+
+
+def window_sum(values, k, mode='valid', counts=None):
+    """
+    Equivalent to ``numpy.ma.sum(values[start:stop], axis=0)`` for each window.
+
+    :param values: The masked array with the windowed axis first.
+    :type values: :class:`numpy.ma.MaskedArray`
+    :param int k: See :func:`get_window_indices`.
+    :param str mode: See :func:`get_window_indices`.
+    :param counts: Optional precomputed unmasked counts from :func:`get_window_counts`.
+    :type counts: :class:`numpy.ndarray`
+    :rtype: :class:`numpy.ma.MaskedArray`
+    """
+
+    start, stop, is_valid = get_window_indices(values.shape[0], k, mode=mode)
+    if counts is None:
+        counts = get_window_counts(values, k, mode=mode)
+    cumulative = _get_cumulative_(np.ma.filled(values, 0))
+    ret = cumulative[stop] - cumulative[start]
+    return np.ma.array(ret, mask=_get_window_mask_(counts, is_valid))
+
+
+def window_mean(values, k, mode='valid', counts=None):
+    """
+    Equivalent to ``numpy.ma.mean(values[start:stop], axis=0)`` for each window. See :func:`window_sum`.
+    """
+
+    if counts is None:
+        counts = get_window_counts(values, k, mode=mode)
+    sums = window_sum(values, k, mode=mode, counts=counts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret = sums.data / counts
+    return np.ma.array(ret, mask=sums.mask)
+
+
+def window_var(values, k, mode='valid', counts=None):
+    """
+    Equivalent to ``numpy.ma.var(values[start:stop], axis=0)`` for each window. A two-pass algorithm is used for
+    numerical stability: squared deviations from the window means are accumulated once per window offset. See
+    :func:`window_sum`.
+    """
+
+    if counts is None:
+        counts = get_window_counts(values, k, mode=mode)
+    means = window_mean(values, k, mode=mode, counts=counts)
+    shift = (k - 1) // 2
+    size = values.shape[0]
+
+    padded = np.zeros((size + 2 * shift,) + values.shape[1:], dtype=float)
+    padded[shift:shift + size] = np.ma.filled(values, 0)
+    padded_valid = np.zeros(padded.shape, dtype=bool)
+    padded_valid[shift:shift + size] = np.invert(np.ma.getmaskarray(values))
+
+    sum_squares = np.zeros(means.shape, dtype=float)
+    for offset in range(k):
+        anomalies = padded[offset:offset + size] - means.data
+        anomalies *= padded_valid[offset:offset + size]
+        sum_squares += anomalies * anomalies
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret = sum_squares / counts
+    return np.ma.array(ret, mask=means.mask)
+
+
+def window_std(values, k, mode='valid', counts=None):
+    """
+    Equivalent to ``numpy.ma.std(values[start:stop], axis=0)`` for each window. See :func:`window_var`.
+    """
+
+    ret = window_var(values, k, mode=mode, counts=counts)
+    return np.ma.sqrt(ret)
+
+
+def window_max(values, k, mode='valid', counts=None):
+    """
+    Equivalent to ``numpy.ma.max(values[start:stop], axis=0)`` for each window. See :func:`window_sum`.
+    """
+
+    return _window_extreme_(np.maximum, np.ma.maximum_fill_value(values), values, k, mode, counts)
+
+
+def window_min(values, k, mode='valid', counts=None):
+    """
+    Equivalent to ``numpy.ma.min(values[start:stop], axis=0)`` for each window. See :func:`window_sum`.
+    """
+
+    return _window_extreme_(np.minimum, np.ma.minimum_fill_value(values), values, k, mode, counts)
+
+
+def window_median(values, k, mode='valid', counts=None):
+    """
+    Equivalent to ``numpy.ma.median(values[start:stop], axis=0)`` for each window. See :func:`window_sum`.
+    """
+
+    _, _, is_valid = get_window_indices(values.shape[0], k, mode=mode)
+    if counts is None:
+        counts = get_window_counts(values, k, mode=mode)
+    shift = (k - 1) // 2
+    size = values.shape[0]
+
+    # Masked and out-of-bounds elements are NaN and ignored by the median.
+    padded = np.empty((size + 2 * shift,) + values.shape[1:], dtype=float)
+    padded[:] = np.nan
+    padded[shift:shift + size] = np.ma.filled(values.astype(float), np.nan)
+    windows = as_strided(padded, shape=(size, k) + padded.shape[1:], strides=(padded.strides[0],) + padded.strides)
+
+    ret = np.empty((size,) + values.shape[1:], dtype=float)
+    block_size = max(1, MEDIAN_BLOCK_SIZE // max(1, k * int(np.prod(values.shape[1:]))))
+    with warnings.catch_warnings():
+        # Windows with only masked elements are masked after the reduction.
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for block_start in range(0, size, block_size):
+            block = slice(block_start, block_start + block_size)
+            ret[block] = np.nanmedian(windows[block], axis=1)
+    return np.ma.array(ret, mask=_get_window_mask_(counts, is_valid))
+
+
+def _get_cumulative_(arr):
+    # Cumulative sum along the first axis with a leading zero so window sums are "ret[stop] - ret[start]".
+    if arr.dtype.kind in ('b', 'i', 'u'):
+        dtype = np.int64
+    else:
+        dtype = np.result_type(arr.dtype, np.float64)
+    ret = np.zeros((arr.shape[0] + 1,) + arr.shape[1:], dtype=dtype)
+    np.cumsum(arr, axis=0, out=ret[1:])
+    return ret
+
+
+def _get_window_mask_(counts, is_valid):
+    is_valid = is_valid.reshape((-1,) + (1,) * (counts.ndim - 1))
+    return np.logical_or(counts == 0, np.invert(is_valid))
+
+
+def _window_extreme_(ufunc, fill_value, values, k, mode, counts):
+    _, _, is_valid = get_window_indices(values.shape[0], k, mode=mode)
+    if counts is None:
+        counts = get_window_counts(values, k, mode=mode)
+    shift = (k - 1) // 2
+    size = values.shape[0]
+
+    # Pad so each output element has a full window of width k starting at its index. The padded length is a multiple
+    # of k to allow reshaping into blocks.
+    nblocks = int(np.ceil((size + 2 * shift) / float(k)))
+    padded = np.empty((nblocks * k,) + values.shape[1:], dtype=values.dtype)
+    padded[:] = fill_value
+    padded[shift:shift + size] = np.ma.filled(values, fill_value)
+
+    blocks = padded.reshape((nblocks, k) + values.shape[1:])
+    prefix = ufunc.accumulate(blocks, axis=1).reshape(padded.shape)
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+
+    origin = np.arange(size)
+    ret = ufunc(suffix[origin], prefix[origin + k - 1])
+    return np.ma.array(ret, mask=_get_window_mask_(counts, is_valid))
@@ -299,6 +299,7 @@ class KeywordArgument(object):
     VALUE = 'value'
     VARIABLE = 'variable'
     VARIABLE_KWARGS = 'variable_kwargs'
+    WEIGHTS = 'weights'
     WITH_PROJ4 = 'with_proj4'
     # WRAPPED_BBOX = 'wrapped_bbox'
     WRITE_MODE = 'write_mode'
@@ -2,6 +2,7 @@ import abc
 import json
 from collections import OrderedDict
 from copy import deepcopy
+from functools import partial
 
 import numpy as np
 import six
@@ -12,6 +13,7 @@ from icclim.calc_percentiles import get_percentile_dict, get_percentile_arr
 from numpy.core.multiarray import ndarray
 
 from ocgis.calc.base import AbstractUnivariateSetFunction, AbstractMultivariateFunction, AbstractParameterizedFunction
+from ocgis.calc.basis_cache import get_percentile_basis
 from ocgis.calc.temporal_groups import SeasonalTemporalGroup
 
 _icclim_function_map = {
@@ -221,7 +223,9 @@ class AbstractIcclimPercentileIndice(AbstractIcclimUnivariateSetFunction, Abstra
             except KeyError:
                 value = self._current_conformed_array[0, :, 0, :, :]
                 assert value.ndim == 3
-                percentile_basis = self._get_percentile_basis_(value)
+                # Bases for the same reference values are shared across requests through the percentile cache.
+                percentile_basis = get_percentile_basis(partial(self._get_percentile_basis_, value),
+                                                        *self._get_percentile_basis_key_(value))
                 self._storage_percentile[self._curr_variable.name] = percentile_basis
 
         ret = self._get_icclim_function_return_(values, percentile_basis)
@@ -235,6 +239,10 @@ class AbstractIcclimPercentileIndice(AbstractIcclimUnivariateSetFunction, Abstra
     def _get_percentile_basis_(self, value):
         """Return the percentile basis for the subclass."""
 
+    @abc.abstractmethod
+    def _get_percentile_basis_key_(self, value):
+        """Return the key elements identifying the percentile basis for the subclass."""
+
 
 @six.add_metaclass(abc.ABCMeta)
 class AbstractIcclimPercentileDictionaryIndice(AbstractIcclimPercentileIndice):
@@ -260,6 +268,11 @@ class AbstractIcclimPercentileDictionaryIndice(AbstractIcclimPercentileIndice):
                                                only_leap_years=self.only_leap_years)
         return percentile_basis
 
+    def _get_percentile_basis_key_(self, value):
+        time = self.field.time
+        return ('icclim_percentile_dict', value, time.get_value(), time.units, time.calendar, self.percentile,
+                self.window_width, self.only_leap_years)
+
 
 @six.add_metaclass(abc.ABCMeta)
 class AbstractIcclimPercentileArrayIndice(AbstractIcclimPercentileIndice):
@@ -283,6 +296,9 @@ class AbstractIcclimPercentileArrayIndice(AbstractIcclimPercentileIndice):
         percentile_basis = get_percentile_arr(value, self.percentile, self.window_width, fill_val=value.fill_value)
         return percentile_basis
 
+    def _get_percentile_basis_key_(self, value):
+        return 'icclim_percentile_arr', value, value.fill_value, self.percentile, self.window_width
+
 
 class IcclimTG(AbstractIcclimUnivariateSetFunction):
     key = 'icclim_TG'
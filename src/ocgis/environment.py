@@ -76,11 +76,21 @@ class Environment(AbstractOcgisObject):
         self.ENABLE_FILE_LOGGING = EnvParm('ENABLE_FILE_LOGGING', False, formatter=self._format_bool_)
         self.DEBUG = EnvParm('DEBUG', False, formatter=self._format_bool_)
         self.DIR_BIN = EnvParm('DIR_BIN', None)
+        self.DIR_SPATIAL_INDEX_CACHE = EnvParm('DIR_SPATIAL_INDEX_CACHE', None)
+        self.SPATIAL_INDEX_CACHE_SIZE = EnvParm('SPATIAL_INDEX_CACHE_SIZE', 32, formatter=int)
+        self.DIR_PERCENTILE_CACHE = EnvParm('DIR_PERCENTILE_CACHE', None)
+        self.PERCENTILE_CACHE_SIZE = EnvParm('PERCENTILE_CACHE_SIZE', 32, formatter=int)
+        self.DIR_REGRID_WEIGHT_CACHE = EnvParm('DIR_REGRID_WEIGHT_CACHE', None)
+        self.REGRID_WEIGHT_CACHE_SIZE = EnvParm('REGRID_WEIGHT_CACHE_SIZE', 32, formatter=int)
+        self.USE_NATIVE_REGRID = EnvParm('USE_NATIVE_REGRID', False, formatter=self._format_bool_)
+        self.NATIVE_REGRID_WORKERS = EnvParm('NATIVE_REGRID_WORKERS', None, formatter=int)
+        self.USE_RASTER_INTERSECTS = EnvParm('USE_RASTER_INTERSECTS', True, formatter=self._format_bool_)
         self.USE_SPATIAL_INDEX = EnvParmImport('USE_SPATIAL_INDEX', None, 'rtree')
         self.USE_CFUNITS = EnvParmImport('USE_CFUNITS', None, ('cf_units', 'cfunits'))
         self.USE_ESMF = EnvParmImport('USE_ESMF', None, 'ESMF')
         self.USE_ICCLIM = EnvParmImport('USE_ICCLIM', None, 'icclim')
         self.USE_MPI4PY = EnvParmImport('USE_MPI4PY', None, 'mpi4py')
+        self.USE_NUMBA = EnvParmImport('USE_NUMBA', None, 'numba')
         self.CONF_PATH = EnvParm('CONF_PATH', os.path.expanduser('~/.config/ocgis.conf'))
         self.SUPPRESS_WARNINGS = EnvParm('SUPPRESS_WARNINGS', True, formatter=self._format_bool_)
         self.DEFAULT_GEOM_UID = EnvParm('DEFAULT_GEOM_UID', constants.OCGIS_UNIQUE_GEOMETRY_IDENTIFIER, formatter=str)
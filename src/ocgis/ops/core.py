@@ -304,11 +304,19 @@ class OcgOperations(AbstractOcgisObject):
                 pass
         return ret
 
-    def execute(self):
+    def execute(self, chunks=None, max_memory=None):
         """Execute the request using the selected backend.
-        
+
+        :param dict chunks: If provided, execute calculations on blocks of the source data writing each block directly
+         to the NetCDF output. Keys are ``'time'``, ``'y'``, and ``'x'`` with block sizes as values. See
+         :func:`~ocgis.util.large_array.compute_chunked`.
+        :param int max_memory: Optional memory ceiling in bytes for chunked execution. Setting this value enables
+         chunked execution with spatial block sizes chosen to fit the ceiling.
         :rtype: Path to an output file/folder or dictionary composed of :class:`ocgis.driver.collection.AbstractCollection` objects.
         """
+        if chunks is not None or max_memory is not None:
+            from ocgis.util.large_array import compute_chunked
+            return compute_chunked(self, chunks=chunks, max_memory=max_memory)
         interp = OcgInterpreter(self)
         return interp.execute()
 
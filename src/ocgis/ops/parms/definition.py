@@ -26,6 +26,7 @@ from ocgis.driver.request.base import AbstractRequestObject
 from ocgis.exc import DefinitionValidationError
 from ocgis.ops.parms import base
 from ocgis.ops.parms.definition_helpers import MetadataAttributes
+from ocgis.regrid.weights import RegridWeights
 from ocgis.spatial.geom_cabinet import GeomCabinetIterator
 from ocgis.spatial.grid import Grid
 from ocgis.util.logging_ocgis import ocgis_lh
@@ -1074,10 +1075,23 @@ class RegridDestination(base.AbstractParameter):
 class RegridOptions(base.AbstractParameter):
     name = 'regrid_options'
     nullable = True
-    default = {'regrid_method': 'auto', 'value_mask': None, 'split': True}
+    default = {'regrid_method': 'auto', 'value_mask': None, 'split': True, 'weights': None}
     input_types = [dict]
     return_type = [dict]
     _possible_value_mask_types = [type(None), np.ndarray]
+    _perform_deepcopy = False
+
+    def _set_value_(self, value):
+        # Regrid weights may be large and are shared with the caller instead of copied.
+        if isinstance(value, dict):
+            memo = {}
+            weights = value.get('weights')
+            if weights is not None:
+                memo[id(weights)] = weights
+            value = deepcopy(value, memo)
+        super(RegridOptions, self)._set_value_(value)
+
+    value = property(base.AbstractParameter._get_value_, _set_value_)
 
     def _parse_(self, value):
         for key in list(value.keys()):
@@ -1098,6 +1112,10 @@ class RegridOptions(base.AbstractParameter):
                 msg = '"value_mask" must be a boolean array.'
                 raise DefinitionValidationError(self, msg)
 
+        if not isinstance(value.get('weights'), (type(None), RegridWeights)):
+            msg = '"weights" must be a RegridWeights object.'
+            raise DefinitionValidationError(self, msg)
+
         return value
 
     def _get_meta_(self):
@@ -1105,6 +1123,8 @@ class RegridOptions(base.AbstractParameter):
         for k, v in self.value.items():
             if k == 'value_mask' and isinstance(v, np.ndarray):
                 ret[k] = np.ndarray
+            elif k == 'weights' and v is not None:
+                ret[k] = type(v)
             else:
                 ret[k] = v
         return str(ret)
@@ -0,0 +1,76 @@
+from ocgis.base import AbstractOcgisObject
+from ocgis.driver.request.core import RequestDataset
+from ocgis.driver.request.multi_request import MultiRequestDataset
+from ocgis.ops.core import OcgOperations
+from ocgis.ops.parms.definition import Dataset
+
+
+class OperationsPlan(AbstractOcgisObject):
+    """
+    A reusable template for :class:`~ocgis.OcgOperations` executed repeatedly against a fixed set of datasets. Dataset
+    discovery is performed once when the plan is created: drivers are resolved, metadata is read, dimension maps are
+    inferred, and coordinate systems are parsed. Each request then binds its own operations parameters (i.e. ``geom``,
+    ``time_range``, ``calc``) to the resolved datasets.
+
+    >>> plan = OperationsPlan(rd, output_format='numpy')
+    >>> ret = plan.execute(geom=[-100., 30., -90., 40.], time_range=[start, stop])
+
+    :param dataset: See :class:`~ocgis.OcgOperations`.
+    :param kwargs: Default operations parameters. These may be overloaded per request. See
+     :class:`~ocgis.OcgOperations` for available parameters.
+    :raises: DefinitionValidationError
+    """
+
+    def __init__(self, dataset, **kwargs):
+        self.dataset = tuple([get_resolved_request_dataset(element) for element in Dataset(dataset)])
+        self.defaults = kwargs
+
+        # Validate the defaults against the resolved datasets.
+        self.get_operations()
+
+    def execute(self, **kwargs):
+        """
+        Execute a request using the plan's datasets.
+
+        :param kwargs: Operations parameters for this request. See :meth:`~ocgis.ops.plan.OperationsPlan.get_operations`.
+        :rtype: See :meth:`ocgis.OcgOperations.execute`.
+        """
+
+        return self.get_operations(**kwargs).execute()
+
+    def get_operations(self, **kwargs):
+        """
+        :param kwargs: Operations parameters for this request. These are merged with the plan defaults.
+        :returns: An operations object using the resolved datasets.
+        :rtype: :class:`~ocgis.OcgOperations`
+        :raises: DefinitionValidationError
+        """
+
+        if Dataset.name in kwargs:
+            raise ValueError('The "dataset" is fixed for an operations plan.')
+        parms = self.defaults.copy()
+        parms.update(kwargs)
+        return OcgOperations(dataset=list(self.dataset), **parms)
+
+
+def get_resolved_request_dataset(element):
+    """
+    Read and cache all dataset-level metadata needed to create fields from a request dataset. Request datasets share
+    their metadata, dimension map, and driver with shallow copies so the resolved values are reused by subsequent
+    operations.
+
+    :param element: A dataset element. Objects other than request datasets are returned unchanged.
+    :type element: :class:`~ocgis.RequestDataset` | :class:`~ocgis.MultiRequestDataset` | :class:`~ocgis.Field`
+    :returns: The resolved element.
+    """
+
+    if isinstance(element, MultiRequestDataset):
+        element.request_datasets = [get_resolved_request_dataset(rd) for rd in element.request_datasets]
+    elif isinstance(element, RequestDataset):
+        # The driver caches the raw metadata and dimension map. The request dataset caches its copies.
+        _ = element.metadata
+        _ = element.dimension_map
+        if element._crs == 'auto':
+            # The coordinate system is parsed from the metadata on each access unless assigned.
+            element._crs = element.crs
+    return element
@@ -2,9 +2,7 @@ import logging
 from copy import deepcopy
 from types import NoneType
 
-import ESMF
 import numpy as np
-from ESMF.api.constants import RegridMethod
 
 from ocgis import constants, DimensionMap
 from ocgis import env
@@ -16,9 +14,19 @@ from ocgis.spatial.grid import Grid, expand_grid
 from ocgis.spatial.spatial_subset import SpatialSubsetOperation
 from ocgis.util.helpers import iter_array, get_esmf_corners_from_ocgis_corners
 from ocgis.util.logging_ocgis import ocgis_lh
+from ocgis.regrid.native import get_native_regrid_weights
+from ocgis.regrid.weights import RegridWeights, BLOCK_SIZE, get_cached_weights
 from ocgis.variable.base import Variable
 from ocgis.variable.crs import Spherical
 
+# ESMF is optional. Without ESMF, weights are generated natively or loaded from the regrid weight cache.
+try:
+    import ESMF
+    from ESMF.api.constants import RegridMethod
+except ImportError:
+    ESMF = None
+    RegridMethod = None
+
 
 class RegridOperation(AbstractOcgisObject):
     """
@@ -35,6 +43,9 @@ class RegridOperation(AbstractOcgisObject):
     :param bool revert_dst_crs: If ``True``, revert the destination grid coordinate system if it needed to be
      transformed. Typically, a number of source fields are regridded to a common destination and this transform
      should only occur once.
+
+    After execution, :attr:`weights` holds the :class:`~ocgis.regrid.weights.RegridWeights` used for regridding. Pass
+    these as the ``weights`` regrid option to skip weight generation for fields on the same grids.
     """
 
     def __init__(self, field_src, field_dst, subset_field=None, regrid_options=None, revert_dst_crs=False):
@@ -46,6 +57,7 @@ class RegridOperation(AbstractOcgisObject):
         self.field_src = field_src
         self.subset_field = subset_field
         self.revert_dst_crs = revert_dst_crs
+        self.weights = None
         if regrid_options is None:
             self.regrid_options = {}
         else:
@@ -63,7 +75,13 @@ class RegridOperation(AbstractOcgisObject):
 
         # Regrid the input field.
         ocgis_lh(logger='regrid', msg='Creating regridded field...', level=logging.INFO)
-        regridded_source = regrid_field(regrid_source, regrid_destination, **self.regrid_options)
+        regrid_options = self.regrid_options.copy()
+        if regrid_options.get(KeywordArgument.WEIGHTS) is None:
+            regrid_options[KeywordArgument.WEIGHTS] = get_regrid_weights(
+                regrid_source, regrid_destination, regrid_method=regrid_options.get('regrid_method', 'auto'),
+                value_mask=regrid_options.get('value_mask'))
+        self.weights = regrid_options[KeywordArgument.WEIGHTS]
+        regridded_source = regrid_field(regrid_source, regrid_destination, **regrid_options)
 
         if backtransform_src_crs is not None:
             regridded_source.update_crs(backtransform_src_crs)
@@ -346,14 +364,7 @@ def get_esmf_grid(ogrid, regrid_method='auto', value_mask=None):
     col = egrid.get_coords(0, staggerloc=ESMF.StaggerLoc.CENTER)
     col[:] = ovalue_stacked[1, ...]
 
-    # Use a logical or operation to merge with value_mask if present
-    if value_mask is not None:
-        # convert to boolean to make sure
-        value_mask = value_mask.astype(bool)
-        # do the logical or operation selecting values
-        value_mask = np.logical_or(value_mask, ogrid.get_mask(create=True))
-    else:
-        value_mask = ogrid.get_mask()
+    value_mask = get_regrid_mask(ogrid, value_mask=value_mask)
     # Follows SCRIP convention where 1 is unmasked and 0 is masked.
     if value_mask is not None:
         esmf_mask = np.invert(value_mask).astype(np.int32)
@@ -391,6 +402,27 @@ def get_esmf_grid(ogrid, regrid_method='auto', value_mask=None):
     return egrid
 
 
+def get_regrid_mask(ogrid, value_mask=None):
+    """
+    :param ogrid: The OCGIS grid.
+    :type ogrid: :class:`~ocgis.Grid`
+    :param value_mask: See :func:`~ocgis.regrid.base.get_esmf_grid`.
+    :type value_mask: :class:`numpy.ndarray`
+    :returns: The mask used for regridding the grid. Values of ``True`` are masked.
+    :rtype: :class:`numpy.ndarray` | ``None``
+    """
+
+    # Use a logical or operation to merge with value_mask if present
+    if value_mask is not None:
+        # convert to boolean to make sure
+        value_mask = value_mask.astype(bool)
+        # do the logical or operation selecting values
+        value_mask = np.logical_or(value_mask, ogrid.get_mask(create=True))
+    else:
+        value_mask = ogrid.get_mask()
+    return value_mask
+
+
 def get_periodicity_parameters(grid):
     """
     Get characteristics of a grid's periodicity. This is only applicable for grids with a spherical coordinate system.
@@ -438,6 +470,124 @@ def get_periodicity_parameters(grid):
     return ret
 
 
+def get_value_mask(ofield):
+    """
+    :param ofield: The OCGIS field.
+    :type ofield: :class:`ocgis.Field`
+    :returns: The mask of the first data variable at the first time index. This is used as the grid value mask for
+     regridding.
+    :rtype: :class:`numpy.ndarray` | ``None``
+    """
+
+    if ofield.time is not None:
+        sfield = ofield.get_field_slice({'time': 0})
+    else:
+        sfield = ofield
+    archetype = sfield.data_variables[0]
+    return archetype.get_mask()
+
+
+def get_regrid_weights(source, destination, regrid_method='auto', value_mask=None):
+    """
+    Generate sparse weights regridding values on the grid of ``source`` to the grid of ``destination``. The
+    weights may be applied to any number of time slices and variables on the source grid. If
+    :attr:`ocgis.env.DIR_REGRID_WEIGHT_CACHE` is set, weights are loaded from the cache if the grids, masks, and regrid
+    method match a previous call. If :attr:`ocgis.env.USE_NATIVE_REGRID` is ``True`` or ESMF is not available, weights
+    are generated without ESMF using :func:`~ocgis.regrid.native.get_native_regrid_weights`.
+
+    :param source: The source field.
+    :type source: :class:`ocgis.Field`
+    :param destination: The destination field.
+    :type destination: :class:`ocgis.Field`
+    :param regrid_method: See :func:`~ocgis.regrid.base.get_esmf_grid`.
+    :param value_mask: See :func:`~ocgis.regrid.base.iter_esmf_fields`. If ``None``, the source grid is masked using
+     :func:`~ocgis.regrid.base.get_value_mask`.
+    :type value_mask: :class:`numpy.ndarray`
+    :rtype: :class:`~ocgis.regrid.weights.RegridWeights`
+    :raises: RegriddingError
+    """
+
+    check_fields_for_regridding(source, destination, regrid_method=regrid_method)
+
+    if value_mask is None:
+        src_value_mask = get_value_mask(source)
+    else:
+        src_value_mask = value_mask
+
+    use_native = env.USE_NATIVE_REGRID or ESMF is None
+
+    def _create_():
+        if use_native:
+            ret = get_native_regrid_weights(source.grid, destination.grid,
+                                            regrid_method=_get_native_regrid_method_(regrid_method),
+                                            src_mask=get_regrid_mask(source.grid, value_mask=src_value_mask),
+                                            dst_mask=get_regrid_mask(destination.grid, value_mask=value_mask),
+                                            n_workers=env.NATIVE_REGRID_WORKERS)
+        else:
+            ret = _create_esmf_regrid_weights_(source, destination, regrid_method, src_value_mask, value_mask)
+        return ret
+
+    return get_cached_weights(_create_, source.grid, destination.grid, regrid_method, src_value_mask, value_mask,
+                              use_native)
+
+
+def _create_esmf_regrid_weights_(source, destination, regrid_method, src_value_mask, dst_value_mask):
+    src_egrid = get_esmf_grid(source.grid, regrid_method=regrid_method, value_mask=src_value_mask)
+    dst_egrid = get_esmf_grid(destination.grid, regrid_method=regrid_method, value_mask=dst_value_mask)
+
+    # Check for corners on the grids. If they exist, conservative regridding is possible.
+    if regrid_method == 'auto':
+        if get_esmf_grid_has_corners(dst_egrid) and get_esmf_grid_has_corners(src_egrid):
+            regrid_method = ESMF.RegridMethod.CONSERVE
+        else:
+            regrid_method = None
+
+    src_efield = ESMF.Field(src_egrid, name='source')
+    dst_efield = ESMF.Field(dst_egrid, name='destination')
+    # Weight generation occurs in this call. Weights are returned as factors instead of being stored on the object.
+    regrid = ESMF.Regrid(src_efield, dst_efield, unmapped_action=ESMF.UnmappedAction.IGNORE,
+                         regrid_method=regrid_method, src_mask_values=[0], dst_mask_values=[0], factors=True)
+    factor_list, factor_index_list = regrid.get_factors()
+    if factor_list is None:
+        factor = np.zeros(0)
+        factor_index = np.zeros((0, 2), dtype=int)
+    else:
+        factor = np.array(factor_list, dtype=float)
+        factor_index = np.array(factor_index_list, dtype=int).reshape(-1, 2)
+    destroy_esmf_objects([regrid, src_efield, dst_efield, src_egrid, dst_egrid])
+
+    col = get_flat_index_from_esmf_sequence_index(factor_index[:, 0], source.grid.shape)
+    row = get_flat_index_from_esmf_sequence_index(factor_index[:, 1], destination.grid.shape)
+    return RegridWeights(row, col, factor, source.grid.shape, destination.grid.shape, regrid_method=regrid_method)
+
+
+def _get_native_regrid_method_(regrid_method):
+    # Convert ESMF regrid method flags to native regrid method names. ESMF uses bilinear weights by default.
+    if regrid_method is None:
+        ret = 'bilinear'
+    elif RegridMethod is not None and regrid_method == RegridMethod.CONSERVE:
+        ret = 'conserve'
+    elif RegridMethod is not None and regrid_method == RegridMethod.BILINEAR:
+        ret = 'bilinear'
+    else:
+        ret = regrid_method
+    return ret
+
+
+def get_flat_index_from_esmf_sequence_index(sequence_index, shape):
+    """
+    Convert ESMF sequence indices to flat indices into an OCGIS grid.
+
+    :param sequence_index: One-based ESMF sequence indices. ESMF sequence indices are in Fortran order.
+    :type sequence_index: :class:`numpy.ndarray`
+    :param tuple shape: The OCGIS grid shape.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    sequence_index = np.asarray(sequence_index) - 1
+    return np.ravel_multi_index(np.unravel_index(sequence_index, shape, order='F'), shape)
+
+
 def iter_esmf_fields(ofield, regrid_method='auto', value_mask=None, split=True):
     """
     For all data or a single time coordinate, yield an ESMF :class:`~ESMF.driver.field.Field` from the input OCGIS field
@@ -472,12 +622,7 @@ def iter_esmf_fields(ofield, regrid_method='auto', value_mask=None, split=True):
 
     # Retrieve the mask from the first variable.
     if value_mask is None:
-        if ofield.time is not None:
-            sfield = ofield.get_field_slice({'time': 0})
-        else:
-            sfield = ofield
-        archetype = sfield.data_variables[0]
-        value_mask = archetype.get_mask()
+        value_mask = get_value_mask(ofield)
 
     # Create the ESMF grid.
     egrid = get_esmf_grid(ofield.grid, regrid_method=regrid_method, value_mask=value_mask)
@@ -561,7 +706,7 @@ def check_fields_for_regridding(source, destination, regrid_method='auto'):
 
     # Check corners are available on all inputs ########################################################################
 
-    if regrid_method == ESMF.RegridMethod.CONSERVE:
+    if ESMF is not None and regrid_method == ESMF.RegridMethod.CONSERVE:
         has_corners_source = source.grid.has_bounds
         has_corners_destination = destination.grid.has_bounds
         if not has_corners_source or not has_corners_destination:
@@ -569,9 +714,10 @@ def check_fields_for_regridding(source, destination, regrid_method='auto'):
             raise CornersInconsistentError(msg)
 
 
-def regrid_field(source, destination, regrid_method='auto', value_mask=None, split=True):
+def regrid_field(source, destination, regrid_method='auto', value_mask=None, split=True, weights=None):
     """
-    Regrid ``source`` data to match the grid of ``destination``.
+    Regrid ``source`` data to match the grid of ``destination``. Regrid weights are generated once and applied to all
+    time slices and data variables.
 
     :param source: The source field.
     :type source: :class:`ocgis.Field`
@@ -580,110 +726,72 @@ def regrid_field(source, destination, regrid_method='auto', value_mask=None, spl
     :param regrid_method: See :func:`~ocgis.regrid.base.get_esmf_grid`.
     :param value_mask: See :func:`~ocgis.regrid.base.iter_esmf_fields`.
     :type value_mask: :class:`numpy.ndarray`
-    :param bool split: See :func:`~ocgis.regrid.base.iter_esmf_fields`.
+    :param bool split: If ``True``, apply the weights to blocks of time slices to limit memory use. If ``False``, apply
+     the weights to all time slices at once.
+    :param weights: Weights from a previous call to :func:`~ocgis.regrid.base.get_regrid_weights` for the same source
+     and destination grids. If ``None``, the weights are generated. ``regrid_method`` and ``value_mask`` are only used
+     to generate weights.
+    :type weights: :class:`~ocgis.regrid.weights.RegridWeights`
     :rtype: :class:`ocgis.Field`
+    :raises: RegriddingError
     """
 
     # This function runs a series of asserts to make sure the sources and destination are compatible.
     check_fields_for_regridding(source, destination, regrid_method=regrid_method)
 
-    # Regrid each source.
-    ocgis_lh(logger='iter_regridded_fields', msg='starting source regrid loop', level=logging.DEBUG)
-    # for source in sources:
-    build = True
-    fills = {}
-    for variable_name, src_efield, tidx in iter_esmf_fields(source, regrid_method=regrid_method,
-                                                            value_mask=value_mask, split=split):
+    if weights is None:
+        ocgis_lh(logger='regrid_field', msg='generating regrid weights', level=logging.DEBUG)
+        weights = get_regrid_weights(source, destination, regrid_method=regrid_method, value_mask=value_mask)
+    elif weights.src_shape != tuple(source.grid.shape) or weights.dst_shape != tuple(destination.grid.shape):
+        raise RegriddingError('Regrid weights do not match the source and destination grid shapes.')
 
-        # We need to generate new variables given the change in shape
-        if variable_name not in fills:
-            if source.time is not None:
-                new_dimensions = list(source.time.dimensions) + list(destination.grid.dimensions)
-            else:
-                new_dimensions = list(destination.grid.dimensions)
-            source_variable = source[variable_name]
-            new_variable = Variable(name=variable_name, dimensions=new_dimensions, dtype=source_variable.dtype,
-                                    fill_value=source_variable.fill_value)
-            fills[variable_name] = new_variable
-
-        # Only build the regrid objects once.
-        if build:
-            # Build the destination grid once.
-            esmf_destination_grid = get_esmf_grid(destination.grid, regrid_method=regrid_method, value_mask=value_mask)
-
-            # Check for corners on the destination grid. If they exist, conservative regridding is possible.
-            if regrid_method == 'auto':
-                if get_esmf_grid_has_corners(esmf_destination_grid) and get_esmf_grid_has_corners(src_efield.grid):
-                    regrid_method = ESMF.RegridMethod.CONSERVE
-                else:
-                    regrid_method = None
-
-            if split:
-                ndbounds = None
-            else:
-                ndbounds = [source.time.shape[0]]
+    # If all data is masked, raise an exception.
+    if not weights.mapped.any():
+        msg = 'All regridded elements are masked. Do the input spatial extents overlap?'
+        raise RegriddingError(msg)
 
-            # Prepare the regridded sourced field. This amounts to exchanging the grids between the objects.
-            regridded_source = source.copy()
-            regridded_source.grid.extract(clean_break=True)
-            regridded_source.set_grid(destination.grid.extract())
+    # Prepare the regridded sourced field. This amounts to exchanging the grids between the objects.
+    regridded_source = source.copy()
+    regridded_source.grid.extract(clean_break=True)
+    regridded_source.set_grid(destination.grid.extract())
 
-            build = False
+    # Only one level and realization allowed. These dimensions will become singletons.
+    dimension_names_to_squeeze = []
+    if source.level is not None and source.level.ndim > 0:
+        assert source.level.shape[0] == 1
+        dimension_names_to_squeeze.append(source.level.dimensions[0].name)
+    if source.realization is not None:
+        assert source.realization.shape[0] == 1
+        dimension_names_to_squeeze.append(source.realization.dimensions[0].name)
+
+    if source.time is not None:
+        new_dimensions = list(source.time.dimensions) + list(destination.grid.dimensions)
+    else:
+        new_dimensions = list(destination.grid.dimensions)
 
-        dst_efield = ESMF.Field(esmf_destination_grid, name='destination', ndbounds=ndbounds)
-        fill_variable = fills[variable_name]
+    fills = []
+    for source_variable in source.data_variables:
+        ocgis_lh(logger='regrid_field', msg='regridding variable: {}'.format(source_variable.name),
+                 level=logging.DEBUG)
+        # We need to generate new variables given the change in shape
+        fill_variable = Variable(name=source_variable.name, dimensions=new_dimensions, dtype=source_variable.dtype,
+                                 fill_value=source_variable.fill_value)
         fv = fill_variable.fill_value
         if fv is None:
             fv = np.ma.array([0], dtype=fill_variable.dtype).fill_value
-        dst_efield.data.fill(fv)
-        # Construct the regrid object. Weight generation actually occurs in this call.
-        regrid = ESMF.Regrid(src_efield, dst_efield, unmapped_action=ESMF.UnmappedAction.IGNORE,
-                             regrid_method=regrid_method, src_mask_values=[0], dst_mask_values=[0])
-        # Perform the regrid operation. "zero_region" only fills values involved with regridding.
-        regridded_esmf_field = regrid(src_efield, dst_efield, zero_region=ESMF.Region.SELECT)
-        unmapped_mask = regridded_esmf_field.data[:] == fv
-        # If all data is masked, raise an exception.
-        if unmapped_mask.all():
-            # Destroy ESMF objects.
-            destroy_esmf_objects([regrid, dst_efield, esmf_destination_grid])
-            msg = 'All regridded elements are masked. Do the input spatial extents overlap?'
-            raise RegriddingError(msg)
-        # Fill the new variables.
-        fv_value = fill_variable.get_value()
-        fv_mask = fill_variable.get_mask(create=True)
-        try:
-            fv_value[tidx, :, :] = regridded_esmf_field.data
-        except IndexError:
-            # Assume no time index.
-            fv_value[:, :] = regridded_esmf_field.data
-        if regridded_esmf_field.grid.mask[0] is not None:
-            try:
-                fv_mask[tidx, :, :] = np.invert(regridded_esmf_field.grid.mask[0].astype(bool))
-            except IndexError:
-                # Assume no time index.
-                fv_mask[:, :] = np.invert(regridded_esmf_field.grid.mask[0].astype(bool))
-        try:
-            fill_variable_mask = np.logical_or(unmapped_mask, fv_mask[tidx, :, :])
-        except IndexError:
-            # Assume no time index.
-            fill_variable_mask = np.logical_or(unmapped_mask, fv_mask[:, :])
-        try:
-            fv_mask[tidx, :, :] = fill_variable_mask
-        except IndexError:
-            # Assume no time index.
-            fv_mask[:, :] = fill_variable_mask
-        fill_variable.set_mask(fv_mask)
-
-        # Destroy ESMF objects, but keep the grid until all splits have finished. If split=False, there is only one
-        # split.
-        destroy_esmf_objects([regrid, dst_efield, src_efield])
-
-        # Create a new variable collection and add the variables to the output field.
-        # source.variables = VariableCollection()
-        for v in list(fills.values()):
-            regridded_source.add_variable(v, is_data=True, force=True)
-
-    destroy_esmf_objects([esmf_destination_grid])
+
+        dimensions_to_squeeze = tuple([idx for idx, d in enumerate(source_variable.dimensions) if
+                                       d.name in dimension_names_to_squeeze])
+        value = np.squeeze(source_variable.get_value(), axis=dimensions_to_squeeze)
+        regridded = weights.apply(value, fill_value=fv, block_size=BLOCK_SIZE if split else None)
+
+        fill_variable.get_value()[:] = regridded.data
+        fill_variable.set_mask(regridded.mask)
+        fills.append(fill_variable)
+
+    # Create a new variable collection and add the variables to the output field.
+    for v in fills:
+        regridded_source.add_variable(v, is_data=True, force=True)
 
     return regridded_source
 
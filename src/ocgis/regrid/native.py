@@ -0,0 +1,363 @@
+"""
+Regrid weight generation for spherical structured grids without ESMF. Weights are returned as
+:class:`~ocgis.regrid.weights.RegridWeights` and are interchangeable with weights generated by ESMF.
+
+Conservative weights are first-order: a destination value is the sum of the source values weighted by the fraction of
+the destination cell area they overlap (ESMF's ``destarea`` normalization). Areas are measured on the longitude/sine of
+latitude plane which is equal-area on the sphere. Areas of cells bounded by meridians and parallels are exact. Other
+cell edges are straight lines on this plane instead of great circles. Bilinear weights interpolate between the four
+source cell centers surrounding a destination cell center in longitude/latitude.
+
+Weights for rectilinear (vectorized) grids are computed from one-dimensional coordinate searches. Curvilinear grids
+use a spatial index over destination cells (conservative) or source center quadrilaterals (bilinear) and require
+``shapely>=2.0``. Destination rows are split into tiles which may be processed on a pool of local processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ocgis.exc import RegriddingError, CornersInconsistentError
+from ocgis.regrid.weights import RegridWeights
+from ocgis.spatial.index import BulkSpatialIndex
+
+try:
+    # Vectorized geometry constructors and operations are available in shapely>=2.0.
+    from shapely import area as get_area, intersection as get_intersection, points as create_points, \
+        polygons as create_polygons
+except ImportError:
+    get_area, get_intersection, create_points, create_polygons = None, None, None, None
+
+# Maximum number of destination cells in a tile. Tiles are the unit of parallel work.
+TILE_SIZE = 2 ** 16
+# Iterations used to invert the bilinear mapping of curvilinear source quadrilaterals.
+NEWTON_ITERATIONS = 20
+# Longitude shifts used to match grids with different longitude conventions or crossing the periodic boundary.
+LONGITUDE_SHIFTS = (0., -360., 360.)
+
+
+def get_native_regrid_weights(src_grid, dst_grid, regrid_method='auto', src_mask=None, dst_mask=None, n_workers=None):
+    """
+    Generate regrid weights without ESMF. See :mod:`ocgis.regrid.native`.
+
+    :param src_grid: The source grid with spherical coordinates in degrees.
+    :type src_grid: :class:`~ocgis.Grid`
+    :param dst_grid: The destination grid with spherical coordinates in degrees.
+    :type dst_grid: :class:`~ocgis.Grid`
+    :param str regrid_method: One of ``'auto'``, ``'conserve'``, or ``'bilinear'``. If ``'auto'``, use conservative
+     weights if both grids have bounds. Otherwise, use bilinear weights.
+    :param src_mask: Source elements with a value of ``True`` have no weights. If ``None``, use the source grid mask.
+    :type src_mask: :class:`numpy.ndarray`
+    :param dst_mask: Destination elements with a value of ``True`` are unmapped. If ``None``, use the destination grid
+     mask.
+    :type dst_mask: :class:`numpy.ndarray`
+    :param int n_workers: If greater than one, generate weights for destination tiles on a pool of ``n_workers`` local
+     processes.
+    :rtype: :class:`~ocgis.regrid.weights.RegridWeights`
+    :raises: RegriddingError, CornersInconsistentError, ValueError
+    """
+
+    if n_workers is not None and int(n_workers) <= 0:
+        raise ValueError('"n_workers" must be greater than 0')
+
+    if regrid_method == 'auto':
+        if src_grid.has_bounds and dst_grid.has_bounds:
+            regrid_method = 'conserve'
+        else:
+            regrid_method = 'bilinear'
+    if regrid_method == 'conserve':
+        if not src_grid.has_bounds or not dst_grid.has_bounds:
+            msg = 'Corners are not available on all sources and destination. Consider changing "regrid_method".'
+            raise CornersInconsistentError(msg)
+    elif regrid_method != 'bilinear':
+        raise RegriddingError('Regrid method "{}" is not supported without ESMF.'.format(regrid_method))
+
+    is_rectilinear = src_grid.is_vectorized and (regrid_method == 'bilinear' or dst_grid.is_vectorized)
+    if not is_rectilinear and create_polygons is None:
+        raise ImportError('"shapely>=2.0" is required to generate regrid weights for curvilinear grids.')
+
+    src = _get_grid_arrays_(src_grid, regrid_method, src_mask, is_rectilinear)
+    dst = _get_grid_arrays_(dst_grid, regrid_method, dst_mask, is_rectilinear and regrid_method == 'conserve')
+
+    if regrid_method == 'conserve':
+        if is_rectilinear:
+            target = _get_conservative_rectilinear_weights_
+        else:
+            target = _get_conservative_curvilinear_weights_
+    else:
+        if is_rectilinear:
+            target = _get_bilinear_rectilinear_weights_
+        else:
+            target = _get_bilinear_curvilinear_weights_
+
+    # Tiles are blocks of destination rows.
+    ny, nx = dst_grid.shape
+    tile_rows = max(1, TILE_SIZE // max(1, nx))
+    tiles = [slice(start, min(start + tile_rows, ny)) for start in range(0, ny, tile_rows)]
+    dst_tiles = [_get_tile_(dst, tile) for tile in tiles]
+    if n_workers is None or int(n_workers) == 1:
+        results = [target(src, dst_tile) for dst_tile in dst_tiles]
+    else:
+        with ProcessPoolExecutor(max_workers=int(n_workers)) as executor:
+            results = list(executor.map(target, [src] * len(tiles), dst_tiles))
+
+    # Tile destination indices are relative to the first row of the tile.
+    row = [result[0] + tile.start * nx for tile, result in zip(tiles, results)]
+    col = [result[1] for result in results]
+    factor = [result[2] for result in results]
+    row, col, factor = [np.concatenate(a) if len(a) > 0 else np.zeros(0) for a in (row, col, factor)]
+    return RegridWeights(row, col, factor, src_grid.shape, dst_grid.shape, regrid_method=regrid_method)
+
+
+def _get_grid_arrays_(grid, regrid_method, mask, is_rectilinear):
+    # Extract the coordinate arrays used for weight generation. Arrays named by "tiled" have a leading row dimension
+    # and are split into tiles for destination grids.
+    if mask is None:
+        mask = grid.get_mask()
+    if mask is None:
+        mask = np.zeros(grid.shape, dtype=bool)
+    ret = {'mask': np.asarray(mask, dtype=bool).reshape(grid.shape), 'shape': tuple(grid.shape),
+           'tiled': ('mask', 'x', 'y')}
+    if regrid_method == 'conserve':
+        x_bounds = grid.x.bounds.get_value()
+        y_bounds = grid.y.bounds.get_value()
+        if is_rectilinear:
+            ret['x'] = x_bounds
+            ret['y'] = y_bounds
+            ret['tiled'] = ('mask', 'y')
+        elif grid.is_vectorized:
+            # Expand the bounds to corners ordered counterclockwise from the lower left.
+            x_bounds = np.sort(x_bounds, axis=1)[:, [0, 1, 1, 0]]
+            y_bounds = np.sort(y_bounds, axis=1)[:, [0, 0, 1, 1]]
+            ret['x'] = np.broadcast_to(x_bounds[None, :, :], grid.shape + (4,))
+            ret['y'] = np.broadcast_to(y_bounds[:, None, :], grid.shape + (4,))
+        else:
+            ret['x'] = x_bounds
+            ret['y'] = y_bounds
+    else:
+        if is_rectilinear:
+            ret['x'] = grid.x.get_value()
+            ret['y'] = grid.y.get_value()
+        else:
+            value_stacked = grid.get_value_stacked()
+            ret['x'] = value_stacked[1]
+            ret['y'] = value_stacked[0]
+    return ret
+
+
+def _get_tile_(arrays, tile):
+    ret = arrays.copy()
+    for key in arrays['tiled']:
+        ret[key] = arrays[key][tile]
+    ret['shape'] = ret['mask'].shape
+    return ret
+
+
+def _get_conservative_rectilinear_weights_(src, dst):
+    # Cells are rectangles on the equal-area plane so weights are the product of longitude and sine of latitude
+    # overlap fractions.
+    dst_x, src_x, overlap_x = _get_interval_overlaps_(dst['x'], src['x'], period=360.)
+    dst_y, src_y, overlap_y = _get_interval_overlaps_(_get_sin_latitude_(dst['y']), _get_sin_latitude_(src['y']))
+    fraction_x = overlap_x / np.ptp(dst['x'], axis=1)[dst_x]
+    fraction_y = overlap_y / np.ptp(_get_sin_latitude_(dst['y']), axis=1)[dst_y]
+
+    row = (dst_y[:, None] * dst['shape'][1] + dst_x[None, :]).reshape(-1)
+    col = (src_y[:, None] * src['shape'][1] + src_x[None, :]).reshape(-1)
+    factor = (fraction_y[:, None] * fraction_x[None, :]).reshape(-1)
+    select = np.invert(np.logical_or(dst['mask'].reshape(-1)[row], src['mask'].reshape(-1)[col]))
+    return row[select], col[select], factor[select]
+
+
+def _get_conservative_curvilinear_weights_(src, dst):
+    dst_index = np.flatnonzero(np.invert(dst['mask']))
+    src_index = np.flatnonzero(np.invert(src['mask']))
+    empty = np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+    if dst_index.size == 0 or src_index.size == 0:
+        return empty
+
+    dst_x = _get_unwrapped_corners_(dst['x'].reshape(-1, 4)[dst_index])
+    dst_y = _get_sin_latitude_(dst['y'].reshape(-1, 4)[dst_index])
+    dst_polygons = create_polygons(np.stack((dst_x, dst_y), axis=-1))
+    dst_area = get_area(dst_polygons)
+    si = BulkSpatialIndex(dst_polygons)
+
+    src_x = _get_unwrapped_corners_(src['x'].reshape(-1, 4)[src_index])
+    src_y = _get_sin_latitude_(src['y'].reshape(-1, 4)[src_index])
+    select_y = np.logical_and(src_y.max(axis=1) >= dst_y.min(), src_y.min(axis=1) <= dst_y.max())
+
+    rows, cols, factors = [], [], []
+    for shift in LONGITUDE_SHIFTS:
+        # Only source cells inside the tile's bounding box are converted to polygons.
+        shifted = src_x + shift
+        candidates = np.flatnonzero(np.logical_and.reduce(
+            [select_y, shifted.max(axis=1) >= dst_x.min(), shifted.min(axis=1) <= dst_x.max()]))
+        if candidates.size == 0:
+            continue
+        src_polygons = create_polygons(np.stack((shifted[candidates], src_y[candidates]), axis=-1))
+        src_position, dst_position = si.query_bulk(src_polygons)
+        overlap = get_area(get_intersection(src_polygons[src_position], dst_polygons[dst_position]))
+        select = overlap > 0
+        rows.append(dst_index[dst_position[select]])
+        cols.append(src_index[candidates[src_position[select]]])
+        factors.append(overlap[select] / dst_area[dst_position[select]])
+
+    if len(rows) == 0:
+        return empty
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(factors)
+
+
+def _get_bilinear_rectilinear_weights_(src, dst):
+    # Destination coordinates are always two-dimensional for bilinear weights.
+    valid_x, x0, x1, tx = _get_brackets_(src['x'], dst['x'].reshape(-1), period=360.)
+    valid_y, y0, y1, ty = _get_brackets_(src['y'], dst['y'].reshape(-1))
+
+    nx = src['shape'][1]
+    col = np.stack([y0 * nx + x0, y0 * nx + x1, y1 * nx + x1, y1 * nx + x0], axis=1)
+    factor = np.stack([(1 - tx) * (1 - ty), tx * (1 - ty), tx * ty, (1 - tx) * ty], axis=1)
+    return _get_bilinear_weights_(src, dst, valid_x & valid_y, col, factor)
+
+
+def _get_bilinear_curvilinear_weights_(src, dst):
+    ny, nx = src['shape']
+    dst_x = dst['x'].reshape(-1)
+    dst_y = dst['y'].reshape(-1)
+    ndst = dst_x.shape[0]
+    valid = np.zeros(ndst, dtype=bool)
+    col = np.zeros((ndst, 4), dtype=int)
+    factor = np.zeros((ndst, 4))
+    if ny < 2 or nx < 2:
+        return _get_bilinear_weights_(src, dst, valid, col, factor)
+
+    # Quadrilaterals are formed by the centers of neighboring source cells ordered counterclockwise in index space.
+    rows, cols = np.meshgrid(np.arange(ny - 1), np.arange(nx - 1), indexing='ij')
+    corners = np.stack([rows * nx + cols, rows * nx + cols + 1, (rows + 1) * nx + cols + 1, (rows + 1) * nx + cols],
+                       axis=-1).reshape(-1, 4)
+    quad_x = _get_unwrapped_corners_(src['x'].reshape(-1)[corners])
+    quad_y = src['y'].reshape(-1)[corners]
+
+    # Only quadrilaterals inside the tile's bounding box are indexed.
+    select = np.logical_and(quad_y.max(axis=1) >= dst_y.min(), quad_y.min(axis=1) <= dst_y.max())
+    for shift in LONGITUDE_SHIFTS:
+        remaining = np.flatnonzero(np.invert(valid))
+        if remaining.size == 0:
+            break
+        points_x = dst_x[remaining] + shift
+        candidates = np.flatnonzero(np.logical_and.reduce(
+            [select, quad_x.max(axis=1) >= points_x.min(), quad_x.min(axis=1) <= points_x.max()]))
+        if candidates.size == 0:
+            continue
+        si = BulkSpatialIndex(create_polygons(np.stack((quad_x[candidates], quad_y[candidates]), axis=-1)))
+        point_position, quad_position = si.query_bulk(create_points(points_x, dst_y[remaining]))
+        # Points on shared edges intersect more than one quadrilateral. Use the first.
+        point_position, first = np.unique(point_position, return_index=True)
+        quad = candidates[quad_position[first]]
+        s, t = _get_inverse_bilinear_(quad_x[quad], quad_y[quad], points_x[point_position],
+                                      dst_y[remaining][point_position])
+        found = np.isfinite(s) & np.isfinite(t)
+        target = remaining[point_position[found]]
+        s, t = s[found], t[found]
+        valid[target] = True
+        col[target] = corners[quad[found]]
+        factor[target] = np.stack([(1 - s) * (1 - t), s * (1 - t), s * t, (1 - s) * t], axis=1)
+
+    return _get_bilinear_weights_(src, dst, valid, col, factor)
+
+
+def _get_bilinear_weights_(src, dst, valid, col, factor):
+    # Destination elements are unmapped if any of their source elements are masked.
+    valid = np.logical_and(valid, np.invert(dst['mask'].reshape(-1)))
+    valid = np.logical_and(valid, np.invert(src['mask'].reshape(-1)[col].any(axis=1)))
+    row = np.repeat(np.flatnonzero(valid), 4)
+    col = col[valid].reshape(-1)
+    factor = factor[valid].reshape(-1)
+    select = factor != 0
+    return row[select], col[select], factor[select]
+
+
+def _get_brackets_(coordinates, values, period=None):
+    # Find the source coordinates bracketing each value. Returns the validity, the lower and upper coordinate indices,
+    # and the fractional position between them.
+    order = np.argsort(coordinates, kind='mergesort')
+    ordered = coordinates[order]
+    if period is not None:
+        # Move values to the coordinate convention. Periodic coordinates are bracketed across the boundary.
+        values = ordered[0] + np.mod(values - ordered[0], period)
+        if period - np.ptp(ordered) <= 1.5 * np.max(np.diff(ordered), initial=0.):
+            ordered = np.append(ordered, ordered[0] + period)
+            order = np.append(order, order[0])
+
+    n = ordered.shape[0]
+    ret_valid = np.zeros(values.shape, dtype=bool)
+    ret_lower = np.zeros(values.shape, dtype=int)
+    ret_upper = np.zeros(values.shape, dtype=int)
+    ret_fraction = np.zeros(values.shape)
+    if n < 2:
+        return ret_valid, ret_lower, ret_upper, ret_fraction
+
+    position = np.searchsorted(ordered, values, side='right') - 1
+    # Values equal to the last coordinate are in the last interval.
+    position[values == ordered[-1]] = n - 2
+    ret_valid = np.logical_and(position >= 0, position <= n - 2)
+    position = np.clip(position, 0, n - 2)
+    ret_lower = order[position]
+    ret_upper = order[position + 1]
+    ret_fraction = (values - ordered[position]) / (ordered[position + 1] - ordered[position])
+    return ret_valid, ret_lower, ret_upper, ret_fraction
+
+
+def _get_interval_overlaps_(target, source, period=None):
+    # Find overlapping intervals between two sets of non-overlapping intervals. Returns the target and source interval
+    # indices and the overlap length of each overlapping pair.
+    target_lower, target_upper = target.min(axis=1), target.max(axis=1)
+    source_lower, source_upper = source.min(axis=1), source.max(axis=1)
+    source_index = np.arange(source.shape[0])
+    if period is not None:
+        shifts = [-period, 0., period]
+        source_lower = np.concatenate([source_lower + shift for shift in shifts])
+        source_upper = np.concatenate([source_upper + shift for shift in shifts])
+        source_index = np.tile(source_index, len(shifts))
+    order = np.argsort(source_lower, kind='mergesort')
+    source_lower, source_upper, source_index = source_lower[order], source_upper[order], source_index[order]
+
+    # The running maximum of upper bounds is sorted. Candidate intervals may not overlap and are removed below.
+    start = np.searchsorted(np.maximum.accumulate(source_upper), target_lower, side='right')
+    stop = np.searchsorted(source_lower, target_upper, side='left')
+    count = np.maximum(stop - start, 0)
+    target_position = np.repeat(np.arange(target.shape[0]), count)
+    source_position = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count) + np.repeat(start, count)
+
+    overlap = np.minimum(target_upper[target_position], source_upper[source_position]) - \
+              np.maximum(target_lower[target_position], source_lower[source_position])
+    select = overlap > 0
+    return target_position[select], source_index[source_position[select]], overlap[select]
+
+
+def _get_inverse_bilinear_(quad_x, quad_y, x, y):
+    # Solve for the fractional position of each point inside its quadrilateral with Newton's method. Degenerate
+    # quadrilaterals return non-finite positions.
+    s = np.empty(x.shape)
+    s.fill(0.5)
+    t = s.copy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for _ in range(NEWTON_ITERATIONS):
+            f_x = (1 - s) * (1 - t) * quad_x[:, 0] + s * (1 - t) * quad_x[:, 1] + s * t * quad_x[:, 2] + \
+                  (1 - s) * t * quad_x[:, 3] - x
+            f_y = (1 - s) * (1 - t) * quad_y[:, 0] + s * (1 - t) * quad_y[:, 1] + s * t * quad_y[:, 2] + \
+                  (1 - s) * t * quad_y[:, 3] - y
+            ds_x = (1 - t) * (quad_x[:, 1] - quad_x[:, 0]) + t * (quad_x[:, 2] - quad_x[:, 3])
+            ds_y = (1 - t) * (quad_y[:, 1] - quad_y[:, 0]) + t * (quad_y[:, 2] - quad_y[:, 3])
+            dt_x = (1 - s) * (quad_x[:, 3] - quad_x[:, 0]) + s * (quad_x[:, 2] - quad_x[:, 1])
+            dt_y = (1 - s) * (quad_y[:, 3] - quad_y[:, 0]) + s * (quad_y[:, 2] - quad_y[:, 1])
+            determinant = ds_x * dt_y - ds_y * dt_x
+            s = s - (f_x * dt_y - f_y * dt_x) / determinant
+            t = t - (ds_x * f_y - ds_y * f_x) / determinant
+    return np.clip(s, 0., 1.), np.clip(t, 0., 1.)
+
+
+def _get_sin_latitude_(latitude):
+    return np.sin(np.deg2rad(np.clip(latitude, -90., 90.)))
+
+
+def _get_unwrapped_corners_(x):
+    # Move corner longitudes to within half a revolution of the first corner so cells crossing the periodic boundary
+    # are not stretched across the plane.
+    return x + 360. * np.round((x[..., 0:1] - x) / 360.)
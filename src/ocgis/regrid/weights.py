@@ -0,0 +1,282 @@
+"""
+Sparse regrid weight matrices. Weights are generated once for a source and destination grid pair (see
+:func:`ocgis.regrid.base.get_regrid_weights`) and applied to any number of time slices and variables on the source
+grid. Applying weights does not require ESMF. SciPy's sparse matrices are used to apply the weights if available.
+
+Weights may be persisted as ESMF/SCRIP weight files (see :meth:`~ocgis.regrid.weights.RegridWeights.write`). Weight
+files may also be cached by grid fingerprint in :attr:`ocgis.env.DIR_REGRID_WEIGHT_CACHE`.
+"""
+import hashlib
+
+import netCDF4 as nc
+import numpy as np
+
+from ocgis import env
+from ocgis.base import AbstractOcgisObject
+from ocgis.spatial.grid import Grid
+from ocgis.spatial.index import get_grid_fingerprint
+from ocgis.util.disk_cache import DiskCache
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+# Maximum number of weighted source values held in memory when applying weights.
+BLOCK_SIZE = 2 ** 24
+
+
+class RegridWeights(AbstractOcgisObject):
+    """
+    A sparse regrid weight matrix. Destination values are the weighted sum of source values:
+    ``dst[row] += factor * src[col]``. Destination elements without weights are unmapped.
+
+    :param row: Flat (C-order) destination grid index of each weight.
+    :type row: :class:`numpy.ndarray`
+    :param col: Flat (C-order) source grid index of each weight.
+    :type col: :class:`numpy.ndarray`
+    :param factor: The weight values.
+    :type factor: :class:`numpy.ndarray`
+    :param tuple src_shape: The source grid shape.
+    :param tuple dst_shape: The destination grid shape.
+    :param regrid_method: The regrid method used to generate the weights.
+    :raises: ValueError
+    """
+
+    def __init__(self, row, col, factor, src_shape, dst_shape, regrid_method=None):
+        row, col, factor = [np.asarray(a).reshape(-1) for a in (row, col, factor)]
+        if not row.shape == col.shape == factor.shape:
+            raise ValueError('Weight row, column, and factor arrays must have the same length.')
+
+        self.src_shape = tuple(src_shape)
+        self.dst_shape = tuple(dst_shape)
+        self.regrid_method = regrid_method
+
+        # Weights are sorted by destination index so the weights for a destination element are contiguous.
+        order = np.lexsort((col, row))
+        self.row = row[order].astype(np.int64)
+        self.col = col[order].astype(np.int64)
+        self.factor = factor[order].astype(np.float64)
+
+        if self.row.shape[0] > 0:
+            if self.row[-1] >= np.prod(self.dst_shape) or self.col.max() >= np.prod(self.src_shape) or \
+                    min(self.row[0], self.col.min()) < 0:
+                raise ValueError('Weight indices are outside the source or destination grid.')
+
+        # Destination elements with weights and the index of their first weight.
+        self._rows, self._offsets = np.unique(self.row, return_index=True)
+        self._matrix = None
+
+    @property
+    def mapped(self):
+        """
+        :returns: A boolean array with the destination grid shape. ``True`` elements have weights.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        ret = np.zeros(int(np.prod(self.dst_shape)), dtype=bool)
+        ret[self._rows] = True
+        return ret.reshape(self.dst_shape)
+
+    @property
+    def nnz(self):
+        """
+        :returns: The number of weights.
+        :rtype: int
+        """
+
+        return self.factor.shape[0]
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Read weights from an ESMF/SCRIP weight file. Grid indices in the file are one-based with the x-dimension varying
+        fastest. Grid shapes are read from the ``src_grid_dims`` and ``dst_grid_dims`` variables.
+
+        :param str path: Path to the weight file.
+        :rtype: :class:`~ocgis.regrid.weights.RegridWeights`
+        """
+
+        with nc.Dataset(path) as ds:
+            row = ds.variables['row'][:]
+            col = ds.variables['col'][:]
+            factor = ds.variables['S'][:]
+            src_shape = ds.variables['src_grid_dims'][:][::-1]
+            dst_shape = ds.variables['dst_grid_dims'][:][::-1]
+            regrid_method = getattr(ds, 'regrid_method', None)
+        row, col, factor = [np.ma.getdata(a) for a in (row, col, factor)]
+        src_shape, dst_shape = [tuple(int(e) for e in np.ma.getdata(s)) for s in (src_shape, dst_shape)]
+        return cls(row - 1, col - 1, factor, src_shape, dst_shape, regrid_method=regrid_method)
+
+    def write(self, path):
+        """
+        Write the weights to an ESMF/SCRIP weight file. See :meth:`~ocgis.regrid.weights.RegridWeights.from_file`. The
+        regrid method is stored as its string representation.
+
+        :param str path: Path to the output weight file.
+        """
+
+        with nc.Dataset(path, 'w') as ds:
+            ds.createDimension('n_a', int(np.prod(self.src_shape)))
+            ds.createDimension('n_b', int(np.prod(self.dst_shape)))
+            ds.createDimension('n_s', self.nnz)
+            ds.createDimension('src_grid_rank', len(self.src_shape))
+            ds.createDimension('dst_grid_rank', len(self.dst_shape))
+            ds.title = 'ESMF Regrid Weights'
+            if self.regrid_method is not None:
+                ds.regrid_method = str(self.regrid_method)
+
+            ds.createVariable('src_grid_dims', np.int32, ('src_grid_rank',))[:] = self.src_shape[::-1]
+            ds.createVariable('dst_grid_dims', np.int32, ('dst_grid_rank',))[:] = self.dst_shape[::-1]
+            if self.nnz > 0:
+                ds.createVariable('row', np.int32, ('n_s',))[:] = self.row + 1
+                ds.createVariable('col', np.int32, ('n_s',))[:] = self.col + 1
+                ds.createVariable('S', np.float64, ('n_s',))[:] = self.factor
+            else:
+                for name, dtype in [('row', np.int32), ('col', np.int32), ('S', np.float64)]:
+                    ds.createVariable(name, dtype, ('n_s',))
+
+    def apply(self, values, fill_value=None, block_size=BLOCK_SIZE):
+        """
+        Apply the weights to source values.
+
+        :param values: Source values with the source grid as the last two dimensions. Any leading dimensions (i.e.
+         time) are regridded independently. Masked source elements should be excluded when the weights are generated as
+         only the underlying data is used.
+        :type values: :class:`numpy.ndarray` | :class:`numpy.ma.MaskedArray`
+        :param fill_value: The data value for unmapped destination elements. Defaults to zero.
+        :param int block_size: The maximum number of weighted source values held at once. If ``None``, all values are
+         weighted at once.
+        :returns: The regridded values with the destination grid as the last two dimensions. Unmapped elements are
+         masked.
+        :rtype: :class:`numpy.ma.MaskedArray`
+        :raises: ValueError
+        """
+
+        values = np.ma.getdata(values)
+        if tuple(values.shape[-2:]) != self.src_shape:
+            raise ValueError('The last two value dimensions must match the source grid shape.')
+
+        leading = values.shape[:-2]
+        src = values.reshape(-1, int(np.prod(self.src_shape)))
+        dtype = np.result_type(src.dtype, self.factor.dtype)
+        fill = np.zeros(1, dtype=dtype)[0] if fill_value is None else fill_value
+        out = np.empty((src.shape[0], int(np.prod(self.dst_shape))), dtype=dtype)
+        out.fill(fill)
+
+        if self.nnz > 0:
+            if block_size is None:
+                step = max(1, src.shape[0])
+            else:
+                step = max(1, block_size // self.nnz)
+            for start in range(0, src.shape[0], step):
+                block = slice(start, start + step)
+                if sparse is None:
+                    weighted = src[block][:, self.col] * self.factor
+                    out[block, self._rows] = np.add.reduceat(weighted, self._offsets, axis=1)
+                else:
+                    out[block, self._rows] = self.get_sparse_matrix().dot(src[block].T).T
+
+        out = out.reshape(leading + self.dst_shape)
+        mask = np.empty(out.shape, dtype=bool)
+        mask[...] = np.invert(self.mapped)
+        return np.ma.array(out, mask=mask)
+
+    def get_sparse_matrix(self):
+        """
+        :returns: A compressed sparse row matrix with a row for each mapped destination element (in flat order) and a
+         column for each source element. Requires SciPy.
+        :rtype: :class:`scipy.sparse.csr_matrix`
+        """
+
+        if self._matrix is None:
+            indptr = np.append(self._offsets, self.nnz)
+            shape = (self._rows.shape[0], int(np.prod(self.src_shape)))
+            self._matrix = sparse.csr_matrix((self.factor, self.col, indptr), shape=shape)
+        return self._matrix
+
+
+class RegridWeightCache(DiskCache):
+    """
+    Persistent on-disk cache for regrid weights stored as ESMF/SCRIP weight files. Weights are keyed by a fingerprint of
+    everything used to generate them (see :func:`~ocgis.regrid.weights.get_weight_fingerprint`). See
+    :class:`~ocgis.util.disk_cache.DiskCache`.
+
+    :param str directory: The cache directory. It is created if it does not exist.
+    :param int max_size: The maximum number of weight files to keep in the cache.
+    """
+
+    def __init__(self, directory, max_size=32):
+        super(RegridWeightCache, self).__init__(directory, ['.nc'], max_size=max_size)
+
+    def get_weights(self, fingerprint, create):
+        """
+        Get regrid weights loading them from the cache if they are available. Otherwise, create and persist the weights.
+
+        :param str fingerprint: The weight fingerprint.
+        :param create: A callable with no arguments returning the weights.
+        :type create: function
+        :rtype: :class:`~ocgis.regrid.weights.RegridWeights`
+        """
+
+        def _create_(tmp_path):
+            weights = create()
+            weights.write(tmp_path + '.nc')
+            return weights
+
+        return self.get(fingerprint, _create_, lambda path: RegridWeights.from_file(path + '.nc'))
+
+
+def get_cached_weights(create, *parts):
+    """
+    Get regrid weights from the cache in :attr:`ocgis.env.DIR_REGRID_WEIGHT_CACHE`. If the cache directory is not set,
+    the weights are created without caching.
+
+    :param create: A callable with no arguments returning the weights.
+    :type create: function
+    :param parts: The weight key elements. See :func:`~ocgis.regrid.weights.get_weight_fingerprint`. These must
+     identify everything used to generate the weights.
+    :rtype: :class:`~ocgis.regrid.weights.RegridWeights`
+    """
+
+    if env.DIR_REGRID_WEIGHT_CACHE is None:
+        ret = create()
+    else:
+        cache = RegridWeightCache(env.DIR_REGRID_WEIGHT_CACHE, max_size=env.REGRID_WEIGHT_CACHE_SIZE)
+        ret = cache.get_weights(get_weight_fingerprint(*parts), create)
+    return ret
+
+
+def get_weight_fingerprint(*parts):
+    """
+    :param parts: The weight key elements. Grids are hashed by their fingerprint (see
+     :func:`~ocgis.spatial.index.get_grid_fingerprint`), bounds, and mask. A missing grid mask is hashed as an
+     all-false mask. Arrays are hashed by value, data type, and
+     shape. Other elements are hashed by their string representation.
+    :returns: A hash of the key elements.
+    :rtype: str
+    """
+
+    sha = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, Grid):
+            sha.update(get_grid_fingerprint(part).encode())
+            # Generating weights may create an all-false grid mask. Hash a missing mask the same way.
+            mask = part.get_mask()
+            if mask is None:
+                mask = np.zeros(part.shape, dtype=bool)
+            arrays = [mask]
+            if part.has_bounds:
+                arrays += [part.x.bounds.get_value(), part.y.bounds.get_value()]
+        else:
+            arrays = [part]
+        for array in arrays:
+            if isinstance(array, np.ndarray):
+                array = np.ascontiguousarray(np.ma.getdata(array))
+                sha.update('{}|{}|'.format(array.dtype.str, array.shape).encode())
+                sha.update(array.tobytes())
+            else:
+                sha.update(repr(array).encode())
+            sha.update(b'|')
+    return sha.hexdigest()
+
@@ -2,15 +2,23 @@ import itertools
 
 import numpy as np
 from pyproj import Proj, transform
-from shapely.geometry import Polygon, Point, box
+from shapely.geometry import Polygon, Point, box, MultiPolygon
 from shapely.geometry.base import BaseGeometry, BaseMultipartGeometry
 
+try:
+    # Vectorized geometry constructors operating on coordinate arrays are available in shapely>=2.0.
+    from shapely import box as create_boxes, points as create_points, polygons as create_polygons
+except ImportError:
+    create_boxes, create_points, create_polygons = None, None, None
+
 from ocgis import Variable, vm
-from ocgis import constants
+from ocgis import constants, env
 from ocgis.base import get_dimension_names, raise_if_empty
 from ocgis.constants import WrappedState, KeywordArgument, VariableName, CFName
 from ocgis.environment import ogr
 from ocgis.exc import GridDeficientError, EmptySubsetError, AllElementsMaskedError
+from ocgis.spatial.index import SpatialIndexCache
+from ocgis.spatial.raster import get_rasterized_intersects
 from ocgis.util.helpers import get_formatted_slice
 from ocgis.variable.base import get_dslice, get_dimension_lengths
 from ocgis.variable.crs import CFRotatedPole, Cartesian
@@ -36,6 +44,29 @@ class GridGeometryProcessor(GeometryProcessor):
         geometry_iterable = self.get_geometry_iterable()
         super(GridGeometryProcessor, self).__init__(geometry_iterable, subset_geometry, keep_touches=keep_touches)
 
+    def get_geometry_array(self):
+        """
+        Create geometries for the grid using vectorized shapely constructors. Geometries are not created for elements
+        masked by the hint mask.
+
+        :returns: An object array with the grid's shape. Masked elements are ``None``.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        if self.use_bounds:
+            abstraction = self.grid.abstraction
+        else:
+            abstraction = 'point'
+
+        fill = np.empty(self.grid.shape, dtype=object)
+        if abstraction == 'point':
+            get_point_geometry_array(self.grid, fill, hint_mask=self.hint_mask)
+        elif abstraction == 'polygon':
+            get_polygon_geometry_array(self.grid, fill, hint_mask=self.hint_mask)
+        else:
+            raise NotImplementedError(abstraction)
+        return fill
+
     def get_geometry_iterable(self):
         grid = self.grid
         hint_mask = self.hint_mask
@@ -45,7 +76,12 @@ class GridGeometryProcessor(GeometryProcessor):
         else:
             abstraction = 'point'
 
-        if abstraction == 'point':
+        if create_polygons is not None:
+            # Create all geometries in bulk and iterate the result.
+            fill = self.get_geometry_array()
+            for idx in itertools.product(*[list(range(ii)) for ii in grid.shape]):
+                yield idx, fill[idx]
+        elif abstraction == 'point':
             x_data = grid.x.get_value()
             y_data = grid.y.get_value()
             for idx_row, idx_col in itertools.product(*[list(range(ii)) for ii in grid.shape]):
@@ -749,25 +785,31 @@ class Grid(AbstractSpatialContainer):
         buffer_value = None
 
         if original_mask is None:
-            if not optimized_bbox_subset:
-                buffer_value = self.resolution * 1.25
-
-            if isinstance(subset_geom, BaseMultipartGeometry):
-                geom_itr = subset_geom
+            if not optimized_bbox_subset and not self.is_vectorized and is_spatial_index_cache_enabled():
+                # Select candidate elements using the cell bounds stored in the cached spatial index.
+                hint_mask = np.ones(self.shape, dtype=bool)
+                candidates = list(self.get_spatial_index().iter_rtree_intersection(subset_geom))
+                hint_mask.reshape(-1)[candidates] = False
             else:
-                geom_itr = [subset_geom]
-
-            for ctr, geom in enumerate(geom_itr):
                 if not optimized_bbox_subset:
-                    geom = geom.buffer(buffer_value).envelope
-                single_hint_mask = get_hint_mask_from_geometry_bounds(self, geom.bounds, invert=False)
+                    buffer_value = self.resolution * 1.25
 
-                if ctr == 0:
-                    hint_mask = single_hint_mask
+                if isinstance(subset_geom, BaseMultipartGeometry):
+                    geom_itr = subset_geom
                 else:
-                    hint_mask = np.logical_or(hint_mask, single_hint_mask)
+                    geom_itr = [subset_geom]
+
+                for ctr, geom in enumerate(geom_itr):
+                    if not optimized_bbox_subset:
+                        geom = geom.buffer(buffer_value).envelope
+                    single_hint_mask = get_hint_mask_from_geometry_bounds(self, geom.bounds, invert=False)
 
-            hint_mask = np.invert(hint_mask)
+                    if ctr == 0:
+                        hint_mask = single_hint_mask
+                    else:
+                        hint_mask = np.logical_or(hint_mask, single_hint_mask)
+
+                hint_mask = np.invert(hint_mask)
 
             original_mask = hint_mask
             if not optimized_bbox_subset:
@@ -788,16 +830,21 @@ class Grid(AbstractSpatialContainer):
             if not original_mask.all():
                 if perform_intersection:
                     geometry_fill = np.zeros(fill_mask.shape, dtype=object)
-                if vm.size > 1:
-                    new_intersects_target = subset_geom.intersection(box(*self.extent).buffer(1e-6))
+                if is_rasterizable(self, subset_geom, use_bounds):
+                    # Rectilinear grids are intersected using bounds arithmetic avoiding cell geometry creation.
+                    fill_mask = get_rasterized_fill_mask(self, subset_geom, original_mask, keep_touches, use_bounds,
+                                                         geometry_fill=geometry_fill)
                 else:
-                    new_intersects_target = subset_geom
-                gp = GridGeometryProcessor(self, new_intersects_target, original_mask, keep_touches=keep_touches,
-                                           use_bounds=use_bounds)
-                for idx, intersects_logical, current_geometry in gp.iter_intersects():
-                    fill_mask[idx] = not intersects_logical
-                    if perform_intersection and intersects_logical:
-                        geometry_fill[idx] = current_geometry.intersection(subset_geom)
+                    if vm.size > 1:
+                        new_intersects_target = subset_geom.intersection(box(*self.extent).buffer(1e-6))
+                    else:
+                        new_intersects_target = subset_geom
+                    gp = GridGeometryProcessor(self, new_intersects_target, original_mask, keep_touches=keep_touches,
+                                               use_bounds=use_bounds)
+                    for idx, intersects_logical, current_geometry in gp.iter_intersects():
+                        fill_mask[idx] = not intersects_logical
+                        if perform_intersection and intersects_logical:
+                            geometry_fill[idx] = current_geometry.intersection(subset_geom)
 
             if perform_intersection:
                 if geometry_fill is None:
@@ -1017,12 +1064,19 @@ class Grid(AbstractSpatialContainer):
 
     def get_spatial_index(self, *args, **kwargs):
         """
-        Get the abstraction geometry's spatial index.
-        
+        Get the abstraction geometry's spatial index. If ``env.DIR_SPATIAL_INDEX_CACHE`` is set and no arguments are
+        provided, the index is built from the grid's cell bounds and persisted to the cache directory. Identifiers for
+        the cached index are the flattened grid indices.
+
         See :meth:`~ocgis.GeometryVariable.get_spatial_index`.
         """
 
-        return self.abstraction_geometry.get_spatial_index(*args, **kwargs)
+        if len(args) == 0 and len(kwargs) == 0 and is_spatial_index_cache_enabled():
+            cache = SpatialIndexCache(env.DIR_SPATIAL_INDEX_CACHE, max_size=env.SPATIAL_INDEX_CACHE_SIZE)
+            ret = cache.get_index(self, get_cell_bounds)
+        else:
+            ret = self.abstraction_geometry.get_spatial_index(*args, **kwargs)
+        return ret
 
     def iter_records(self, *args, **kwargs):
         return self.abstraction_geometry.iter_records(self, *args, **kwargs)
@@ -1140,31 +1194,129 @@ def update_crs_with_geometry_collection(src_sr, to_sr, value_row, value_col):
         value_row[ii] = geom.GetY()
 
 
-def get_polygon_geometry_array(grid, fill):
+def is_rasterizable(grid, subset_geom, use_bounds):
+    """
+    :param grid: The target grid.
+    :type grid: :class:`~ocgis.Grid`
+    :param subset_geom: The subset geometry.
+    :type subset_geom: :class:`shapely.geometry.base.BaseGeometry`
+    :param bool use_bounds: If ``True``, the spatial operation uses the grid's bounds.
+    :returns: ``True`` if the spatial operation may be performed with
+     :func:`~ocgis.spatial.grid.get_rasterized_fill_mask`.
+    :rtype: bool
+    """
+
+    if not env.USE_RASTER_INTERSECTS:
+        ret = False
+    elif not grid.is_vectorized or not isinstance(subset_geom, (Polygon, MultiPolygon)):
+        ret = False
+    elif use_bounds and not grid.has_bounds:
+        ret = False
+    else:
+        ret = True
+    return ret
+
+
+def get_rasterized_fill_mask(grid, subset_geom, hint_mask, keep_touches, use_bounds, geometry_fill=None):
+    """
+    Spatial operation for vectorized grids without creating cell geometries. See
+    :func:`~ocgis.spatial.raster.get_rasterized_intersects`.
+
+    :param grid: The target vectorized grid.
+    :type grid: :class:`~ocgis.Grid`
+    :param subset_geom: The polygonal subset geometry.
+    :type subset_geom: :class:`shapely.geometry.Polygon` | :class:`shapely.geometry.MultiPolygon`
+    :param hint_mask: Elements that are ``True`` are excluded from the spatial operation.
+    :type hint_mask: :class:`numpy.ndarray`
+    :param bool keep_touches: If ``True``, keep elements that only touch the subset geometry.
+    :param bool use_bounds: If ``True``, use the grid's bounds. Otherwise, use the grid's center coordinates.
+    :param geometry_fill: If provided, fill the object array with the intersection geometries. Geometries are only
+     created for intersecting elements. Only elements crossed by the subset geometry's boundary are intersected using
+     Shapely.
+    :type geometry_fill: :class:`numpy.ndarray`
+    :returns: The fill mask. Elements that are ``True`` do not intersect the subset geometry.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    if use_bounds:
+        x_bounds = grid.x.bounds.get_value()
+        y_bounds = grid.y.bounds.get_value()
+    else:
+        x_value = grid.x.get_value().reshape(-1, 1)
+        y_value = grid.y.get_value().reshape(-1, 1)
+        x_bounds = np.hstack((x_value, x_value))
+        y_bounds = np.hstack((y_value, y_value))
+
+    intersects, boundary = get_rasterized_intersects(subset_geom, x_bounds, y_bounds, keep_touches=keep_touches,
+                                                     return_boundary=True)
+    fill_mask = np.logical_or(hint_mask, np.invert(intersects))
+
+    if geometry_fill is not None:
+        select = np.invert(fill_mask)
+        if use_bounds:
+            get_polygon_geometry_array(grid, geometry_fill, hint_mask=fill_mask)
+        else:
+            get_point_geometry_array(grid, geometry_fill, hint_mask=fill_mask)
+        for idx in zip(*np.nonzero(np.logical_and(select, boundary))):
+            geometry_fill[idx] = geometry_fill[idx].intersection(subset_geom)
+
+    return fill_mask
+
+
+def get_polygon_geometry_array(grid, fill, hint_mask=None, vectorized=True):
+    """
+    Create polygon geometries for all grid elements regardless if the data is masked.
+
+    :param grid: The source grid which must have bounds.
+    :type grid: :class:`~ocgis.Grid`
+    :param fill: Object array with the grid's shape to fill with geometries.
+    :type fill: :class:`numpy.ndarray`
+    :param hint_mask: If provided, do not create geometries where the mask is ``True``.
+    :type hint_mask: :class:`numpy.ndarray`
+    :param bool vectorized: If ``True`` and shapely>=2.0 is available, use the vectorized geometry constructors.
+    :rtype: :class:`numpy.ndarray`
+    :raises: GridDeficientError
+    """
+
     is_vectorized = grid.is_vectorized
 
     if grid.has_bounds:
         # We want geometries for everything even if masked.
         x_bounds = grid.x.bounds.get_value()
         y_bounds = grid.y.bounds.get_value()
-        range_row = list(range(grid.shape[0]))
-        range_col = list(range(grid.shape[1]))
-        if is_vectorized:
-            for row, col in itertools.product(range_row, range_col):
-                min_x, max_x = np.min(x_bounds[col, :]), np.max(x_bounds[col, :])
-                min_y, max_y = np.min(y_bounds[row, :]), np.max(y_bounds[row, :])
-                polygon = box(min_x, min_y, max_x, max_y)
-                fill[row, col] = polygon
+        if vectorized and create_polygons is not None:
+            select = _get_geometry_array_select_(grid, hint_mask)
+            if is_vectorized:
+                min_x, max_x = np.min(x_bounds, axis=1).reshape(1, -1), np.max(x_bounds, axis=1).reshape(1, -1)
+                min_y, max_y = np.min(y_bounds, axis=1).reshape(-1, 1), np.max(y_bounds, axis=1).reshape(-1, 1)
+                min_x, min_y, max_x, max_y = np.broadcast_arrays(min_x, min_y, max_x, max_y)
+                fill[select] = create_boxes(min_x[select], min_y[select], max_x[select], max_y[select])
+            else:
+                coords = np.stack((x_bounds, y_bounds), axis=-1)
+                fill[select] = create_polygons(coords[select])
         else:
-            # tdk: we should be able to avoid the creation of this corners array
-            corners = np.vstack((y_bounds, x_bounds))
-            corners = corners.reshape([2] + list(x_bounds.shape))
-            for row, col in itertools.product(range_row, range_col):
-                current_corner = corners[:, row, col]
-                coords = np.hstack((current_corner[1, :].reshape(-1, 1),
-                                    current_corner[0, :].reshape(-1, 1)))
-                polygon = Polygon(coords)
-                fill[row, col] = polygon
+            range_row = list(range(grid.shape[0]))
+            range_col = list(range(grid.shape[1]))
+            if is_vectorized:
+                for row, col in itertools.product(range_row, range_col):
+                    if hint_mask is not None and hint_mask[row, col]:
+                        continue
+                    min_x, max_x = np.min(x_bounds[col, :]), np.max(x_bounds[col, :])
+                    min_y, max_y = np.min(y_bounds[row, :]), np.max(y_bounds[row, :])
+                    polygon = box(min_x, min_y, max_x, max_y)
+                    fill[row, col] = polygon
+            else:
+                # tdk: we should be able to avoid the creation of this corners array
+                corners = np.vstack((y_bounds, x_bounds))
+                corners = corners.reshape([2] + list(x_bounds.shape))
+                for row, col in itertools.product(range_row, range_col):
+                    if hint_mask is not None and hint_mask[row, col]:
+                        continue
+                    current_corner = corners[:, row, col]
+                    coords = np.hstack((current_corner[1, :].reshape(-1, 1),
+                                        current_corner[0, :].reshape(-1, 1)))
+                    polygon = Polygon(coords)
+                    fill[row, col] = polygon
     else:
         msg = 'A grid must have bounds/corners to construct polygons. Consider using "set_extrapolated_bounds".'
         raise GridDeficientError(msg)
@@ -1172,25 +1324,44 @@ def get_polygon_geometry_array(grid, fill):
     return fill
 
 
-def get_point_geometry_array(grid, fill):
-    """Create geometries for all the underlying coordinates regardless if the data is masked."""
+def get_point_geometry_array(grid, fill, hint_mask=None, vectorized=True):
+    """
+    Create geometries for all the underlying coordinates regardless if the data is masked. See
+    :func:`~ocgis.spatial.grid.get_polygon_geometry_array` for parameter descriptions.
+    """
 
     x_data = grid.x.get_value()
     y_data = grid.y.get_value()
     is_vectorized = grid.is_vectorized
 
-    for idx_row, idx_col in itertools.product(*[list(range(ii)) for ii in grid.shape]):
+    if vectorized and create_points is not None:
+        select = _get_geometry_array_select_(grid, hint_mask)
         if is_vectorized:
-            y = y_data[idx_row]
-            x = x_data[idx_col]
-        else:
-            y = y_data[idx_row, idx_col]
-            x = x_data[idx_row, idx_col]
-        pt = Point(x, y)
-        fill[idx_row, idx_col] = pt
+            x_data, y_data = np.broadcast_arrays(x_data.reshape(1, -1), y_data.reshape(-1, 1))
+        fill[select] = create_points(x_data[select], y_data[select])
+    else:
+        for idx_row, idx_col in itertools.product(*[list(range(ii)) for ii in grid.shape]):
+            if hint_mask is not None and hint_mask[idx_row, idx_col]:
+                continue
+            if is_vectorized:
+                y = y_data[idx_row]
+                x = x_data[idx_col]
+            else:
+                y = y_data[idx_row, idx_col]
+                x = x_data[idx_row, idx_col]
+            pt = Point(x, y)
+            fill[idx_row, idx_col] = pt
     return fill
 
 
+def _get_geometry_array_select_(grid, hint_mask):
+    if hint_mask is None:
+        ret = np.ones(grid.shape, dtype=bool)
+    else:
+        ret = np.invert(hint_mask)
+    return ret
+
+
 def get_geometry_variable(grid, value=None, mask=None, use_bounds=True):
     is_empty = grid.is_empty
     if is_empty:
@@ -1201,11 +1372,15 @@ def get_geometry_variable(grid, value=None, mask=None, use_bounds=True):
             mask = grid.get_mask()
         if value is None:
             gp = GridGeometryProcessor(grid, None, mask, use_bounds=use_bounds)
-            itr = gp.get_geometry_iterable()
-            value = np.zeros(grid.shape, dtype=object)
-            for idx, geometry in itr:
-                if geometry is not None:
-                    value[idx] = geometry
+            if create_polygons is not None:
+                value = gp.get_geometry_array()
+                value[np.equal(value, None)] = 0
+            else:
+                itr = gp.get_geometry_iterable()
+                value = np.zeros(grid.shape, dtype=object)
+                for idx, geometry in itr:
+                    if geometry is not None:
+                        value[idx] = geometry
     if grid.abstraction == 'point':
         name = grid._point_name
     else:
@@ -1281,6 +1456,41 @@ def get_coordinate_boolean_array(grid_target, keep_touches, max_target, min_targ
     return res_target
 
 
+def get_cell_bounds(grid):
+    """
+    :param grid: The target grid.
+    :type grid: :class:`~ocgis.Grid`
+    :returns: The bounding box of each grid element with shape ``(grid.size, 4)``. Each row is
+     ``(minx, miny, maxx, maxy)``. Rows are ordered by the flattened grid index. Bounds are used if the grid's
+     abstraction is polygon. Otherwise, the bounding boxes are the center coordinates.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    if grid.abstraction == 'polygon' and grid.has_bounds:
+        x_bounds = grid.x.bounds.get_value()
+        y_bounds = grid.y.bounds.get_value()
+        min_x, max_x = np.min(x_bounds, axis=-1), np.max(x_bounds, axis=-1)
+        min_y, max_y = np.min(y_bounds, axis=-1), np.max(y_bounds, axis=-1)
+    else:
+        min_x = max_x = grid.x.get_value()
+        min_y = max_y = grid.y.get_value()
+
+    if grid.is_vectorized:
+        min_x, max_x = min_x.reshape(1, -1), max_x.reshape(1, -1)
+        min_y, max_y = min_y.reshape(-1, 1), max_y.reshape(-1, 1)
+    arrs = np.broadcast_arrays(min_x, min_y, max_x, max_y)
+    return np.column_stack([arr.reshape(-1) for arr in arrs])
+
+
+def is_spatial_index_cache_enabled():
+    """
+    :returns: ``True`` if a spatial index cache directory is configured and ``rtree`` is available.
+    :rtype: bool
+    """
+
+    return env.DIR_SPATIAL_INDEX_CACHE is not None and bool(env.USE_SPATIAL_INDEX)
+
+
 def get_hint_mask_from_geometry_bounds(grid, bbox, invert=True):
     grid_x = grid.x.get_value()
     grid_y = grid.y.get_value()
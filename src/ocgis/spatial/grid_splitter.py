@@ -1,6 +1,8 @@
 import itertools
 import logging
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 from shapely.geometry import box
@@ -10,6 +12,7 @@ from ocgis import Variable
 from ocgis.base import AbstractOcgisObject
 from ocgis.collection.field import Field
 from ocgis.driver.request.core import RequestDataset
+from ocgis.exc import EmptySubsetError
 from ocgis.spatial.grid import Grid
 from ocgis.test.base import nc_scope
 from ocgis.util.logging_ocgis import ocgis_lh
@@ -60,16 +63,119 @@ class GridSplitter(AbstractOcgisObject):
         self.check_contains = check_contains
         self.allow_masked = allow_masked
 
+    def get_subset_slices(self):
+        """
+        Compute the destination grid slices and their associated source grid slices in one vectorized pass over the
+        grid coordinate arrays. Source subsets are selected as in
+        :meth:`~ocgis.spatial.grid_splitter.GridSplitter.iter_src_grid_subsets` without a spatial operation for each
+        split.
+
+        .. note:: The function is not collective. Grids may not be distributed if the current VM has more than one rank.
+
+        :return: A list of ``(<source grid slice>, <destination grid slice>)`` tuples in split order. Slices are
+         dictionaries with the grid dimension names as keys.
+        :rtype: list
+        :raises: ValueError, :class:`~ocgis.exc.EmptySubsetError`
+        """
+
+        for grid in [self.src_grid, self.dst_grid]:
+            if vm.size > 1 and any(dim.dist for dim in grid.dimensions):
+                raise ValueError('Grids may not be distributed when computing subset slices.')
+
+        dst_slices = list(self.iter_dst_grid_slices())
+        dst_y_name, dst_x_name = [dim.name for dim in self.dst_grid.dimensions]
+        if any(slc[dim_name].stop <= slc[dim_name].start for slc in dst_slices for dim_name in
+               [dst_y_name, dst_x_name]):
+            raise ValueError('The number of splits may not exceed the destination grid shape.')
+        y_starts = np.unique([slc[dst_y_name].start for slc in dst_slices])
+        x_starts = np.unique([slc[dst_x_name].start for slc in dst_slices])
+
+        # Destination subset extents. Splits are contiguous and ordered so the extents are reductions over the split
+        # start indices.
+        dst_x_lower, dst_x_upper = _get_coordinate_extents_(self.dst_grid.x)
+        dst_y_lower, dst_y_upper = _get_coordinate_extents_(self.dst_grid.y)
+        if self.dst_grid.is_vectorized:
+            shape = (y_starts.shape[0], x_starts.shape[0])
+            dst_extents = [np.broadcast_to(np.minimum.reduceat(dst_x_lower, x_starts)[None, :], shape),
+                           np.broadcast_to(np.minimum.reduceat(dst_y_lower, y_starts)[:, None], shape),
+                           np.broadcast_to(np.maximum.reduceat(dst_x_upper, x_starts)[None, :], shape),
+                           np.broadcast_to(np.maximum.reduceat(dst_y_upper, y_starts)[:, None], shape)]
+        else:
+            dst_extents = []
+            for ufunc, value in [(np.minimum, dst_x_lower), (np.minimum, dst_y_lower), (np.maximum, dst_x_upper),
+                                 (np.maximum, dst_y_upper)]:
+                dst_extents.append(ufunc.reduceat(ufunc.reduceat(value, y_starts, axis=0), x_starts, axis=1))
+        dst_extents = np.column_stack([e.reshape(-1) for e in dst_extents])
+
+        # Use the envelope of the buffered extent to select source elements by their representative coordinates.
+        buffer_value = self._get_buffer_value_()
+        sub_extents = dst_extents + np.array([-buffer_value, -buffer_value, buffer_value, buffer_value])
+        src_x = self.src_grid.x.get_value()
+        src_y = self.src_grid.y.get_value()
+        if self.src_grid.is_vectorized:
+            select_x = np.logical_and(src_x >= sub_extents[:, [0]], src_x <= sub_extents[:, [2]])
+            select_y = np.logical_and(src_y >= sub_extents[:, [1]], src_y <= sub_extents[:, [3]])
+        else:
+            select_x = np.zeros((len(dst_slices), self.src_grid.shape[1]), dtype=bool)
+            select_y = np.zeros((len(dst_slices), self.src_grid.shape[0]), dtype=bool)
+            for idx, (minx, miny, maxx, maxy) in enumerate(sub_extents):
+                select = np.logical_and(np.logical_and(src_x >= minx, src_x <= maxx),
+                                        np.logical_and(src_y >= miny, src_y <= maxy))
+                select_x[idx] = select.any(axis=0)
+                select_y[idx] = select.any(axis=1)
+        if not np.logical_and(select_x.any(axis=1), select_y.any(axis=1)).all():
+            raise EmptySubsetError
+        x_bounds = _get_selection_bounds_(select_x)
+        y_bounds = _get_selection_bounds_(select_y)
+
+        src_y_name, src_x_name = [dim.name for dim in self.src_grid.dimensions]
+        src_mask = self.src_grid.get_mask()
+        if self.check_contains:
+            src_x_lower, src_x_upper = _get_coordinate_extents_(self.src_grid.x)
+            src_y_lower, src_y_upper = _get_coordinate_extents_(self.src_grid.y)
+
+        ret = []
+        for idx, dst_slice in enumerate(dst_slices):
+            src_slice = {src_y_name: slice(int(y_bounds[idx][0]), int(y_bounds[idx][1])),
+                         src_x_name: slice(int(x_bounds[idx][0]), int(x_bounds[idx][1]))}
+            src_y_slice, src_x_slice = src_slice[src_y_name], src_slice[src_x_name]
+
+            if not self.allow_masked and src_mask is not None and src_mask[src_y_slice, src_x_slice].any():
+                raise ValueError('Masked values in source grid subset.')
+
+            if self.check_contains:
+                if self.src_grid.is_vectorized:
+                    src_extent = (src_x_lower[src_x_slice].min(), src_y_lower[src_y_slice].min(),
+                                  src_x_upper[src_x_slice].max(), src_y_upper[src_y_slice].max())
+                else:
+                    src_extent = [func(value[src_y_slice, src_x_slice]) for func, value in
+                                  [(np.min, src_x_lower), (np.min, src_y_lower), (np.max, src_x_upper),
+                                   (np.max, src_y_upper)]]
+                if not does_contain(box(*src_extent), box(*dst_extents[idx])):
+                    raise ValueError('Contains check failed.')
+
+            ret.append((src_slice, dst_slice))
+
+        return ret
+
     @staticmethod
-    def insert_weighted(index_path, dst_wd, dst_master_path):
+    def insert_weighted(index_path, dst_wd, dst_master_path, n_workers=None):
         """
-        Inserted weighted, destination variable data into the master destination file.
+        Inserted weighted, destination variable data into the master destination file. Each destination split file is
+        read once and its full ``(time, y, x)`` data variable slabs are written to the master file in one call per
+        variable. The master file is opened once by the calling thread which is its only writer.
 
         :param str index_path: Path to the split index netCDF file.
         :param str dst_wd: Working directory containing the destination files holding the weighted data.
         :param str dst_master_path: Path to the destination master file.
+        :param int n_workers: If greater than one, read split files on a pool of ``n_workers`` processes while the
+         master file is written.
+        :raises: ValueError
         """
 
+        if n_workers is not None and int(n_workers) <= 0:
+            raise ValueError('"n_workers" must be greater than 0')
+
         index_field = RequestDataset(index_path).get()
         gs_index_v = index_field[GridSplitterConstants.IndexFile.NAME_INDEX_VARIABLE]
         dst_filenames = gs_index_v.attrs[GridSplitterConstants.IndexFile.NAME_DESTINATION_VARIABLE]
@@ -88,17 +194,45 @@ class GridSplitter(AbstractOcgisObject):
         for data_variable in dst_master_field.data_variables:
             assert data_variable.ndim == 3
             assert not data_variable.has_allocated_value
-            for time_index in range(dst_master_field.time.shape[0]):
-                for vidx, source_path in enumerate(joined):
-                    source_path = os.path.join(dst_wd, source_path)
-                    slc = {dst_master_field.time.dimensions[0].name: time_index,
-                           dst_master_field.y.dimensions[0].name: slice(None),
-                           dst_master_field.x.dimensions[0].name: slice(None)}
-                    source_data = RequestDataset(source_path).get()[data_variable.name][slc]
-                    assert not source_data.has_allocated_value
-                    with nc_scope(dst_master_path, 'a') as ds:
-                        ds.variables[data_variable.name][time_index, y_bounds[vidx][0]:y_bounds[vidx][1],
-                        x_bounds[vidx][0]:x_bounds[vidx][1]] = source_data.get_value()
+        variable_names = [data_variable.name for data_variable in dst_master_field.data_variables]
+        dimension_names = [dst_master_field.time.dimensions[0].name, dst_master_field.y.dimensions[0].name,
+                           dst_master_field.x.dimensions[0].name]
+        source_paths = [os.path.join(dst_wd, source_path) for source_path in joined]
+
+        if n_workers is None or int(n_workers) == 1:
+            executor = None
+
+            def _iter_slabs_():
+                for source_path in source_paths:
+                    yield _read_weighted_slabs_(source_path, variable_names, dimension_names)
+        else:
+            # The netCDF library is not thread-safe so split files are read in worker processes. Limit the number of
+            # splits in flight to bound memory held by read, unwritten slabs. The first reads are submitted before the
+            # master file is opened so the workers do not inherit its open handle.
+            executor = ProcessPoolExecutor(max_workers=int(n_workers))
+            remaining = iter(source_paths)
+            pending = deque([executor.submit(_read_weighted_slabs_, source_path, variable_names, dimension_names)
+                             for source_path in itertools.islice(remaining, 2 * int(n_workers))])
+
+            def _iter_slabs_():
+                while len(pending) > 0:
+                    slabs = pending.popleft().result()
+                    for source_path in itertools.islice(remaining, 1):
+                        pending.append(executor.submit(_read_weighted_slabs_, source_path, variable_names,
+                                                       dimension_names))
+                    yield slabs
+
+        try:
+            with nc_scope(dst_master_path, 'a') as ds:
+                # Values are copied as stored in the split files.
+                ds.set_auto_maskandscale(False)
+                for vidx, slabs in enumerate(_iter_slabs_()):
+                    for name, slab in zip(variable_names, slabs):
+                        ds.variables[name][:, y_bounds[vidx][0]:y_bounds[vidx][1],
+                                           x_bounds[vidx][0]:x_bounds[vidx][1]] = slab
+        finally:
+            if executor is not None:
+                executor.shutdown()
 
     def iter_dst_grid_slices(self):
         """
@@ -155,14 +289,7 @@ class GridSplitter(AbstractOcgisObject):
         else:
             yield_slice = False
 
-        dst_grid_resolution = self.dst_grid.resolution
-        src_grid_resolution = self.src_grid.resolution
-
-        if dst_grid_resolution <= src_grid_resolution:
-            target_resolution = dst_grid_resolution
-        else:
-            target_resolution = src_grid_resolution
-        buffer_value = 2 * target_resolution
+        buffer_value = self._get_buffer_value_()
 
         for yld in self.iter_dst_grid_subsets(yield_slice=yield_slice):
             if yield_slice:
@@ -213,7 +340,7 @@ class GridSplitter(AbstractOcgisObject):
                 yld = src_grid_subset
             yield yld
 
-    def write_subsets(self, src_template, dst_template, wgt_template, index_path):
+    def write_subsets(self, src_template, dst_template, wgt_template, index_path, n_workers=None):
         """
         Write grid subsets to netCDF files using the provided filename templates. The template must contain the full
         file path with a single curly-bracer pair to insert the combination counter. ``wgt_template`` should not be a
@@ -228,8 +355,20 @@ class GridSplitter(AbstractOcgisObject):
         >>> wgt_template = 'esmf_weights_{}.nc'
 
         :param index_path: Path to the output indexing netCDF.
+        :param int n_workers: If ``None`` (the default), subset the grids and write the split files collectively.
+         Otherwise, compute all subset slices up front (see
+         :meth:`~ocgis.spatial.grid_splitter.GridSplitter.get_subset_slices`) and write the split files independently.
+         Splits are assigned to ranks round-robin and each rank writes its splits using a pool of ``n_workers`` local
+         processes. A process pool may not be used with more than one rank.
+        :raises: ValueError
         """
 
+        if n_workers is not None:
+            if int(n_workers) <= 0:
+                raise ValueError('"n_workers" must be greater than 0')
+            if vm.size > 1 and int(n_workers) > 1:
+                raise ValueError('A local process pool may not be used with more than one rank.')
+
         src_filenames = []
         dst_filenames = []
         wgt_filenames = []
@@ -237,31 +376,76 @@ class GridSplitter(AbstractOcgisObject):
 
         # nzeros = len(str(reduce(lambda x, y: x * y, self.nsplits_dst)))
 
-        for ctr, (sub_src, sub_dst, dst_slc) in enumerate(self.iter_src_grid_subsets(yield_dst=True), start=1):
-            # padded = create_zero_padded_integer(ctr, nzeros)
-
-            src_path = src_template.format(ctr)
-            dst_path = dst_template.format(ctr)
-            wgt_filename = wgt_template.format(ctr)
-
-            src_filenames.append(os.path.split(src_path)[1])
-            dst_filenames.append(os.path.split(dst_path)[1])
-            wgt_filenames.append(wgt_filename)
-            dst_slices.append(dst_slc)
-
-            for target, path in zip([sub_src, sub_dst], [src_path, dst_path]):
-                if target.is_empty:
-                    is_empty = True
-                    target = None
+        if n_workers is None:
+            for ctr, (sub_src, sub_dst, dst_slc) in enumerate(self.iter_src_grid_subsets(yield_dst=True), start=1):
+                # padded = create_zero_padded_integer(ctr, nzeros)
+
+                src_path = src_template.format(ctr)
+                dst_path = dst_template.format(ctr)
+                wgt_filename = wgt_template.format(ctr)
+
+                src_filenames.append(os.path.split(src_path)[1])
+                dst_filenames.append(os.path.split(dst_path)[1])
+                wgt_filenames.append(wgt_filename)
+                dst_slices.append(dst_slc)
+
+                for target, path in zip([sub_src, sub_dst], [src_path, dst_path]):
+                    if target.is_empty:
+                        is_empty = True
+                        target = None
+                    else:
+                        is_empty = False
+                    field = Field(grid=target, is_empty=is_empty)
+                    ocgis_lh(msg='writing: {}'.format(path), level=logging.DEBUG)
+                    with vm.scoped_by_emptyable('field.write', field):
+                        if not vm.is_null:
+                            field.write(path)
+                    ocgis_lh(msg='finished writing: {}'.format(path), level=logging.DEBUG)
+        else:
+            to_write = []
+            for ctr, (src_slc, dst_slc) in enumerate(self.get_subset_slices(), start=1):
+                src_path = src_template.format(ctr)
+                dst_path = dst_template.format(ctr)
+
+                src_filenames.append(os.path.split(src_path)[1])
+                dst_filenames.append(os.path.split(dst_path)[1])
+                wgt_filenames.append(wgt_template.format(ctr))
+                dst_slices.append(dst_slc)
+
+                if (ctr - 1) % vm.size == vm.rank:
+                    to_write += [(self.src_grid, src_slc, src_path), (self.dst_grid, dst_slc, dst_path)]
+
+            # Ranks write their splits without communicating. Grids are sliced lazily to hold one split at a time.
+            with vm.scoped('independent split write', [vm.rank]):
+                if int(n_workers) == 1:
+                    for grid, slc, path in to_write:
+                        _write_split_(grid[slc], path)
                 else:
-                    is_empty = False
-                field = Field(grid=target, is_empty=is_empty)
-                ocgis_lh(msg='writing: {}'.format(path), level=logging.DEBUG)
-                with vm.scoped_by_emptyable('field.write', field):
-                    if not vm.is_null:
-                        field.write(path)
-                ocgis_lh(msg='finished writing: {}'.format(path), level=logging.DEBUG)
+                    # Limit the number of splits in flight to bound memory held by sliced grids sent to the workers.
+                    max_pending = 2 * int(n_workers)
+                    pending = deque()
+                    with ProcessPoolExecutor(max_workers=int(n_workers)) as executor:
+                        for grid, slc, path in to_write:
+                            pending.append(executor.submit(_write_split_, grid[slc], path))
+                            if len(pending) >= max_pending:
+                                pending.popleft().result()
+                        while len(pending) > 0:
+                            pending.popleft().result()
+
+        self._write_index_(index_path, src_filenames, dst_filenames, wgt_filenames, dst_slices)
+
+    def _get_buffer_value_(self):
+        # Buffer destination subset extents by twice the finer grid resolution to ensure full source overlap.
+        dst_grid_resolution = self.dst_grid.resolution
+        src_grid_resolution = self.src_grid.resolution
 
+        if dst_grid_resolution <= src_grid_resolution:
+            target_resolution = dst_grid_resolution
+        else:
+            target_resolution = src_grid_resolution
+        return 2 * target_resolution
+
+    def _write_index_(self, index_path, src_filenames, dst_filenames, wgt_filenames, dst_slices):
         with vm.scoped('index write', [0]):
             if not vm.is_null:
                 dim = Dimension('nfiles', len(src_filenames))
@@ -309,6 +493,42 @@ class GridSplitter(AbstractOcgisObject):
         vm.barrier()
 
 
+def _read_weighted_slabs_(path, variable_names, dimension_names):
+    # Read data variables from a split file transposed to the master file's dimension order.
+    ret = []
+    with nc_scope(path) as ds:
+        ds.set_auto_maskandscale(False)
+        for name in variable_names:
+            variable = ds.variables[name]
+            axes = [variable.dimensions.index(dimension_name) for dimension_name in dimension_names]
+            ret.append(np.transpose(variable[:], axes))
+    return ret
+
+
+def _get_coordinate_extents_(coordinate):
+    # Minimum and maximum of each coordinate element. Bounds are used if available as in the grid extent.
+    if coordinate.has_bounds:
+        value = coordinate.bounds.get_value()
+        ret = value.min(axis=-1), value.max(axis=-1)
+    else:
+        value = coordinate.get_value()
+        ret = value, value
+    return ret
+
+
+def _get_selection_bounds_(select):
+    # Start and stop indices bracketing the selected elements in each row of a two-dimensional boolean array.
+    start = np.argmax(select, axis=1)
+    stop = select.shape[1] - np.argmax(select[:, ::-1], axis=1)
+    return np.column_stack([start, stop])
+
+
+def _write_split_(grid, path):
+    ocgis_lh(msg='writing: {}'.format(path), level=logging.DEBUG)
+    Field(grid=grid).write(path)
+    ocgis_lh(msg='finished writing: {}'.format(path), level=logging.DEBUG)
+
+
 def create_slice_from_tuple(tup):
     return slice(tup[0], tup[1])
 
@@ -1,6 +1,22 @@
-from rtree import index
+import hashlib
+
+import numpy as np
 from shapely.prepared import prep
 
+from ocgis.util.disk_cache import DiskCache
+
+try:
+    from rtree import index
+except ImportError:
+    # "rtree" is optional if the bulk spatial index is available.
+    index = None
+
+try:
+    # Bulk-loaded trees with vectorized predicate queries are available in shapely>=2.0.
+    from shapely import STRtree, touches as get_touches
+except ImportError:
+    STRtree, get_touches = None, None
+
 
 class SpatialIndex(object):
     """
@@ -15,6 +31,25 @@ class SpatialIndex(object):
         else:
             self._index = index.Rtree(path)
 
+    @classmethod
+    def from_bounds(cls, bounds, path=None):
+        """
+        Create a spatial index by bulk loading a bounds array. The identifier for each element is its position in the
+        array.
+
+        :param bounds: A two-dimensional array with shape ``(n, 4)``. Each row is ``(minx, miny, maxx, maxy)``.
+        :type bounds: :class:`numpy.ndarray`
+        :param str path: If provided, persist the index to this file path without extension.
+        :rtype: :class:`~ocgis.spatial.index.SpatialIndex`
+        """
+        stream = ((ii, tuple(row), None) for ii, row in enumerate(bounds.tolist()))
+        ret = cls.__new__(cls)
+        if path is None:
+            ret._index = index.Index(stream)
+        else:
+            ret._index = index.Index(path, stream)
+        return ret
+
     def add(self, id_geom, shapely_geom):
         """
         ..note: Both parameters may come in as sequences of the appropriate type.
@@ -84,3 +119,107 @@ class SpatialIndex(object):
 
     def _get_intersection_rtree_(self, shapely_geom):
         return self._index.intersection(shapely_geom.bounds)
+
+
+class SpatialIndexCache(DiskCache):
+    """
+    Persistent on-disk cache for grid spatial indexes. Indexes are stored in ``rtree`` format and keyed by the grid's
+    fingerprint (see :func:`~ocgis.spatial.index.get_grid_fingerprint`). See :class:`~ocgis.util.disk_cache.DiskCache`.
+
+    :param str directory: The cache directory. It is created if it does not exist.
+    :param int max_size: The maximum number of indexes to keep in the cache.
+    """
+
+    def __init__(self, directory, max_size=32):
+        super(SpatialIndexCache, self).__init__(directory, ['.idx', '.dat'], max_size=max_size)
+
+    def get_index(self, grid, get_bounds):
+        """
+        Get the spatial index for a grid loading it from the cache if it is available. Otherwise, build and persist
+        the index.
+
+        :param grid: The target grid.
+        :type grid: :class:`~ocgis.Grid`
+        :param get_bounds: A callable taking the grid as its only argument and returning the grid's cell bounds. See
+         :meth:`~ocgis.spatial.index.SpatialIndex.from_bounds`.
+        :type get_bounds: function
+        :returns: The spatial index. Identifiers are the flattened grid indices.
+        :rtype: :class:`~ocgis.spatial.index.SpatialIndex`
+        """
+
+        def _create_(tmp_path):
+            si = SpatialIndex.from_bounds(get_bounds(grid), path=tmp_path)
+            si._index.close()
+
+        return self.get(get_grid_fingerprint(grid), _create_, lambda path: SpatialIndex(path=path))
+
+
+class BulkSpatialIndex(object):
+    """
+    Create and query a bulk-loaded spatial index using the Shapely :class:`STRtree`. Queries are vectorized and return
+    index arrays. Requires ``shapely>=2.0``.
+
+    :param geoms: A one-dimensional sequence of geometries to index. The position of a geometry in the sequence is its
+     index.
+    :type geoms: :class:`numpy.ndarray` | sequence
+    :raises: ImportError
+    """
+
+    def __init__(self, geoms):
+        if STRtree is None:
+            raise ImportError('"shapely>=2.0" is required for bulk spatial indexing.')
+        if not isinstance(geoms, np.ndarray):
+            fill = np.empty(len(geoms), dtype=object)
+            fill[:] = geoms
+            geoms = fill
+        self.geoms = geoms
+        self._tree = STRtree(geoms)
+
+    def query(self, shapely_geom, predicate='intersects', keep_touches=True):
+        """
+        :param shapely_geom: The geometry to use for subsetting.
+        :type shapely_geom: :class:`shapely.geometry.base.BaseGeometry`
+        :param str predicate: The binary predicate to evaluate between ``shapely_geom`` and the indexed geometries.
+        :param bool keep_touches: If ``False``, remove the indices of geometries only touching the subset geometry.
+        :returns: Sorted indices of the indexed geometries satisfying the predicate.
+        :rtype: :class:`numpy.ndarray`
+        """
+        ret = np.sort(self._tree.query(shapely_geom, predicate=predicate))
+        if not keep_touches and ret.size > 0:
+            ret = ret[np.invert(get_touches(shapely_geom, self.geoms[ret]))]
+        return ret
+
+    def query_bulk(self, shapely_geoms, predicate='intersects'):
+        """
+        :param shapely_geoms: A one-dimensional array of geometries to query with.
+        :type shapely_geoms: :class:`numpy.ndarray`
+        :param str predicate: The binary predicate to evaluate between the query and indexed geometries.
+        :returns: A two-row array with a column for each pair satisfying the predicate. The first row indexes
+         ``shapely_geoms`` and the second row indexes the indexed geometries.
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self._tree.query(shapely_geoms, predicate=predicate)
+
+
+def get_grid_fingerprint(grid):
+    """
+    :param grid: The target grid.
+    :type grid: :class:`~ocgis.Grid`
+    :returns: A hash of the grid's coordinate values, shape, coordinate system, and spatial abstraction.
+    :rtype: str
+    """
+
+    sha = hashlib.sha1()
+    crs = grid.crs
+    if crs is None:
+        crs_string = str(None)
+    else:
+        crs_string = '{}{}'.format(crs.__class__.__name__, crs)
+    sha.update('{}|{}|{}'.format(grid.shape, crs_string, grid.abstraction).encode())
+    coordinates = [grid.x, grid.y]
+    if grid.abstraction == 'polygon' and grid.has_bounds:
+        coordinates += [grid.x.bounds, grid.y.bounds]
+    for coordinate in coordinates:
+        sha.update(np.ascontiguousarray(coordinate.get_value()).tobytes())
+    return sha.hexdigest()
+
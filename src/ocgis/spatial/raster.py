@@ -0,0 +1,212 @@
+"""
+Geometry-free spatial operations for rectilinear grids. Grid cells are described by their coordinate bounds only and
+are never converted to Shapely geometries. Polygon subset geometries are decomposed into edges which are rasterized
+onto the grid:
+
+* Cell centers are classified as inside/outside the subset polygon using an even-odd ray casting scanline.
+* Cells touched by a polygon edge are found with bounds arithmetic on the edges clipped to each grid column.
+
+A cell intersects the subset polygon if its center is inside the polygon or if a polygon edge touches the cell. When
+touching cells are not kept, only the open cell interior is tested against the edges so cells sharing only an edge or
+corner with the polygon are excluded. Boundary decisions use floating point arithmetic.
+"""
+import numpy as np
+from shapely.geometry import Polygon, MultiPolygon
+
+
+def get_polygon_edges(geom):
+    """
+    :param geom: The polygonal geometry to decompose.
+    :type geom: :class:`shapely.geometry.Polygon` | :class:`shapely.geometry.MultiPolygon`
+    :returns: A two-dimensional array with shape ``(n_edges, 4)``. Each row is ``(x1, y1, x2, y2)``. Interior rings
+     are included. Returns ``None`` if the geometry is not polygonal.
+    :rtype: :class:`numpy.ndarray` | None
+    """
+
+    if isinstance(geom, Polygon):
+        polygons = [geom]
+    elif isinstance(geom, MultiPolygon):
+        polygons = list(geom.geoms)
+    else:
+        return None
+
+    edges = []
+    for polygon in polygons:
+        for ring in [polygon.exterior] + list(polygon.interiors):
+            coords = np.asarray(ring.coords)[:, 0:2]
+            if coords.shape[0] < 2:
+                continue
+            edges.append(np.hstack((coords[:-1], coords[1:])))
+    if len(edges) == 0:
+        ret = np.zeros((0, 4), dtype=float)
+    else:
+        ret = np.vstack(edges)
+    return ret
+
+
+def get_rasterized_intersects(subset_geom, x_bounds, y_bounds, keep_touches=False, return_boundary=False):
+    """
+    Compute a spatial intersects mask for a rectilinear grid without creating cell geometries.
+
+    :param subset_geom: The polygonal subset geometry.
+    :type subset_geom: :class:`shapely.geometry.Polygon` | :class:`shapely.geometry.MultiPolygon`
+    :param x_bounds: The x-coordinate bounds with shape ``(ncol, 2)``. For point grids, both bounds are the
+     coordinate value.
+    :type x_bounds: :class:`numpy.ndarray`
+    :param y_bounds: The y-coordinate bounds with shape ``(nrow, 2)``.
+    :type y_bounds: :class:`numpy.ndarray`
+    :param bool keep_touches: If ``True``, cells that only touch the subset geometry are intersecting.
+    :param bool return_boundary: If ``True``, also return the mask of cells touched by the subset geometry's boundary.
+    :returns: A boolean array with shape ``(nrow, ncol)`` that is ``True`` where the cell intersects the subset
+     geometry. If ``return_boundary`` is ``True``, a tuple ``(intersects, boundary)``.
+    :rtype: :class:`numpy.ndarray` | tuple
+    :raises: ValueError
+    """
+
+    edges = get_polygon_edges(subset_geom)
+    if edges is None:
+        raise ValueError('Only polygonal subset geometries may be rasterized.')
+
+    x_lower, x_upper = np.min(x_bounds, axis=1), np.max(x_bounds, axis=1)
+    y_lower, y_upper = np.min(y_bounds, axis=1), np.max(y_bounds, axis=1)
+
+    # Work in sorted coordinate order to allow binary searches. The result is permuted back at the end.
+    col_order = np.argsort(x_lower, kind='mergesort')
+    row_order = np.argsort(y_lower, kind='mergesort')
+    x_lower, x_upper = x_lower[col_order], np.sort(x_upper)
+    y_lower, y_upper = y_lower[row_order], np.sort(y_upper)
+    x_center = (x_bounds[col_order, 0] + x_bounds[col_order, 1]) / 2.
+    y_center = (y_bounds[row_order, 0] + y_bounds[row_order, 1]) / 2.
+
+    is_degenerate = np.all(x_lower == x_upper) and np.all(y_lower == y_upper)
+
+    inside = get_ray_cast_mask(edges, x_center, y_center)
+    boundary = get_edge_cells_mask(edges, x_lower, x_upper, y_lower, y_upper, strict=False)
+    if keep_touches:
+        intersects = np.logical_or(inside, boundary)
+    elif is_degenerate:
+        # Points on the boundary only touch the subset geometry.
+        intersects = np.logical_and(inside, np.invert(boundary))
+    else:
+        interior = get_edge_cells_mask(edges, x_lower, x_upper, y_lower, y_upper, strict=True)
+        intersects = np.logical_or(inside, interior)
+
+    intersects = _get_unsorted_(intersects, row_order, col_order)
+    if return_boundary:
+        ret = intersects, _get_unsorted_(boundary, row_order, col_order)
+    else:
+        ret = intersects
+    return ret
+
+
+def get_ray_cast_mask(edges, x_center, y_center):
+    """
+    Even-odd point-in-polygon test for all points of a rectilinear grid. Each polygon edge is intersected with the
+    horizontal scanlines passing through the grid rows it spans. A point is inside if there are an odd number of edge
+    crossings to its right.
+
+    :param edges: Polygon edges. See :func:`~ocgis.spatial.raster.get_polygon_edges`.
+    :type edges: :class:`numpy.ndarray`
+    :param x_center: Sorted x-coordinates for the grid columns.
+    :type x_center: :class:`numpy.ndarray`
+    :param y_center: Sorted y-coordinates for the grid rows.
+    :type y_center: :class:`numpy.ndarray`
+    :returns: A boolean array with shape ``(nrow, ncol)``.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    nrow, ncol = y_center.shape[0], x_center.shape[0]
+    x1, y1, x2, y2 = edges.T
+    y_min, y_max = np.minimum(y1, y2), np.maximum(y1, y2)
+
+    # Half-open row span so vertices shared by two edges are only counted once. Horizontal edges span no rows.
+    start = np.searchsorted(y_center, y_min, side='left')
+    stop = np.searchsorted(y_center, y_max, side='left')
+    edge_index, row = _get_expanded_pairs_(start, stop)
+
+    ex1, ey1, ex2, ey2 = x1[edge_index], y1[edge_index], x2[edge_index], y2[edge_index]
+    x_cross = ex1 + (y_center[row] - ey1) * (ex2 - ex1) / (ey2 - ey1)
+    # Count the crossings to the right of each point using a difference array along the columns.
+    ncross_left = np.searchsorted(x_center, x_cross, side='left')
+    counts = np.zeros((nrow, ncol + 1), dtype=np.int64)
+    np.add.at(counts, (row, np.zeros_like(row)), 1)
+    np.add.at(counts, (row, ncross_left), -1)
+    counts = np.cumsum(counts, axis=1)[:, 0:ncol]
+    return counts % 2 == 1
+
+
+def get_edge_cells_mask(edges, x_lower, x_upper, y_lower, y_upper, strict=False):
+    """
+    Find the cells of a rectilinear grid touched by polygon edges.
+
+    :param edges: Polygon edges. See :func:`~ocgis.spatial.raster.get_polygon_edges`.
+    :type edges: :class:`numpy.ndarray`
+    :param x_lower: Sorted lower x-bounds for the grid columns.
+    :type x_lower: :class:`numpy.ndarray`
+    :param x_upper: Sorted upper x-bounds for the grid columns.
+    :type x_upper: :class:`numpy.ndarray`
+    :param y_lower: Sorted lower y-bounds for the grid rows.
+    :type y_lower: :class:`numpy.ndarray`
+    :param y_upper: Sorted upper y-bounds for the grid rows.
+    :type y_upper: :class:`numpy.ndarray`
+    :param bool strict: If ``True``, only edges passing through the open cell interior are considered. Otherwise,
+     edges touching the closed cell are considered.
+    :returns: A boolean array with shape ``(nrow, ncol)``.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    nrow, ncol = y_lower.shape[0], x_lower.shape[0]
+    x1, y1, x2, y2 = edges.T
+    x_min, x_max = np.minimum(x1, x2), np.maximum(x1, x2)
+    y_min, y_max = np.minimum(y1, y2), np.maximum(y1, y2)
+
+    if strict:
+        side_start, side_stop = 'right', 'left'
+    else:
+        side_start, side_stop = 'left', 'right'
+
+    # Columns overlapping each edge's x-range.
+    start = np.searchsorted(x_upper, x_min, side=side_start)
+    stop = np.searchsorted(x_lower, x_max, side=side_stop)
+    edge_index, col = _get_expanded_pairs_(start, stop)
+
+    # Clip each edge to the column's x-range to find the y-range of the edge within the column.
+    ex1, ey1, ex2, ey2 = x1[edge_index], y1[edge_index], x2[edge_index], y2[edge_index]
+    dx, dy = ex2 - ex1, ey2 - ey1
+    is_vertical = dx == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ta = (x_lower[col] - ex1) / dx
+        tb = (x_upper[col] - ex1) / dx
+    t0 = np.clip(np.minimum(ta, tb), 0., 1.)
+    t1 = np.clip(np.maximum(ta, tb), 0., 1.)
+    ya, yb = ey1 + t0 * dy, ey1 + t1 * dy
+    clip_y_min = np.where(is_vertical, y_min[edge_index], np.minimum(ya, yb))
+    clip_y_max = np.where(is_vertical, y_max[edge_index], np.maximum(ya, yb))
+
+    # Rows overlapping the clipped y-range.
+    row_start = np.searchsorted(y_upper, clip_y_min, side=side_start)
+    row_stop = np.searchsorted(y_lower, clip_y_max, side=side_stop)
+    select = row_stop > row_start
+    col, row_start, row_stop = col[select], row_start[select], row_stop[select]
+
+    # Mark the row ranges for each column using a difference array along the rows.
+    counts = np.zeros((nrow + 1, ncol), dtype=np.int64)
+    np.add.at(counts, (row_start, col), 1)
+    np.add.at(counts, (row_stop, col), -1)
+    counts = np.cumsum(counts, axis=0)[0:nrow, :]
+    return counts > 0
+
+
+def _get_expanded_pairs_(start, stop):
+    # Expand per-edge index ranges [start, stop) into flat (edge index, range index) pairs.
+    counts = np.maximum(stop - start, 0)
+    edge_index = np.repeat(np.arange(counts.shape[0]), counts)
+    offsets = np.cumsum(counts) - counts
+    range_index = start[edge_index] + (np.arange(edge_index.shape[0]) - offsets[edge_index])
+    return edge_index, range_index
+
+
+def _get_unsorted_(arr, row_order, col_order):
+    ret = np.empty_like(arr)
+    ret[np.ix_(row_order, col_order)] = arr
+    return ret
@@ -1,12 +1,55 @@
+import time
 from unittest import SkipTest
 
+import numpy as np
+
 import ocgis
 from ocgis import RequestDataset
 from ocgis.ops.core import OcgOperations
-from ocgis.test.base import TestBase, attr
+from ocgis.spatial.grid import get_polygon_geometry_array, get_point_geometry_array
+from ocgis.test.base import TestBase, attr, create_gridxy_global
 
 
 class Test(TestBase):
+    @attr('benchmark')
+    def test_geometry_array_creation(self):
+        # Geometry creation time for a global 0.1 degree grid. Vectorized construction requires shapely>=2.0.
+        grid = create_gridxy_global(resolution=0.1, dist=False)
+        for func in [get_polygon_geometry_array, get_point_geometry_array]:
+            for vectorized in [False, True]:
+                fill = np.empty(grid.shape, dtype=object)
+                t1 = time.time()
+                func(grid, fill, vectorized=vectorized)
+                t2 = time.time()
+                print('{}, vectorized={}: {:.2f} seconds'.format(func.__name__, vectorized, t2 - t1))
+
+    @attr('benchmark')
+    def test_native_regrid_weights(self):
+        # Regrid weight generation time for standard global grid pairs. ESMF is timed if available.
+        from ocgis.collection.field import Field
+        from ocgis.regrid.base import _create_esmf_regrid_weights_
+        from ocgis.regrid.native import get_native_regrid_weights
+        from ocgis.variable.crs import Spherical
+
+        for src_resolution, dst_resolution in [(1., 2.5), (0.5, 1.), (0.25, 1.)]:
+            src = create_gridxy_global(resolution=src_resolution, crs=Spherical(), dist=False)
+            dst = create_gridxy_global(resolution=dst_resolution, crs=Spherical(), dist=False)
+            for regrid_method in ['conserve', 'bilinear']:
+                for n_workers in [None, 4]:
+                    t1 = time.time()
+                    get_native_regrid_weights(src, dst, regrid_method=regrid_method, n_workers=n_workers)
+                    t2 = time.time()
+                    print('native {}, {} to {}, n_workers={}: {:.2f} seconds'.format(
+                        regrid_method, src_resolution, dst_resolution, n_workers, t2 - t1))
+                if ocgis.env.USE_ESMF:
+                    from ESMF import RegridMethod
+                    esmf_regrid_method = RegridMethod.CONSERVE if regrid_method == 'conserve' else None
+                    t1 = time.time()
+                    _create_esmf_regrid_weights_(Field(grid=src), Field(grid=dst), esmf_regrid_method, None, None)
+                    t2 = time.time()
+                    print('esmf {}, {} to {}: {:.2f} seconds'.format(regrid_method, src_resolution, dst_resolution,
+                                                                     t2 - t1))
+
     @attr('release')
     def test(self):
         raise SkipTest('benchmarking only')
@@ -0,0 +1,72 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from ocgis import env
+from ocgis.calc.basis_cache import PercentileBasisCache, get_basis_fingerprint, get_file_identity, \
+    get_percentile_basis
+from ocgis.test.base import TestBase
+
+
+class TestPercentileBasisCache(TestBase):
+    def test_get_basis(self):
+        directory = os.path.join(self.current_dir_output, 'cache')
+        cache = PercentileBasisCache(directory, max_size=2)
+        self.assertTrue(os.path.isdir(directory))
+
+        def _create_(_):
+            raise AssertionError('basis should be cached')
+
+        # Test a dictionary basis with masked values.
+        basis = OrderedDict()
+        basis[1, 1] = np.ma.array([[1., 2.], [3., 4.]], mask=[[False, True], [False, False]])
+        basis[2, 29] = np.ma.array([[5., 6.], [7., 8.]], mask=False)
+        fingerprint = get_basis_fingerprint('dict', 90)
+        cache.get_basis(fingerprint, lambda: basis)
+        self.assertTrue(os.path.exists(os.path.join(directory, fingerprint + '.npz')))
+        actual = cache.get_basis(fingerprint, _create_)
+        self.assertEqual(list(actual.keys()), list(basis.keys()))
+        for key, value in basis.items():
+            self.assertNumpyAll(actual[key], value)
+
+        # Test an array basis.
+        basis = np.arange(6.).reshape(2, 3)
+        fingerprint_arr = get_basis_fingerprint('arr', 90)
+        cache.get_basis(fingerprint_arr, lambda: basis)
+        self.assertNumpyAll(cache.get_basis(fingerprint_arr, _create_), basis)
+
+        # Test least recently used bases are evicted.
+        cache.get_basis(get_basis_fingerprint('other'), lambda: basis)
+        self.assertFalse(os.path.exists(os.path.join(directory, fingerprint + '.npz')))
+        self.assertEqual(len(os.listdir(directory)), 2)
+
+
+class Test(TestBase):
+    def test_get_basis_fingerprint(self):
+        arr = np.ma.array([1., 2., 3.], mask=False)
+        self.assertEqual(get_basis_fingerprint('a', arr, 90), get_basis_fingerprint('a', arr.copy(), 90))
+        self.assertNotEqual(get_basis_fingerprint('a', arr, 90), get_basis_fingerprint('a', arr, 10))
+        other = arr.copy()
+        other.mask[1] = True
+        self.assertNotEqual(get_basis_fingerprint('a', arr), get_basis_fingerprint('a', other))
+        self.assertNotEqual(get_basis_fingerprint('a', arr), get_basis_fingerprint('a', arr.astype(np.float32)))
+
+    def test_get_file_identity(self):
+        path = self.get_temporary_file_path('foo.txt')
+        with open(path, 'w') as f:
+            f.write('foo')
+        actual = get_file_identity(path)
+        self.assertEqual(actual[0][:2], (os.path.abspath(path), 3))
+        self.assertIsNone(get_file_identity('http://localhost/foo.nc'))
+
+    def test_get_percentile_basis(self):
+        # Bases are not cached by default.
+        self.assertIsNone(env.DIR_PERCENTILE_CACHE)
+        self.assertEqual(get_percentile_basis(lambda: 5, 'a'), 5)
+
+        env.DIR_PERCENTILE_CACHE = os.path.join(self.current_dir_output, 'cache')
+        basis = np.array([1, 2])
+        self.assertNumpyAll(get_percentile_basis(lambda: basis, 'a'), basis)
+        self.assertEqual(len(os.listdir(env.DIR_PERCENTILE_CACHE)), 1)
+        self.assertNumpyAll(get_percentile_basis(lambda: None, 'a'), basis)
@@ -6,9 +6,10 @@ import ocgis
 from ocgis.base import orphaned
 from ocgis.calc.engine import CalculationEngine
 from ocgis.calc.eval_function import EvalFunction
-from ocgis.calc.library.statistics import Mean
+from ocgis.calc.library.statistics import Mean, Max, Median, StandardDeviation
+from ocgis.calc.library.thresholds import Threshold
 from ocgis.collection.spatial import SpatialCollection
-from ocgis.test.base import TestBase
+from ocgis.test.base import TestBase, create_gridxy_global, create_exact_field
 from ocgis.test.base import attr
 from ocgis.util.logging_ocgis import ProgressOcgOperations
 
@@ -82,6 +83,36 @@ class TestCalculationEngine(TestBase):
         desired = (12, 10, 10)
         self.assertEqual(actual, desired)
 
+    def test_execute_fused(self):
+        """Test set functions executed in a fused pass match separate execution."""
+
+        funcs = [{'ref': Mean, 'name': 'mean', 'kwds': {}, 'func': 'mean'},
+                 {'ref': Median, 'name': 'median', 'kwds': {}, 'func': 'median'},
+                 {'ref': Max, 'name': 'max', 'kwds': {}, 'func': 'max'},
+                 {'ref': StandardDeviation, 'name': 'std', 'kwds': {}, 'func': 'std'},
+                 {'ref': Threshold, 'name': 'threshold', 'kwds': {'threshold': 100., 'operation': 'gt'},
+                  'func': 'threshold'}]
+        field = create_exact_field(create_gridxy_global(resolution=30.0), 'foo', ntime=60)
+        coll = SpatialCollection()
+        coll.add_field(field, None)
+
+        engine = self.get_engine(funcs=funcs, kwds={'calc_sample_size': True})
+        fused_fills = engine._get_fused_fills_(field, False, field.time.get_grouping(self.grouping))
+        self.assertEqual(list(sorted(fused_fills.keys())), [0, 2, 3, 4])
+        actual = engine.execute(deepcopy(coll)).get_element()
+
+        desired = ['mean', 'n_mean', 'median', 'n_median', 'max', 'n_max', 'std', 'n_std', 'threshold', 'n_threshold']
+        self.assertEqual([v.name for v in actual.data_variables], desired)
+        for f in funcs:
+            engine = self.get_engine(funcs=[f], kwds={'calc_sample_size': True})
+            desired = engine.execute(deepcopy(coll)).get_element()
+            for name in [f['name'], 'n_{}'.format(f['name'])]:
+                self.assertNumpyAll(actual[name].get_masked_value(), desired[name].get_masked_value())
+
+        # Test a single set function is not fused.
+        engine = self.get_engine(funcs=funcs[0:2])
+        self.assertEqual(engine._get_fused_fills_(field, False, field.time.get_grouping(self.grouping)), {})
+
     @attr('data')
     def test_execute_tgd(self):
         rd = self.test_data.get_rd('cancm4_tas')
@@ -2,11 +2,12 @@ import numpy as np
 
 from ocgis.base import orphaned
 from ocgis.calc.eval_function import EvalFunction
-from ocgis.test.base import TestBase
+from ocgis.calc.expression import CompiledExpression
+from ocgis.test.base import AbstractTestField
 from ocgis.test.base import attr
 
 
-class TestEvalFunction(TestBase):
+class TestEvalFunction(AbstractTestField):
     def test_init(self):
         expr = 'es=6.1078*exp(17.08085*(tas-273.16)/(234.175+(tas-273.16)))'
         ef = EvalFunction(expr=expr)
@@ -89,73 +90,67 @@ class TestEvalFunction(TestBase):
         actual_value = np.log(1000 * (tasmax.get_value() - tas.get_value())) / 3
         self.assertNumpyAll(ret['foo'].get_value(), actual_value)
 
-    def test_get_eval_string(self):
+    def test_compiled_expression(self):
         expr = 'es=6.1078*exp(log(17.08085)*(tas-273.16)/(234.175+(tas-273.16)))'
-        to_eval, out_variable_name = EvalFunction._get_eval_string_(expr, {'tas': 'var.value'})
-        self.assertEqual(to_eval, '6.1078*np.exp(np.log(17.08085)*(var.value-273.16)/(234.175+(var.value-273.16)))')
-        self.assertEqual(out_variable_name, 'es')
-
-        expr = 'tas=tas-4'
-        to_eval, out_variable_name = EvalFunction._get_eval_string_(expr, {'tas': 'var.value'})
-        self.assertEqual(to_eval, 'var.value-4')
-        self.assertEqual(out_variable_name, 'tas')
-
-        expr = 'tas=4-tas'
-        to_eval, out_variable_name = EvalFunction._get_eval_string_(expr, {'tas': 'var.value'})
-        self.assertEqual(to_eval, '4-var.value')
-        self.assertEqual(out_variable_name, 'tas')
-
-        expr = 'tas=tas'
-        to_eval, out_variable_name = EvalFunction._get_eval_string_(expr, {'tas': 'var.value'})
-        self.assertEqual(to_eval, 'var.value')
-        self.assertEqual(out_variable_name, 'tas')
-
-        expr = 'tas=tas-tas-tas'
-        to_eval, out_variable_name = EvalFunction._get_eval_string_(expr, {'tas': 'var.value'})
-        self.assertEqual(to_eval, 'var.value-var.value-var.value')
-        self.assertEqual(out_variable_name, 'tas')
-
-        expr = 'tas=tas-tas-tas-tas'
-        to_eval, out_variable_name = EvalFunction._get_eval_string_(expr, {'tas': 'var.value'})
-        self.assertEqual(to_eval, 'var.value-var.value-var.value-var.value')
-        self.assertEqual(out_variable_name, 'tas')
-
-        expr = 'tas_2=tas_1-tas_1-tas_1-tas_1'
-        to_eval, out_variable_name = EvalFunction._get_eval_string_(expr, {'tas_1': 'var.value'})
-        self.assertEqual(to_eval, 'var.value-var.value-var.value-var.value')
-        self.assertEqual(out_variable_name, 'tas_2')
-
-        expr = 'tas=tas-tas-tas-tas-tasmax-tas'
-        to_eval, out_variable_name = EvalFunction._get_eval_string_(expr, {'tas': 'var.value', 'tasmax': 'var2.value'})
-        self.assertEqual(to_eval, 'var.value-var.value-var.value-var.value-var2.value-var.value')
-        self.assertEqual(out_variable_name, 'tas')
-
-    def test_get_eval_string_bad_string(self):
-        # this string has no equals sign
+        ce = CompiledExpression(expr, variable_names=['tas'])
+        self.assertEqual(ce.name, 'es')
+        self.assertEqual(ce.variable_names, ['tas'])
+        tas = np.ma.array([[273.16, 280.]], mask=False)
+        desired = 6.1078 * np.exp(np.log(17.08085) * (tas - 273.16) / (234.175 + (tas - 273.16)))
+        self.assertNumpyAllClose(ce.evaluate({'tas': tas}).data, desired.data)
+
+        ce = CompiledExpression('tas=tas-tas-tas-tas-tasmax-tas', variable_names=['tas', 'tasmax'])
+        self.assertEqual(ce.name, 'tas')
+        self.assertEqual(ce.variable_names, ['tas', 'tasmax'])
+
+    def test_compiled_expression_bad_string(self):
+        # This string has no equals sign.
         expr = 'es6.1078*exp(log(17.08085)*(tas-273.16)/(234.175+(tas-273.16)))'
         with self.assertRaises(ValueError):
-            EvalFunction._get_eval_string_(expr, {'tas': 'var.value'})
+            CompiledExpression(expr, variable_names=['tas'])
 
-        # this string has a numpy function "foo" that is not enabled (and does not exist)
+        # This string has a NumPy function "foo" that is not enabled (and does not exist).
         expr = 'es=6.1078*exp(foo(17.08085)*(tas-273.16)/(234.175+(tas-273.16)))'
         with self.assertRaises(ValueError):
-            EvalFunction._get_eval_string_(expr, {'tas': 'var.value'})
-
-    def test_get_eval_string_power(self):
-        """Test the power ufunc is appropriately parsed from the eval string."""
-
-        expr = 'es=power(foo, 4)'
-        map_vars = {'foo': '_exec_foo.value'}
-        parsed, output_variable = EvalFunction._get_eval_string_(expr, map_vars)
-        self.assertEqual(output_variable, 'es')
-        self.assertEqual(parsed, 'np.power(_exec_foo.value, 4)')
+            CompiledExpression(expr, variable_names=['tas'])
+
+    def test_compiled_expression_power(self):
+        """Test the power ufunc is appropriately parsed from the expression."""
+
+        ce = CompiledExpression('es=power(foo, 4)', variable_names=['foo'])
+        self.assertEqual(ce.name, 'es')
+        self.assertEqual(ce.variable_names, ['foo'])
+        foo = np.ma.array([1., 2., 3.], mask=False)
+        self.assertNumpyAll(ce.evaluate({'foo': foo}).data, np.power(foo.data, 4))
+
+    def test_compiled_expression_two_variables(self):
+        ce = CompiledExpression('foo=log(1000*(tasmax-tas))/3', variable_names=['tasmax', 'tas'])
+        self.assertEqual(ce.name, 'foo')
+        self.assertEqual(ce.variable_names, ['tasmax', 'tas'])
+        tas = np.ma.array([280., 290.], mask=False)
+        tasmax = np.ma.array([285., 300.], mask=False)
+        actual = ce.evaluate({'tas': tas, 'tasmax': tasmax})
+        self.assertNumpyAllClose(actual.data, np.log(1000 * (tasmax.data - tas.data)) / 3)
+
+    def test_execute(self):
+        field = self.get_field(with_value=True)
+        mask = field['tmax'].get_mask(create=True)
+        mask[:, 0, :, 0, 0] = True
+        field['tmax'].set_mask(mask)
+        field['tmax'].get_value()[0, 1, 0, 1, 1] = 0
+        tmax = field['tmax'].get_masked_value().copy()
+
+        ef = EvalFunction(expr='foo=log(tmax)*2+tmax', field=field)
+        ret = ef.execute()
+        self.assertEqual(list(ret.keys()), ['foo'])
+        actual = ret['foo'].get_masked_value()
+        # The masked domain of the logarithm is applied in addition to the source mask.
+        desired = np.ma.log(tmax) * 2 + tmax
+        self.assertNumpyAll(actual.mask, desired.mask)
+        self.assertNumpyAllClose(actual.compressed(), desired.compressed())
 
-    def test_get_eval_string_two_variables(self):
-        map_vars = {'tasmax': 'tasmax.value', 'tas': 'tas.value'}
-        expr = 'foo=log(1000*(tasmax-tas))/3'
-        to_eval, out_variable_name = EvalFunction._get_eval_string_(expr, map_vars)
-        self.assertEqual(to_eval, 'np.log(1000*(tasmax.value-tas.value))/3')
-        self.assertEqual(out_variable_name, 'foo')
+        with self.assertRaises(ValueError):
+            EvalFunction(expr='foo=log(tas)', field=field).execute()
 
     def test_is_multivariate(self):
         expr = 'tas2=tas+2'
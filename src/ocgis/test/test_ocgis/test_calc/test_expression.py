@@ -0,0 +1,97 @@
+import numpy as np
+
+from ocgis.calc.expression import CompiledExpression, iter_blocks
+from ocgis.test.base import TestBase
+
+
+class TestCompiledExpression(TestBase):
+    def get_arrays(self, dtype=np.float32):
+        shape = (2, 5, 3, 4)
+        rng = np.random.RandomState(1)
+        tas = np.ma.array(rng.normal(280, 20, shape).astype(dtype), mask=rng.rand(*shape) < 0.2)
+        tasmax = np.ma.array((tas.data + rng.normal(2, 5, shape)).astype(dtype), mask=rng.rand(*shape) < 0.1)
+        return {'tas': tas, 'tasmax': tasmax}
+
+    def test_init(self):
+        ce = CompiledExpression('es=6.1078*exp(log(17.08085)*(tas-273.16)/(234.175+(tas-273.16)))')
+        self.assertEqual(ce.name, 'es')
+        self.assertEqual(ce.variable_names, ['tas'])
+
+        for expr in ['tas=tas-4', 'tas=4-tas', 'tas=tas', 'tas=tas-tas-tas-tas']:
+            ce = CompiledExpression(expr)
+            self.assertEqual(ce.name, 'tas')
+            self.assertEqual(ce.variable_names, ['tas'])
+
+        ce = CompiledExpression('tas_2=tas_1-tas_1-tas_1-tas_1')
+        self.assertEqual(ce.name, 'tas_2')
+        self.assertEqual(ce.variable_names, ['tas_1'])
+
+        ce = CompiledExpression('tas=tas-tas-tas-tas-tasmax-tas', variable_names=['tasmax', 'tas'])
+        self.assertEqual(ce.variable_names, ['tas', 'tasmax'])
+
+        ce = CompiledExpression('es=power(foo, 4)')
+        self.assertEqual(ce.name, 'es')
+        self.assertEqual(ce.variable_names, ['foo'])
+
+    def test_init_bad_string(self):
+        # This string has no equals sign.
+        with self.assertRaises(ValueError):
+            CompiledExpression('es6.1078*exp(log(17.08085)*(tas-273.16)/(234.175+(tas-273.16)))')
+
+        # This string has a NumPy function "foo" that is not enabled (and does not exist).
+        with self.assertRaises(ValueError):
+            CompiledExpression('es=6.1078*exp(foo(17.08085)*(tas-273.16)/(234.175+(tas-273.16)))')
+
+        # Variables must be available.
+        with self.assertRaises(ValueError):
+            CompiledExpression('es=tas-tasmax', variable_names=['tas'])
+
+        # Only arithmetic operators and function calls are supported.
+        for expr in ['es=tas.data', 'es=tas[0]', 'es=tas<4', 'es=exp(tas, out=tas)', 'es=exp', 'es=tas+', 'es=4']:
+            with self.assertRaises(ValueError):
+                CompiledExpression(expr)
+
+    def test_evaluate(self):
+        exprs = ['es=6.1078*exp(17.08085*(tas-273.16)/(234.175+(tas-273.16)))',
+                 'foo=log(1000*(tasmax-tas))/3',
+                 'foo=tas/(tasmax-tas)',
+                 'foo=power(tas-tasmax, 2)+abs(-tas)',
+                 'foo=2**(tas/10)',
+                 'foo=tas']
+        for dtype in [np.float32, np.float64]:
+            arrays = self.get_arrays(dtype=dtype)
+            arrays['tas'].data[0, 0, 0, 0] = 0
+            namespace = {'exp': np.exp, 'log': np.log, 'abs': np.abs, 'power': np.power}
+            namespace.update(arrays)
+            for expr in exprs:
+                ce = CompiledExpression(expr)
+                with np.errstate(all='ignore'):
+                    desired = eval(expr.split('=')[1], namespace)
+                desired_mask = np.ma.getmaskarray(desired)
+                for block_size in [1, 7, None]:
+                    actual = ce.evaluate(arrays, block_size=block_size)
+                    self.assertNumpyAll(actual.mask, desired_mask)
+                    self.assertNumpyAllClose(actual.data[~desired_mask], desired.data[~desired_mask])
+
+        # Test writing to an output array.
+        arrays = self.get_arrays()
+        out = np.ma.array(np.zeros(arrays['tas'].shape), mask=False)
+        ret = CompiledExpression('foo=tasmax-tas').evaluate(arrays, out=out, block_size=10)
+        self.assertIs(ret, out)
+        self.assertNumpyAll(out.mask, arrays['tas'].mask | arrays['tasmax'].mask)
+        self.assertNumpyAllClose(out.compressed(), (arrays['tasmax'] - arrays['tas']).compressed().astype(float))
+
+
+class Test(TestBase):
+    def test_iter_blocks(self):
+        actual = list(iter_blocks((2, 3, 4), 5))
+        self.assertEqual(len(actual), 6)
+        self.assertEqual(actual[0], (0, slice(0, 1)))
+        self.assertEqual(list(iter_blocks((2, 3, 4), 100)), [(slice(0, 8),)])
+        self.assertEqual(list(iter_blocks((7,), 3)), [(slice(0, 3),), (slice(3, 6),), (slice(6, 9),)])
+
+        arr = np.zeros((3, 5, 7))
+        for block in iter_blocks(arr.shape, 11):
+            self.assertLessEqual(arr[block].size, 11)
+            arr[block] += 1
+        self.assertTrue(np.all(arr == 1))
@@ -0,0 +1,51 @@
+from ocgis.calc.fused import get_is_fusable, get_fused_fills
+from ocgis.calc.library.math import Sum
+from ocgis.calc.library.statistics import Mean, Max, Min, StandardDeviation, Median
+from ocgis.calc.library.thresholds import Threshold
+from ocgis.test.base import AbstractTestField
+
+
+class Test(AbstractTestField):
+    def get_functions(self, field, tgd, calc_sample_size=False):
+        ret = [Mean(field=field, tgd=tgd, calc_sample_size=calc_sample_size),
+               Max(field=field, tgd=tgd, calc_sample_size=calc_sample_size),
+               Min(field=field, tgd=tgd, calc_sample_size=calc_sample_size),
+               StandardDeviation(field=field, tgd=tgd, calc_sample_size=calc_sample_size),
+               Sum(field=field, tgd=tgd, calc_sample_size=calc_sample_size),
+               Threshold(field=field, tgd=tgd, calc_sample_size=calc_sample_size,
+                         parms={'threshold': 0.5, 'operation': 'gt'})]
+        return ret
+
+    def test_get_fused_fills(self):
+        for grouping in [['month'], 'all', [[12, 1], [2]]]:
+            field = self.get_field(with_value=True, month_count=2)
+            mask = field['tmax'].get_mask(create=True)
+            mask[:, 3:9, :, 1, 1] = True
+            field['tmax'].set_mask(mask)
+            tgd = field.temporal.get_grouping(grouping)
+
+            fused = get_fused_fills(self.get_functions(field, tgd, calc_sample_size=True))
+            separate = [f.execute() for f in self.get_functions(field, tgd, calc_sample_size=True)]
+
+            self.assertEqual(len(fused), len(separate))
+            for actual, desired in zip(fused, separate):
+                self.assertEqual(len(actual), 1)
+                name, actual = list(actual.items())[0]
+                for key, actual_variable in [(name, actual['fill']), ('n_{}'.format(name), actual['sample_size'])]:
+                    desired_variable = desired[key]
+                    self.assertEqual(actual_variable.name, desired_variable.name)
+                    self.assertEqual(actual_variable.dtype, desired_variable.dtype)
+                    self.assertEqual(actual_variable.dimension_names, desired_variable.dimension_names)
+                    self.assertEqual(actual_variable.attrs, desired_variable.attrs)
+                    self.assertNumpyAll(actual_variable.get_masked_value(), desired_variable.get_masked_value())
+
+    def test_get_is_fusable(self):
+        field = self.get_field(with_value=True, month_count=2)
+        tgd = field.temporal.get_grouping(['month'])
+        self.assertTrue(get_is_fusable(Mean(field=field, tgd=tgd)))
+        self.assertTrue(get_is_fusable(Threshold(field=field, tgd=tgd, parms={'threshold': 1, 'operation': 'gt'})))
+        # Functions without a batched reduction are executed separately.
+        self.assertFalse(get_is_fusable(Median(field=field, tgd=tgd)))
+        self.assertFalse(get_is_fusable(Mean(field=field, tgd=tgd, file_only=True)))
+        self.assertFalse(get_is_fusable(Mean(field=field, tgd=tgd, spatial_aggregation=True)))
+        self.assertFalse(get_is_fusable(Mean(field=field, tgd=None)))
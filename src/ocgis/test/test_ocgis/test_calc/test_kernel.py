@@ -0,0 +1,79 @@
+import numpy as np
+
+from ocgis import env
+from ocgis.calc.kernel import get_kernel, get_kernel_keys, register_kernel, apply_kernel
+from ocgis.calc.library.index.duration import Duration, KERNEL_SUMMARIES
+from ocgis.calc.library.index.freeze_thaw import FreezeThaw, freezethawnd, freezethaw1d
+from ocgis.calc.library.math import Convolve1D
+from ocgis.calc.runs import get_run_summary
+from ocgis.test.base import TestBase
+
+
+class TestKernelConformance(TestBase):
+    """Test every registered kernel matches the reference NumPy implementation bit-for-bit on masked inputs."""
+
+    def get_kernels(self, key):
+        # Uncompiled kernels are always tested. Compiled kernels are tested if Numba is available.
+        ret = [get_kernel(key, compiled=False)]
+        env.USE_NUMBA = True
+        compiled = get_kernel(key)
+        if compiled is not None:
+            ret.append(compiled)
+        return ret
+
+    def get_masked_values(self, shape, seed):
+        rs = np.random.RandomState(seed)
+        values = np.ma.array(rs.normal(0, 5, size=shape), mask=rs.rand(*shape) < 0.2)
+        values.mask[:, 0, 0] = True
+        return values
+
+    def test_conformance(self):
+        cases = {Convolve1D.key: self.run_convolve_1d, Duration.key: self.run_duration,
+                 FreezeThaw.key: self.run_freezethaw}
+        self.assertEqual(get_kernel_keys(), sorted(cases.keys()))
+        for key in get_kernel_keys():
+            for kernel in self.get_kernels(key):
+                cases[key](kernel)
+
+    def run_convolve_1d(self, kernel):
+        # Integer values are exact for any summation order.
+        for ntime, mode in [(10, 'same'), (11, 'same'), (10, 'valid')]:
+            values = self.get_masked_values((ntime, 2, 3), 1)
+            values = np.ma.array(np.round(values.data), mask=values.mask)
+            v = np.array([0.25, 0.5, 2.])
+            fill = np.zeros((1, ntime, 1, 2, 3))
+            Convolve1D._set_convolution_kernel_(kernel, values.reshape(1, ntime, 1, 2, 3), v, mode, fill)
+            for ir, ic in [(0, 1), (1, 2)]:
+                desired = np.convolve(values[:, ir, ic], v, mode=mode)
+                self.assertNumpyAll(fill[0, :desired.shape[0], 0, ir, ic], desired)
+            # Series with all values masked are not convolved.
+            self.assertNumpyAll(fill[0, :, 0, 0, 0], np.zeros(ntime))
+
+    def run_duration(self, kernel):
+        values = self.get_masked_values((90, 4, 5), 2)
+        arr = Duration._get_logical_(values, 0., 'gt')
+        for summary, code in KERNEL_SUMMARIES.items():
+            actual = apply_kernel(kernel, arr, float, code)
+            self.assertNumpyAll(actual, get_run_summary(arr, summary=summary))
+
+    def run_freezethaw(self, kernel):
+        values = self.get_masked_values((200, 3, 4), 3)
+        for threshold in [5., 15.]:
+            actual = apply_kernel(kernel, values, int, threshold)
+            desired = freezethawnd(values, threshold)
+            self.assertNumpyAll(actual[np.invert(desired.mask)], desired.compressed())
+            self.assertEqual(actual[1, 1], freezethaw1d(values[:, 1, 1], threshold))
+
+
+class Test(TestBase):
+    def test_get_kernel(self):
+        self.assertIsNone(get_kernel('a_function_without_a_kernel'))
+
+        # Compiled kernels are not used when Numba is disabled.
+        env.USE_NUMBA = False
+        self.assertIsNone(get_kernel(Duration.key))
+        self.assertIsNotNone(get_kernel(Duration.key, compiled=False))
+
+    def test_register_kernel(self):
+        with self.assertRaises(ValueError):
+            register_kernel(Duration.key)(lambda series, series_mask: 0)
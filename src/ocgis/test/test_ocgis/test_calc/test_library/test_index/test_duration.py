@@ -77,3 +77,22 @@ class TestFrequencyDuration(AbstractCalcBase):
         self.assertEqual(ret.flatten()[0].dtype.names, ('duration', 'count'))
         self.assertNumpyAll(np.array([2, 3, 5]), ret.flatten()[0]['duration'])
         self.assertNumpyAll(np.array([2, 1, 1]), ret.flatten()[0]['count'])
+
+    def test_calculate_matrix(self):
+        fduration = FrequencyDuration()
+        values = np.array([1, 5, 5, 2, 5, 5, 5, 4, 4, 0, 2, 4, 4, 4, 3, 3, 5, 5, 6, 9], dtype=float)
+        values = np.ma.array(values.reshape(5, 2, 2), mask=False)
+        ret = fduration.calculate(values, threshold=4, operation='gte')
+        self.assertEqual(ret.shape, (2, 2))
+        desired = [([4], [1]), ([2], [2]), ([1, 2], [1, 1]), ([1, 2], [1, 1])]
+        for actual, (duration, count) in zip(ret.flat, desired):
+            self.assertEqual(actual['duration'].tolist(), duration)
+            self.assertEqual(actual['count'].tolist(), count)
+
+        # Isolated occurrences are each counted. Cells without occurrences have a zero duration.
+        values = np.ma.array([[5, 1], [1, 1], [5, 1]], mask=False).reshape(3, 1, 2)
+        ret = fduration.calculate(values, threshold=4, operation='gt')
+        self.assertEqual(ret[0, 0]['duration'].tolist(), [1])
+        self.assertEqual(ret[0, 0]['count'].tolist(), [2])
+        self.assertEqual(ret[0, 1]['duration'].tolist(), [0])
+        self.assertEqual(ret[0, 1]['count'].tolist(), [1])
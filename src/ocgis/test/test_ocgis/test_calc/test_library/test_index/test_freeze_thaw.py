@@ -1,7 +1,8 @@
 import numpy as np
 
 import ocgis
-from ocgis.calc.library.index.freeze_thaw import FreezeThaw, freezethaw1d
+from ocgis.calc.library.index import freeze_thaw
+from ocgis.calc.library.index.freeze_thaw import FreezeThaw, freezethaw1d, freezethawnd
 from ocgis.exc import UnitsValidationError
 from ocgis.test.base import AbstractTestField
 
@@ -46,6 +47,35 @@ class TestFreezeThawCycles(AbstractTestField):
                       -5, ])
         self.assertEquals(freezethaw1d(x, 2), 5)
 
+    def test_freezethawnd(self):
+        series = [[0, 7, -1, 8, 0, -15, 0],
+                  [16, -15, 0, 0, 0, 0, 0],
+                  [0, 15, -15, 0, 0, 0, 0],
+                  [-10, 15, 0, -15, 0, 0, 0],
+                  [0, 7, -1, 9, 0, -15, 0],
+                  [1, 1, 1, 1, 1, 1, 1]]
+        x = np.ma.array(series, dtype=float).T.reshape(7, 2, 3)
+        x[3, 1, 2] = np.ma.masked
+        actual = freezethawnd(x, 15)
+        self.assertEqual(actual.shape, (2, 3))
+        self.assertEqual(actual.flatten().tolist(), [0, 1, 1, 1, 1, -1])
+
+        # Test against the series implementation with masked values and small blocks.
+        rng = np.random.RandomState(1)
+        x = np.ma.array(rng.randint(-5, 6, size=(40, 3, 4)).astype(float), mask=rng.rand(40, 3, 4) < 0.2)
+        x.mask[:, 2, 3] = True
+        for block_size in [1, 5, freeze_thaw.BLOCK_SIZE]:
+            original = freeze_thaw.BLOCK_SIZE
+            freeze_thaw.BLOCK_SIZE = block_size
+            try:
+                actual = freezethawnd(x, 4)
+            finally:
+                freeze_thaw.BLOCK_SIZE = original
+            self.assertTrue(actual.mask[2, 3])
+            for idx in np.ndindex(3, 4):
+                if idx != (2, 3):
+                    self.assertEqual(actual[idx], freezethaw1d(x[(slice(None),) + idx], 4))
+
     def test_execute(self):
         # Just a smoke test for the class.
         field = self.get_field(with_value=True, month_count=23, name='tas', units='K')
@@ -74,6 +74,36 @@ class TestDivide(AbstractTestField):
         with self.assertRaises(SampleSizeNotImplemented):
             Divide(field=field, parms={'arr1': 'tmax', 'arr2': 'tmin'}, calc_sample_size=True)
 
+    def test_execute_blocks(self):
+        field = self.get_field(with_value=True, month_count=2)
+        field.add_variable(
+            Variable(value=field['tmax'].get_value() + 5, name='tmin', dimensions=field['tmax'].dimensions))
+        mask = field['tmax'].get_mask(create=True)
+        mask[:, 4, :, 2, 1] = True
+        field['tmax'].set_mask(mask)
+        desired = field['tmax'].get_masked_value() / field['tmin'].get_masked_value()
+
+        # A single row is read and calculated at a time.
+        for block_size in [1, 2000, None]:
+            dv = Divide(field=field, parms={'arr1': 'tmax', 'arr2': 'tmin'})
+            dv.block_size = block_size
+            actual = dv.execute()['divide'].get_masked_value()
+            self.assertNumpyAll(actual.mask, desired.mask)
+            self.assertNumpyAllClose(actual.data, desired.data)
+
+    @attr('data')
+    def test_execute_blocks_from_source(self):
+        field = self.test_data.get_rd('cancm4_tas').get().get_field_slice({'time': slice(0, 10)})
+        desired = self.test_data.get_rd('cancm4_tas').get().get_field_slice({'time': slice(0, 10)})
+        desired = desired['tas'].get_masked_value() / desired['tas'].get_masked_value()
+
+        dv = Divide(field=field, parms={'arr1': 'tas', 'arr2': 'tas'})
+        dv.block_size = 10000
+        actual = dv.execute()['divide'].get_masked_value()
+        self.assertNumpyAllClose(actual, desired)
+        # The source variable is only read in blocks.
+        self.assertFalse(field['tas'].has_allocated_value)
+
     def test_execute_temporal_grouping(self):
         field = self.get_field(with_value=True, month_count=2)
         field.add_variable(
@@ -1,7 +1,14 @@
+import datetime
+import os
+
 import numpy as np
 
 import ocgis
-from ocgis.calc.library.statistics import Mean, FrequencyPercentile, MovingWindow, DailyPercentile
+from ocgis import env
+from ocgis.calc.library.math import Sum
+from ocgis.calc.library.statistics import Mean, FrequencyPercentile, MovingWindow, DailyPercentile, Max, Min, \
+    StandardDeviation
+from ocgis.calc.library.thresholds import Threshold
 from ocgis.collection.field import Field
 from ocgis.constants import OutputFormatName
 from ocgis.exc import DefinitionValidationError
@@ -15,6 +22,11 @@ from ocgis.variable.base import Variable
 
 
 class TestDailyPercentile(AbstractTestField):
+    def get_daily_percentile_object(self):
+        field = self.get_field(with_value=True, month_count=1)
+        field = field.get_field_slice({'realization': 0, 'level': 0})
+        return DailyPercentile(field=field, parms={'percentile': 90, 'window_width': 5})
+
     @attr('data', 'slow')
     def test_system_compute(self):
         rd = self.test_data.get_rd('cancm4_tas')
@@ -51,6 +63,51 @@ class TestDailyPercentile(AbstractTestField):
 
         self.assertAlmostEqual(vc['daily_perc'].get_value().mean(), 0.76756388346354165)
 
+    def test_execute_percentile_cache(self):
+        env.DIR_PERCENTILE_CACHE = os.path.join(self.current_dir_output, 'cache')
+        field = self.get_field(with_value=True, month_count=2)
+        field = field.get_field_slice({'realization': 0, 'level': 0})
+        parms = {'percentile': 90, 'window_width': 5}
+        desired = DailyPercentile(field=field, parms=parms).execute()['daily_perc'].get_masked_value()
+        self.assertEqual(len(os.listdir(env.DIR_PERCENTILE_CACHE)), 1)
+
+        # The basis is loaded from the cache and not recomputed.
+        def _get_daily_percentile_(*args, **kwargs):
+            raise AssertionError('basis should be cached')
+
+        dp = DailyPercentile(field=field, parms=parms)
+        dp.get_daily_percentile_from_date_parts = _get_daily_percentile_
+        actual = dp.execute()['daily_perc'].get_masked_value()
+        self.assertNumpyAll(actual, desired)
+
+        # A different percentile is a different basis.
+        DailyPercentile(field=field, parms={'percentile': 50, 'window_width': 5}).execute()
+        self.assertEqual(len(os.listdir(env.DIR_PERCENTILE_CACHE)), 2)
+
+    def test_get_daily_percentile_masked(self):
+        dt_arr = np.array([datetime.datetime(2000, 1, 1, 12) + datetime.timedelta(days=ii) for ii in range(20)])
+        arr = np.ma.array(np.arange(20 * 2 * 2, dtype=float).reshape(20, 2, 2), mask=False)
+        arr.mask[3, 0, 0] = True
+        dp = self.get_daily_percentile_object()
+        actual = dp.get_daily_percentile(arr, dt_arr, 50, 5)
+        self.assertEqual(len(actual), 20)
+        # The window for January 4th is January 2nd through January 6th. The masked value is excluded.
+        self.assertEqual(actual[1, 4][0, 0], np.median(arr[[1, 2, 4, 5], 0, 0]))
+        self.assertEqual(actual[1, 4][1, 1], np.median(arr[1:6, 1, 1]))
+        # Windows are truncated at the start of the record.
+        self.assertEqual(actual[1, 1][0, 1], np.median(arr[0:3, 0, 1]))
+
+    def test_get_window_membership(self):
+        dt_arr = np.array([datetime.datetime(1999, 12, 20) + datetime.timedelta(days=ii) for ii in range(800)])
+        date_parts = np.array([(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second) for dt in dt_arr])
+        caldays = np.array([[1, 1], [2, 28], [2, 29], [3, 1], [12, 31]])
+        dp = self.get_daily_percentile_object()
+        for only_leap_years in [False, True]:
+            actual = DailyPercentile.get_window_membership(date_parts, caldays, 5, only_leap_years)
+            for (month, day), row in zip(caldays, actual):
+                desired = dp.get_mask_dt_arr(dt_arr, month, day, 0, 5, only_leap_years)
+                self.assertNumpyAll(row, np.invert(desired))
+
     @attr('data')
     def test_get_daily_percentile_from_request_dataset(self):
         rd = self.test_data.get_rd('cancm4_tas')
@@ -84,7 +141,7 @@ class TestMovingWindow(AbstractTestField):
         self.assertNumpyAllClose(ret, desired)
         ret = ret.squeeze()
         values = values.squeeze()
-        self.assertEqual(ret[4], np.mean(values[2:7]))
+        self.assertAlmostEqual(ret[4], np.mean(values[2:7]))
 
     def test_execute(self):
         field = self.get_field(month_count=1, with_value=True)
@@ -204,6 +261,31 @@ class TestFrequencyPercentile(AbstractTestField):
                                              mask=False, fill_value=1e+20))
 
 
+class TestBatchedReduction(AbstractTestField):
+    def test_execute(self):
+        """Test batched temporal group reductions match the per-group calculation."""
+
+        keywords = dict(klass=[Mean, Max, Min, Sum, StandardDeviation, FrequencyPercentile, Threshold],
+                        grouping=[['month'], 'all', [[12, 1], [2]]])
+        parms = {FrequencyPercentile: {'percentile': 75}, Threshold: {'threshold': 0.5, 'operation': 'gte'}}
+        for k in itr_products_keywords(keywords, as_namedtuple=True):
+            field = self.get_field(with_value=True, month_count=2)
+            mask = field['tmax'].get_mask(create=True)
+            mask[:, 3:9, :, 1, 1] = True
+            field['tmax'].set_mask(mask)
+            tgd = field.temporal.get_grouping(k.grouping)
+            fill = {}
+            for batched in [True, False]:
+                calc = k.klass(field=field, tgd=tgd, parms=parms.get(k.klass), calc_sample_size=True)
+                calc.batched_reduction = batched
+                fill[batched] = calc.execute()
+            for key in [calc.alias, 'n_{}'.format(calc.alias)]:
+                actual = fill[True][key].get_masked_value()
+                desired = fill[False][key].get_masked_value()
+                self.assertNumpyAll(actual.mask, desired.mask)
+                self.assertNumpyAllClose(actual.data, desired.data)
+
+
 class TestMean(AbstractTestField):
     @attr('data')
     def test_system_file_only_through_operations(self):
@@ -242,6 +324,21 @@ class TestMean(AbstractTestField):
         self.assertNumpyAll(np.mean(field['tmax'].get_value()[1, tgd.dgroups[1], 0, :, :], axis=0),
                             dv.get_value()[1, 1, 0, :, :])
 
+    def test_execute_empty_group(self):
+        """Test temporal groups are reduced one at a time if a group is empty."""
+
+        field = self.get_field(with_value=True, month_count=2)
+        tgd = field.temporal.get_grouping(['month'])
+        dgroups = tgd.dgroups
+        tgd.dgroups = [dgroups[0], np.zeros_like(dgroups[1])]
+        self.assertIsNone(tgd.get_group_indices(field.temporal.shape[0]))
+
+        mu = Mean(field=field, tgd=tgd, alias='my_mean', dtype=np.float64)
+        dv = mu.execute()['my_mean']
+        self.assertEqual(dv.get_value().shape, (2, 2, 2, 3, 4))
+        self.assertNumpyAll(np.ma.mean(field['tmax'].get_value()[1, dgroups[0], 0, :, :], axis=0).data,
+                            dv.get_value()[1, 0, 0, :, :])
+
     @attr('data')
     def test_execute_file_only(self):
         rd = self.test_data.get_rd('cancm4_tas')
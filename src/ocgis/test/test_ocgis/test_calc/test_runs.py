@@ -0,0 +1,65 @@
+import itertools
+
+import numpy as np
+
+from ocgis.calc.runs import get_runs, get_run_offsets, get_run_summary, get_run_frequencies
+from ocgis.test.base import TestBase
+
+
+class TestRuns(TestBase):
+    def get_logical(self):
+        np.random.seed(1)
+        arr = np.random.rand(40, 3, 4) > 0.4
+        # One element without runs and one element with a single run.
+        arr[:, 0, 0] = False
+        arr[:, 1, 1] = True
+        return arr
+
+    def iter_desired_runs(self, arr):
+        for ii, jj in itertools.product(*[range(s) for s in arr.shape[1:]]):
+            yield [len(list(g)) for k, g in itertools.groupby(arr[:, ii, jj]) if k]
+
+    def test_get_runs(self):
+        arr = np.array([True, True, False, True, False, False, True]).reshape(-1, 1, 1)
+        element, start, length = get_runs(arr)
+        self.assertEqual(element.tolist(), [0, 0, 0])
+        self.assertEqual(start.tolist(), [0, 3, 6])
+        self.assertEqual(length.tolist(), [2, 1, 1])
+
+        # Test masked values end runs.
+        arr = np.ma.array([True, True, True], mask=[False, True, False]).reshape(-1, 1)
+        _, _, length = get_runs(arr)
+        self.assertEqual(length.tolist(), [1, 1])
+
+    def test_get_run_offsets(self):
+        counts, offsets = get_run_offsets(np.array([0, 0, 2, 2, 2]), 4)
+        self.assertEqual(counts.tolist(), [2, 0, 3, 0])
+        self.assertEqual(offsets.tolist(), [0, 2, 2, 5])
+
+    def test_get_run_summary(self):
+        arr = self.get_logical()
+        for summary in ['mean', 'median', 'std', 'max', 'min']:
+            actual = get_run_summary(arr, summary=summary)
+            self.assertEqual(actual.shape, (3, 4))
+            for actual_element, runs in zip(actual.flat, self.iter_desired_runs(arr)):
+                if len(runs) == 0:
+                    desired = 0
+                elif len(runs) == 1:
+                    desired = runs[0]
+                else:
+                    desired = getattr(np, summary)(runs)
+                self.assertAlmostEqual(actual_element, desired)
+
+        with self.assertRaises(ValueError):
+            get_run_summary(arr, summary='foo')
+
+    def test_get_run_frequencies(self):
+        arr = self.get_logical()
+        element, length, count = get_run_frequencies(arr)
+        for idx, runs in enumerate(self.iter_desired_runs(arr)):
+            select = element == idx
+            if len(runs) == 0:
+                runs = [0]
+            desired_length, desired_count = np.unique(runs, return_counts=True)
+            self.assertEqual(length[select].tolist(), desired_length.tolist())
+            self.assertEqual(count[select].tolist(), desired_count.tolist())
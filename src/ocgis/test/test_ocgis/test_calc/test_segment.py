@@ -0,0 +1,65 @@
+import numpy as np
+
+from ocgis.calc.segment import get_segment_counts, segment_sum, segment_mean, segment_std, segment_max, \
+    segment_min, get_segment_lengths, iter_segments, segment_var, SegmentStatistics
+from ocgis.test.base import TestBase
+
+
+class TestSegment(TestBase):
+    def get_segmented(self):
+        np.random.seed(1)
+        values = np.random.rand(40, 3, 4)
+        mask = np.random.rand(40, 3, 4) < 0.3
+        # Fully mask a segment for one element.
+        mask[10:15, 0, 0] = True
+        values = np.ma.array(values, mask=mask)
+        offsets = np.array([0, 10, 15, 27])
+        return values, offsets
+
+    def test_get_segment_counts(self):
+        values, offsets = self.get_segmented()
+        actual = get_segment_counts(values, offsets)
+        self.assertEqual(actual.shape, (4, 3, 4))
+        self.assertEqual(actual[1, 0, 0], 0)
+        self.assertEqual(actual.sum(), np.invert(values.mask).sum())
+
+    def test_get_segment_lengths(self):
+        actual = get_segment_lengths(np.array([0, 10, 15, 27]), 40)
+        self.assertEqual(actual.tolist(), [10, 5, 12, 13])
+
+    def test_iter_segments(self):
+        values, offsets = self.get_segmented()
+        actual = [s.shape[0] for s in iter_segments(values, offsets)]
+        self.assertEqual(actual, [10, 5, 12, 13])
+
+    def test_segment_reductions(self):
+        values, offsets = self.get_segmented()
+        stops = np.append(offsets[1:], values.shape[0])
+        keywords = [(segment_sum, np.ma.sum), (segment_mean, np.ma.mean), (segment_var, np.ma.var),
+                    (segment_std, np.ma.std), (segment_max, np.ma.max), (segment_min, np.ma.min)]
+        for segment_func, ma_func in keywords:
+            actual = segment_func(values, offsets)
+            desired = np.ma.array([ma_func(values[start:stop], axis=0) for start, stop in zip(offsets, stops)])
+            self.assertNumpyAll(actual.mask, np.ma.getmaskarray(desired))
+            if segment_func in (segment_sum, segment_mean):
+                # Sums match the masked array summation order exactly.
+                self.assertNumpyAll(actual.compressed(), desired.compressed())
+            else:
+                self.assertNumpyAllClose(actual.compressed(), desired.compressed())
+
+    def test_segment_statistics(self):
+        values, offsets = self.get_segmented()
+        statistics = SegmentStatistics(values, offsets)
+        self.assertNumpyAll(statistics.counts, get_segment_counts(values, offsets))
+
+        keywords = [('sum', segment_sum), ('mean', segment_mean), ('var', segment_var), ('std', segment_std),
+                    ('max', segment_max), ('min', segment_min)]
+        for name, segment_func in keywords:
+            actual = getattr(statistics, name)()
+            desired = segment_func(values, offsets)
+            self.assertNumpyAll(actual.mask, desired.mask)
+            self.assertNumpyAll(actual.compressed(), desired.compressed())
+
+        # Test intermediate reductions are shared.
+        self.assertIs(statistics.mean(), statistics.mean())
+        self.assertNumpyAll(statistics.var(ddof=1).compressed(), segment_var(values, offsets, ddof=1).compressed())
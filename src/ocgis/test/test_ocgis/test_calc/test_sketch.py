@@ -0,0 +1,75 @@
+import numpy as np
+
+from ocgis.calc.sketch import QuantileSketch, get_sketch_percentile
+from ocgis.test.base import TestBase
+
+
+class TestQuantileSketch(TestBase):
+    def test_init(self):
+        sketch = QuantileSketch((2, 3), error=0.05)
+        self.assertEqual(sketch.size, 20)
+        self.assertNumpyAll(sketch.count, np.zeros((2, 3)))
+
+        for error in [0, 1, -0.1]:
+            with self.assertRaises(ValueError):
+                QuantileSketch((2, 3), error=error)
+
+    def test_merge(self):
+        rs = np.random.RandomState(1)
+        values = rs.rand(2000, 3)
+        desired = QuantileSketch((3,), error=0.01)
+        desired.update(values)
+
+        # Sketches of disjoint chunks are merged.
+        sketch = QuantileSketch((3,), error=0.01)
+        for chunk in [values[:700], values[700:]]:
+            other = QuantileSketch((3,), error=0.01)
+            other.update(chunk)
+            sketch.merge(other)
+        self.assertNumpyAll(sketch.count, np.array([2000., 2000., 2000.]))
+        np.testing.assert_allclose(sketch.percentile(50).data, np.percentile(values, 50, axis=0), atol=0.02)
+        np.testing.assert_allclose(sketch.percentile(50).data, desired.percentile(50).data, atol=0.02)
+
+        with self.assertRaises(ValueError):
+            sketch.merge(QuantileSketch((3,), error=0.1))
+
+    def test_percentile(self):
+        rs = np.random.RandomState(2)
+
+        # Percentiles are exact if there are fewer values than centroids.
+        values = rs.rand(50, 2, 3)
+        sketch = QuantileSketch((2, 3), error=0.01)
+        sketch.update(values)
+        for percentile in [0, 10, 50, 75.5, 100]:
+            self.assertNumpyAllClose(sketch.percentile(percentile).data, np.percentile(values, percentile, axis=0))
+
+        # Rank error is bounded for continuous values.
+        values = rs.normal(size=(5000, 4))
+        sketch = QuantileSketch((4,), error=0.01)
+        for start in range(0, 5000, 300):
+            sketch.update(values[start:start + 300])
+        for percentile in [1, 25, 50, 90, 99]:
+            actual = sketch.percentile(percentile)
+            rank = np.mean(values <= actual.data, axis=0)
+            self.assertTrue(np.all(np.abs(rank - percentile / 100.) <= 0.01))
+
+    def test_percentile_masked(self):
+        values = np.ma.array(np.arange(24, dtype=float).reshape(6, 2, 2), mask=False)
+        values.mask[:, 0, 0] = True
+        values.mask[2:, 1, 1] = True
+        sketch = QuantileSketch((2, 2))
+        sketch.update(values)
+        self.assertNumpyAll(sketch.count, np.array([[0., 6.], [6., 2.]]))
+
+        actual = sketch.percentile(50)
+        desired = np.ma.median(values, axis=0)
+        self.assertNumpyAll(actual.mask, desired.mask)
+        self.assertNumpyAllClose(actual.compressed(), desired.compressed())
+
+
+class Test(TestBase):
+    def test_get_sketch_percentile(self):
+        rs = np.random.RandomState(3)
+        values = np.ma.array(rs.rand(30, 2, 2), mask=False)
+        actual = get_sketch_percentile(values, 90, 0.02, block_size=7)
+        self.assertNumpyAllClose(actual.data, np.percentile(values.data, 90, axis=0))
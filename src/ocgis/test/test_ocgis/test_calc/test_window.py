@@ -0,0 +1,55 @@
+import numpy as np
+
+from ocgis.calc.window import get_window_indices, get_window_counts, window_sum, window_mean, window_var, \
+    window_std, window_max, window_min, window_median
+from ocgis.test.base import TestBase
+
+
+class TestWindow(TestBase):
+    def get_values(self):
+        np.random.seed(1)
+        values = np.random.rand(30, 3, 4)
+        mask = np.random.rand(30, 3, 4) < 0.3
+        # Fully mask a window for one element.
+        mask[10:17, 0, 0] = True
+        return np.ma.array(values, mask=mask)
+
+    def test_get_window_indices(self):
+        start, stop, is_valid = get_window_indices(6, 3, mode='same')
+        self.assertEqual(start.tolist(), [0, 0, 1, 2, 3, 4])
+        self.assertEqual(stop.tolist(), [2, 3, 4, 5, 6, 6])
+        self.assertTrue(is_valid.all())
+
+        _, _, is_valid = get_window_indices(6, 5, mode='valid')
+        self.assertEqual(is_valid.tolist(), [False, False, True, True, False, False])
+
+        with self.assertRaises(AssertionError):
+            get_window_indices(6, 4)
+        with self.assertRaises(NotImplementedError):
+            get_window_indices(6, 3, mode='full')
+
+    def test_get_window_counts(self):
+        values = self.get_values()
+        actual = get_window_counts(values, 5, mode='same')
+        self.assertEqual(actual.shape, values.shape)
+        self.assertEqual(actual[13, 0, 0], 0)
+
+    def test_window_reductions(self):
+        values = self.get_values()
+        keywords = [(window_sum, np.ma.sum), (window_mean, np.ma.mean), (window_var, np.ma.var),
+                    (window_std, np.ma.std), (window_max, np.ma.max), (window_min, np.ma.min),
+                    (window_median, np.ma.median)]
+        for mode in ['same', 'valid']:
+            start, stop, is_valid = get_window_indices(values.shape[0], 5, mode=mode)
+            for window_func, ma_func in keywords:
+                actual = window_func(values, 5, mode=mode)
+                desired = np.ma.array([ma_func(values[ii:jj], axis=0) for ii, jj in zip(start, stop)])
+                desired[np.invert(is_valid)] = np.ma.masked
+                self.assertNumpyAll(actual.mask, np.ma.getmaskarray(desired))
+                self.assertNumpyAllClose(actual.compressed(), desired.compressed())
+
+    def test_window_reductions_short(self):
+        # No element has a full window.
+        values = np.ma.array([1., 2.], mask=False)
+        self.assertTrue(window_mean(values, 3, mode='valid').mask.all())
+        self.assertEqual(window_max(values, 3, mode='same').tolist(), [2., 2.])
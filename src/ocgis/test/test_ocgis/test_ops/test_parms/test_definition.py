@@ -7,6 +7,7 @@ from ocgis.conv.numpy_ import NumpyConverter
 from ocgis.ops.parms.base import AbstractParameter
 from ocgis.ops.parms.definition import *
 from ocgis.ops.query import QueryInterface
+from ocgis.regrid.weights import RegridWeights
 from ocgis.spatial.geom_cabinet import GeomCabinet
 from ocgis.test.base import TestBase, attr
 from ocgis.util.helpers import make_poly
@@ -882,6 +883,15 @@ class TestRegridOptions(TestBase):
         with self.assertRaises(DefinitionValidationError):
             RegridOptions({'foo': 5})
 
+        # Test regrid weights are allowed.
+        weights = RegridWeights([0], [0], [1.], (1, 1), (1, 1))
+        value = {'weights': weights}
+        ro = RegridOptions(value)
+        self.assertIs(ro.value['weights'], weights)
+        self.assertIsNot(ro.value, value)
+        with self.assertRaises(DefinitionValidationError):
+            RegridOptions({'weights': 5})
+
     def test_get_meta(self):
         ro = RegridOptions()
         ro._get_meta_()
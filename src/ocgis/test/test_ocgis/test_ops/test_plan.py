@@ -0,0 +1,72 @@
+from ocgis import RequestDataset, MultiRequestDataset
+from ocgis.ops.core import OcgOperations
+from ocgis.ops.plan import OperationsPlan, get_resolved_request_dataset
+from ocgis.test.base import TestBase, create_gridxy_global, create_exact_field
+from ocgis.variable.crs import Spherical
+
+
+class TestOperationsPlan(TestBase):
+    def get_request_dataset(self, name='foo'):
+        path = self.get_temporary_file_path('{}.nc'.format(name))
+        field = create_exact_field(create_gridxy_global(resolution=10.0), name, ntime=4, crs=Spherical())
+        field.write(path)
+        return RequestDataset(uri=path, variable=name)
+
+    def test_init(self):
+        rd = self.get_request_dataset()
+        plan = OperationsPlan(rd, output_format='numpy')
+        self.assertEqual(len(plan.dataset), 1)
+        self.assertEqual(plan.defaults, {'output_format': 'numpy'})
+        self.assertIsNotNone(plan.dataset[0]._metadata)
+        self.assertIsNotNone(plan.dataset[0]._dimension_map)
+        self.assertEqual(plan.dataset[0]._crs, Spherical())
+
+    def test_execute(self):
+        rd = self.get_request_dataset()
+        plan = OperationsPlan(rd, output_format='numpy')
+
+        # Test parameters are re-bound per request and match a standard operation.
+        for geom in [[-30., -30., 30., 30.], [100., 0., 130., 40.]]:
+            actual = plan.execute(geom=geom)
+            desired = OcgOperations(dataset=self.get_request_dataset(), output_format='numpy', geom=geom).execute()
+            actual = actual.get_element(variable_name='foo').get_value()
+            desired = desired.get_element(variable_name='foo').get_value()
+            self.assertNumpyAll(actual, desired)
+
+        # Metadata is shared between requests.
+        ops = plan.get_operations(geom=[-30., -30., 30., 30.])
+        self.assertEqual(list(ops.dataset)[0].metadata, plan.dataset[0].metadata)
+        self.assertIs(list(ops.dataset)[0].driver, plan.dataset[0].driver)
+
+    def test_get_operations(self):
+        plan = OperationsPlan(self.get_request_dataset(), output_format='numpy')
+        ops = plan.get_operations(output_format='nc', prefix='bar')
+        self.assertEqual(ops.output_format, 'nc')
+        self.assertEqual(ops.prefix, 'bar')
+        self.assertEqual(plan.defaults, {'output_format': 'numpy'})
+
+        with self.assertRaises(ValueError):
+            plan.get_operations(dataset=self.get_request_dataset())
+
+
+class Test(TestBase):
+    def test_get_resolved_request_dataset(self):
+        paths = []
+        for name in ['foo', 'bar']:
+            path = self.get_temporary_file_path('{}.nc'.format(name))
+            field = create_exact_field(create_gridxy_global(resolution=30.0), name, crs=Spherical())
+            field.write(path)
+            paths.append(path)
+
+        rd = get_resolved_request_dataset(RequestDataset(paths[0]))
+        self.assertIsNotNone(rd._metadata)
+        self.assertEqual(rd._crs, Spherical())
+
+        mrd = MultiRequestDataset([RequestDataset(p) for p in paths])
+        mrd = get_resolved_request_dataset(mrd)
+        for rd in mrd.request_datasets:
+            self.assertIsNotNone(rd._metadata)
+
+        # Objects other than request datasets are returned unchanged.
+        field = create_exact_field(create_gridxy_global(resolution=30.0), 'foo')
+        self.assertIs(get_resolved_request_dataset(field), field)
@@ -1,8 +1,10 @@
+import os
 from copy import deepcopy
 
 import numpy as np
 
 from ocgis import OcgOperations
+from ocgis import env
 from ocgis import RequestDataset
 from ocgis import Variable
 from ocgis.collection.field import Field
@@ -126,6 +128,60 @@ class TestRegrid(TestSimpleBase):
                 self.assertNumpyAll(variable.get_value(), source[variable.name].get_value().squeeze())
                 self.assertFalse(np.may_share_memory(variable.get_value(), source[variable.name].get_value()))
 
+    @attr('esmf')
+    def test_regrid_field_weights(self):
+        """Test regrid weights are reused across calls."""
+        from ocgis.regrid.base import regrid_field, get_regrid_weights
+
+        source = self.get_ofield()
+        source.set_crs(Spherical())
+        destination = deepcopy(source)
+
+        weights = get_regrid_weights(source, destination)
+        self.assertEqual(weights.src_shape, source.grid.shape)
+        self.assertTrue(weights.mapped.all())
+
+        desired = regrid_field(source, destination)
+        actual = regrid_field(source, destination, weights=weights)
+        for variable in actual.data_variables:
+            self.assertNumpyAll(variable.get_masked_value(), desired[variable.name].get_masked_value())
+
+        # Test weights must match the grids.
+        destination = destination.grid[0:2, 0:2].parent
+        with self.assertRaises(RegriddingError):
+            regrid_field(source, destination, weights=weights)
+
+    @attr('esmf')
+    def test_get_regrid_weights_cache(self):
+        """Test regrid weights are cached by grid, mask, and regrid method."""
+        from ocgis.regrid.base import get_regrid_weights
+
+        source = self.get_ofield()
+        source.set_crs(Spherical())
+        destination = deepcopy(source)
+
+        directory = os.path.join(self.current_dir_output, 'cache')
+        env.DIR_REGRID_WEIGHT_CACHE = directory
+        desired = get_regrid_weights(source, destination)
+        self.assertEqual(len(os.listdir(directory)), 1)
+        actual = get_regrid_weights(source, destination)
+        self.assertEqual(len(os.listdir(directory)), 1)
+        for attr_name in ['row', 'col', 'factor']:
+            self.assertNumpyAll(getattr(actual, attr_name), getattr(desired, attr_name))
+
+        value_mask = np.zeros(source.grid.shape, dtype=bool)
+        value_mask[0, 0] = True
+        get_regrid_weights(source, destination, value_mask=value_mask)
+        self.assertEqual(len(os.listdir(directory)), 2)
+
+    @attr('esmf')
+    def test_get_flat_index_from_esmf_sequence_index(self):
+        from ocgis.regrid.base import get_flat_index_from_esmf_sequence_index
+
+        # ESMF sequence indices are one-based and Fortran ordered.
+        actual = get_flat_index_from_esmf_sequence_index(np.array([1, 2, 3, 4, 5, 6]), (2, 3))
+        self.assertNumpyAll(actual, np.array([0, 3, 1, 4, 2, 5]))
+
     @attr('esmf')
     def test_iter_regridded_field_with_corners(self):
         """Test with_corners as True and False when regridding Fields."""
@@ -545,6 +601,7 @@ class TestRegridOperation(AbstractTestInterface):
             destination_field = self.get_regridding_field(destination_grid, 'destination')
             ro = RegridOperation(source_field, destination_field)
             res = ro.execute()
+            self.assertEqual(ro.weights.dst_shape, destination_grid.shape)
 
             actual = res['source'].get_masked_value()
             targets = [actual.min(), actual.mean(), actual.max()]
@@ -0,0 +1,132 @@
+from copy import deepcopy
+
+import numpy as np
+
+from ocgis.exc import CornersInconsistentError, RegriddingError
+from ocgis.regrid import native
+from ocgis.regrid.native import get_native_regrid_weights
+from ocgis.spatial.grid import expand_grid
+from ocgis.test.base import TestBase, attr, create_gridxy_global
+
+
+class TestGetNativeRegridWeights(TestBase):
+    def get_area(self, grid):
+        # Cell areas on the unit sphere in degrees of longitude.
+        x_bounds = grid.x.bounds.get_value()
+        y_bounds = np.sin(np.deg2rad(grid.y.bounds.get_value()))
+        return np.outer(np.ptp(y_bounds, axis=1), np.ptp(x_bounds, axis=1))
+
+    def get_curvilinear(self, grid):
+        grid = deepcopy(grid)
+        expand_grid(grid)
+        self.assertFalse(grid.is_vectorized)
+        return grid
+
+    def test_conserve(self):
+        # Source and destination longitudes use different conventions.
+        src = create_gridxy_global(resolution=2., dist=False)
+        dst = create_gridxy_global(resolution=5., wrapped=False, dist=False)
+        weights = get_native_regrid_weights(src, dst)
+        self.assertEqual(weights.regrid_method, 'conserve')
+        self.assertTrue(weights.mapped.all())
+
+        values = np.random.RandomState(1).rand(*src.shape)
+        actual = weights.apply(values)
+        self.assertNumpyAllClose(weights.apply(np.ones(src.shape)).data, np.ones(dst.shape))
+        self.assertAlmostEqual((self.get_area(src) * values).sum(), (self.get_area(dst) * actual).sum())
+
+        # Test curvilinear grids produce the same weights.
+        curvilinear = get_native_regrid_weights(self.get_curvilinear(src), self.get_curvilinear(dst))
+        self.assertEqual(curvilinear.nnz, weights.nnz)
+        self.assertNumpyAllClose(curvilinear.apply(values).data, actual.data)
+
+    def test_bilinear(self):
+        src = create_gridxy_global(resolution=3., dist=False)
+        dst = create_gridxy_global(resolution=7., wrapped=False, with_bounds=False, dist=False)
+        src_value = src.get_value_stacked()
+        dst_value = dst.get_value_stacked()
+
+        weights = get_native_regrid_weights(src, dst)
+        self.assertEqual(weights.regrid_method, 'bilinear')
+        self.assertTrue(weights.mapped.all())
+
+        # Bilinear weights reproduce linear fields.
+        actual = weights.apply(2. * src_value[0] + 0.5)
+        self.assertNumpyAllClose(actual.data, 2. * dst_value[0] + 0.5)
+
+        curvilinear = get_native_regrid_weights(self.get_curvilinear(src), dst, regrid_method='bilinear')
+        values = np.cos(np.deg2rad(src_value[1])) * src_value[0]
+        self.assertNumpyAllClose(curvilinear.apply(values).data, weights.apply(values).data)
+
+    def test_mask(self):
+        src = create_gridxy_global(resolution=10., dist=False)
+        dst = create_gridxy_global(resolution=20., dist=False)
+        src_mask = np.zeros(src.shape, dtype=bool)
+        src_mask[0:3, :] = True
+        dst_mask = np.zeros(dst.shape, dtype=bool)
+        dst_mask[4, 5] = True
+
+        for regrid_method in ['conserve', 'bilinear']:
+            weights = get_native_regrid_weights(src, dst, regrid_method=regrid_method, src_mask=src_mask,
+                                                dst_mask=dst_mask)
+            self.assertFalse(src_mask.reshape(-1)[weights.col].any())
+            self.assertFalse(weights.mapped[4, 5])
+            if regrid_method == 'conserve':
+                # Destination cells partially covered by masked source cells keep their unmasked fraction.
+                self.assertTrue(weights.mapped[1, 0])
+            else:
+                self.assertFalse(weights.mapped[1, 0])
+
+        # Test the grid mask is used by default.
+        src.set_mask(src_mask)
+        weights = get_native_regrid_weights(src, dst)
+        self.assertFalse(weights.mapped[0, 0])
+
+    def test_n_workers(self):
+        src = create_gridxy_global(resolution=10., dist=False)
+        dst = create_gridxy_global(resolution=15., dist=False)
+        desired = get_native_regrid_weights(src, dst)
+
+        tile_size = native.TILE_SIZE
+        try:
+            native.TILE_SIZE = 50
+            for n_workers in [1, 2]:
+                actual = get_native_regrid_weights(src, dst, n_workers=n_workers)
+                for attr_name in ['row', 'col', 'factor']:
+                    self.assertNumpyAll(getattr(actual, attr_name), getattr(desired, attr_name))
+        finally:
+            native.TILE_SIZE = tile_size
+
+        with self.assertRaises(ValueError):
+            get_native_regrid_weights(src, dst, n_workers=0)
+
+    def test_regrid_method(self):
+        src = create_gridxy_global(resolution=10., dist=False)
+        dst = create_gridxy_global(resolution=15., with_bounds=False, dist=False)
+        with self.assertRaises(CornersInconsistentError):
+            get_native_regrid_weights(src, dst, regrid_method='conserve')
+        with self.assertRaises(RegriddingError):
+            get_native_regrid_weights(src, dst, regrid_method='patch')
+
+    @attr('esmf')
+    def test_system_esmf(self):
+        """Test native weights are close to ESMF weights."""
+        from ESMF import RegridMethod
+        from ocgis.regrid.base import _create_esmf_regrid_weights_
+        from ocgis.collection.field import Field
+        from ocgis.variable.crs import Spherical
+
+        src = create_gridxy_global(resolution=4., crs=Spherical(), dist=False)
+        dst = create_gridxy_global(resolution=6., crs=Spherical(), dist=False)
+        src_value = src.get_value_stacked()
+        values = np.cos(np.deg2rad(src_value[0])) * np.sin(np.deg2rad(src_value[1]))
+
+        for regrid_method, esmf_regrid_method in [('conserve', RegridMethod.CONSERVE), ('bilinear', None)]:
+            native_weights = get_native_regrid_weights(src, dst, regrid_method=regrid_method)
+            source = Field(grid=deepcopy(src))
+            destination = Field(grid=deepcopy(dst))
+            esmf_weights = _create_esmf_regrid_weights_(source, destination, esmf_regrid_method, None, None)
+            mapped = np.logical_and(native_weights.mapped, esmf_weights.mapped)
+            self.assertGreater(mapped.sum(), 0.9 * mapped.size)
+            diff = np.abs(native_weights.apply(values) - esmf_weights.apply(values))[mapped]
+            self.assertLess(diff.max(), 0.05)
@@ -0,0 +1,135 @@
+import os
+
+import numpy as np
+
+from ocgis import env
+from ocgis.regrid.weights import RegridWeights, RegridWeightCache, get_weight_fingerprint, get_cached_weights
+from ocgis.test.base import TestBase, AbstractTestInterface
+
+
+class TestRegridWeights(TestBase):
+    def get_weights(self):
+        # Destination elements are the mean of two source elements. The last destination element is unmapped.
+        row = [2, 0, 0, 1, 1, 2]
+        col = [4, 0, 1, 2, 3, 5]
+        factor = [0.5] * 6
+        return RegridWeights(row, col, factor, (2, 3), (2, 2))
+
+    def test_init(self):
+        weights = self.get_weights()
+        self.assertEqual(weights.nnz, 6)
+        self.assertNumpyAll(weights.row, np.array([0, 0, 1, 1, 2, 2]))
+        self.assertNumpyAll(weights.col, np.array([0, 1, 2, 3, 4, 5]))
+        self.assertNumpyAll(weights.mapped, np.array([[True, True], [True, False]]))
+
+        with self.assertRaises(ValueError):
+            RegridWeights([0, 1], [0], [1.], (2, 3), (2, 2))
+        with self.assertRaises(ValueError):
+            RegridWeights([4], [0], [1.], (2, 3), (2, 2))
+
+    def test_apply(self):
+        weights = self.get_weights()
+        values = np.arange(24, dtype=float).reshape(4, 2, 3)
+        desired = values.reshape(4, 3, 2).mean(axis=-1)
+        desired = np.append(desired, np.zeros((4, 1)), axis=1).reshape(4, 2, 2)
+
+        for block_size in [None, 6, 13, 1000]:
+            actual = weights.apply(values, block_size=block_size)
+            self.assertNumpyAll(actual.data, desired)
+            self.assertTrue(np.all(actual.mask[:, 1, 1]))
+            self.assertEqual(actual.mask.sum(), 4)
+
+        # Test without leading dimensions and with a fill value.
+        actual = weights.apply(values[0], fill_value=1e20)
+        self.assertEqual(actual.shape, (2, 2))
+        self.assertEqual(actual.data[1, 1], 1e20)
+
+        with self.assertRaises(ValueError):
+            weights.apply(np.zeros((3, 2)))
+
+    def test_apply_empty(self):
+        weights = RegridWeights([], [], [], (2, 3), (2, 2))
+        actual = weights.apply(np.ones((2, 3)))
+        self.assertTrue(actual.mask.all())
+
+    def test_write(self):
+        weights = self.get_weights()
+        weights.regrid_method = 'bilinear'
+        path = self.get_temporary_file_path('weights.nc')
+        weights.write(path)
+
+        # Test the file follows ESMF/SCRIP conventions.
+        with self.nc_scope(path) as ds:
+            self.assertNumpyAll(np.ma.getdata(ds.variables['src_grid_dims'][:]), np.array([3, 2], dtype=np.int32))
+            self.assertNumpyAll(np.ma.getdata(ds.variables['row'][:]), np.array([1, 1, 2, 2, 3, 3], dtype=np.int32))
+            self.assertEqual(len(ds.dimensions['n_s']), 6)
+
+        actual = RegridWeights.from_file(path)
+        self.assertEqual(actual.src_shape, (2, 3))
+        self.assertEqual(actual.dst_shape, (2, 2))
+        self.assertEqual(actual.regrid_method, 'bilinear')
+        for attr in ['row', 'col', 'factor']:
+            self.assertNumpyAll(getattr(actual, attr), getattr(weights, attr))
+        values = np.arange(6.).reshape(2, 3)
+        self.assertNumpyAll(actual.apply(values), weights.apply(values))
+
+
+class TestRegridWeightCache(AbstractTestInterface):
+    def test_get_weights(self):
+        directory = os.path.join(self.current_dir_output, 'cache')
+        cache = RegridWeightCache(directory, max_size=2)
+        self.assertTrue(os.path.isdir(directory))
+
+        def _create_():
+            raise AssertionError('weights should be cached')
+
+        weights = RegridWeights([0, 1], [1, 0], [1., 0.5], (1, 2), (2, 1))
+        fingerprint = get_weight_fingerprint('first')
+        cache.get_weights(fingerprint, lambda: weights)
+        self.assertTrue(os.path.exists(os.path.join(directory, fingerprint + '.nc')))
+        actual = cache.get_weights(fingerprint, _create_)
+        self.assertNumpyAll(actual.factor, weights.factor)
+        self.assertEqual(actual.dst_shape, (2, 1))
+
+        # Test empty weights.
+        empty = RegridWeights([], [], [], (1, 2), (2, 1))
+        fingerprint_empty = get_weight_fingerprint('empty')
+        cache.get_weights(fingerprint_empty, lambda: empty)
+        self.assertEqual(cache.get_weights(fingerprint_empty, _create_).nnz, 0)
+
+        # Test least recently used weights are evicted.
+        cache.get_weights(get_weight_fingerprint('other'), lambda: weights)
+        self.assertFalse(os.path.exists(os.path.join(directory, fingerprint + '.nc')))
+        self.assertTrue(os.path.exists(os.path.join(directory, fingerprint_empty + '.nc')))
+
+    def test_get_cached_weights(self):
+        weights = RegridWeights([0], [0], [1.], (1, 1), (1, 1))
+        self.assertIsNone(env.DIR_REGRID_WEIGHT_CACHE)
+        self.assertEqual(get_cached_weights(lambda: weights, 'a'), weights)
+
+        directory = os.path.join(self.current_dir_output, 'cache')
+        env.DIR_REGRID_WEIGHT_CACHE = directory
+        get_cached_weights(lambda: weights, 'a')
+        self.assertEqual(os.listdir(directory), [get_weight_fingerprint('a') + '.nc'])
+
+    def test_get_weight_fingerprint(self):
+        grid = self.get_gridxy()
+        desired = get_weight_fingerprint(grid, 'auto', None)
+        self.assertEqual(get_weight_fingerprint(grid, 'auto', None), desired)
+        self.assertNotEqual(get_weight_fingerprint(grid, 'auto', np.zeros(grid.shape, dtype=bool)), desired)
+        self.assertNotEqual(get_weight_fingerprint(grid, None, None), desired)
+
+        # Test bounds are part of the fingerprint regardless of the grid abstraction.
+        grid_bounds = self.get_gridxy(with_xy_bounds=True)
+        grid_bounds.abstraction = 'point'
+        self.assertNotEqual(get_weight_fingerprint(grid_bounds, 'auto', None), desired)
+
+        # Test a missing grid mask and an all-false grid mask have the same fingerprint.
+        mask = np.zeros(grid.shape, dtype=bool)
+        grid.set_mask(mask)
+        self.assertEqual(get_weight_fingerprint(grid, 'auto', None), desired)
+
+        # Test the grid mask is part of the fingerprint.
+        mask[0, 0] = True
+        grid.set_mask(mask)
+        self.assertNotEqual(get_weight_fingerprint(grid, 'auto', None), desired)
@@ -1,4 +1,5 @@
 import itertools
+import os
 import sys
 from copy import deepcopy
 from unittest import SkipTest
@@ -11,13 +12,14 @@ from shapely.geometry import Point, box, MultiPolygon, shape
 from shapely.geometry import Polygon
 from shapely.geometry.base import BaseGeometry
 
-from ocgis import RequestDataset, vm
+from ocgis import RequestDataset, vm, env
 from ocgis.base import get_variable_names
 from ocgis.collection.field import Field
 from ocgis.constants import KeywordArgument
 from ocgis.driver.nc import DriverNetcdfCF
 from ocgis.exc import EmptySubsetError, BoundsAlreadyAvailableError
-from ocgis.spatial.grid import Grid, expand_grid, GridGeometryProcessor
+from ocgis.spatial.grid import Grid, expand_grid, GridGeometryProcessor, get_polygon_geometry_array, \
+    get_point_geometry_array, is_rasterizable, get_cell_bounds
 from ocgis.test.base import attr, AbstractTestInterface, create_gridxy_global
 from ocgis.util.helpers import make_poly, iter_array
 from ocgis.variable.base import Variable, SourcedVariable
@@ -45,6 +47,43 @@ class Test(AbstractTestInterface):
         for variable in [vx, vy]:
             self.assertEqual(grid.parent[variable.name].ndim, 2)
 
+    def test_get_cell_bounds(self):
+        for with_2d_variables in [False, True]:
+            grid = self.get_gridxy(with_2d_variables=with_2d_variables, with_xy_bounds=True)
+            actual = get_cell_bounds(grid)
+            self.assertEqual(actual.shape, (grid.shape[0] * grid.shape[1], 4))
+            polygons = grid.get_abstraction_geometry().get_value().reshape(-1)
+            for row, polygon in zip(actual, polygons):
+                self.assertNumpyAllClose(row, np.array(polygon.bounds))
+
+        grid.abstraction = 'point'
+        actual = get_cell_bounds(grid)
+        self.assertNumpyAll(actual[:, 0], actual[:, 2])
+        self.assertNumpyAll(actual[:, 0], grid.x.get_value().reshape(-1))
+
+    def test_get_geometry_array(self):
+        """Test vectorized geometry construction matches the element-wise construction."""
+
+        keywords = {'with_2d_variables': [False, True], 'add_hint_mask': [False, True],
+                    'func': [get_polygon_geometry_array, get_point_geometry_array]}
+        for k in self.iter_product_keywords(keywords):
+            grid = self.get_gridxy(with_2d_variables=k.with_2d_variables, with_xy_bounds=True)
+            if k.add_hint_mask:
+                hint_mask = np.zeros(grid.shape, dtype=bool)
+                hint_mask[1, :] = True
+            else:
+                hint_mask = None
+
+            actual = k.func(grid, np.empty(grid.shape, dtype=object), hint_mask=hint_mask)
+            desired = k.func(grid, np.empty(grid.shape, dtype=object), hint_mask=hint_mask, vectorized=False)
+            for idx in itertools.product(*[range(ii) for ii in grid.shape]):
+                if k.add_hint_mask and hint_mask[idx]:
+                    self.assertIsNone(actual[idx])
+                    self.assertIsNone(desired[idx])
+                else:
+                    self.assertTrue(actual[idx].equals(desired[idx]))
+                    self.assertNumpyAllClose(np.array(actual[idx].bounds), np.array(desired[idx].bounds))
+
 
 class TestGridGeometryProcessor(AbstractTestInterface):
     def test(self):
@@ -777,6 +816,40 @@ class TestGrid(AbstractTestInterface):
                     self.assertEqual(total_masked, 858)
 
     @attr('mpi')
+    @attr('rtree')
+    def test_get_intersects_spatial_index_cache(self):
+        subset = box(100.7, 39.71, 102.30, 42.30)
+        desired = self.get_gridxy(with_2d_variables=True, with_xy_bounds=True).get_intersects(subset)
+        env.DIR_SPATIAL_INDEX_CACHE = os.path.join(self.current_dir_output, 'cache')
+        for _ in range(2):
+            grid = self.get_gridxy(with_2d_variables=True, with_xy_bounds=True)
+            actual = grid.get_intersects(subset)
+            self.assertEqual(len(os.listdir(env.DIR_SPATIAL_INDEX_CACHE)), 2)
+            self.assertEqual(actual.shape, desired.shape)
+            self.assertNumpyAll(actual.get_mask(create=True), desired.get_mask(create=True))
+            self.assertNumpyAll(actual.x.get_value(), desired.x.get_value())
+            self.assertNumpyAll(actual.y.get_value(), desired.y.get_value())
+
+    def test_get_intersects_rasterized(self):
+        """Test the rasterized spatial operation matches the geometry processor for vectorized grids."""
+
+        subset = Point(-100.3, 40.1).buffer(7.3)
+        keywords = {'with_bounds': [True, False], 'spatial_op': ['intersects', 'intersection']}
+        for k in self.iter_product_keywords(keywords):
+            actual = {}
+            for use_raster in [True, False]:
+                env.USE_RASTER_INTERSECTS = use_raster
+                grid = self.get_gridxy_global(resolution=1.0, with_bounds=k.with_bounds)
+                self.assertEqual(is_rasterizable(grid, subset, k.with_bounds), use_raster)
+                actual[use_raster] = grid.get_spatial_operation(k.spatial_op, subset, return_slice=True)
+
+            (sub_raster, slc_raster), (sub_geom, slc_geom) = actual[True], actual[False]
+            self.assertEqual(slc_raster, slc_geom)
+            self.assertNumpyAll(sub_raster.get_mask(), sub_geom.get_mask())
+            if k.spatial_op == 'intersection':
+                for g1, g2 in zip(sub_raster.get_masked_value().compressed(), sub_geom.get_masked_value().compressed()):
+                    self.assertAlmostEqual(g1.symmetric_difference(g2).area, 0.)
+
     def test_get_intersects_state_boundaries(self):
         path_shp = self.path_state_boundaries
         geoms = []
@@ -6,6 +6,7 @@ from shapely.geometry import box
 from ocgis import RequestDataset
 from ocgis.base import get_variable_names
 from ocgis.constants import MPIWriteMode
+from ocgis.spatial.grid import expand_grid
 from ocgis.spatial.grid_splitter import GridSplitter, does_contain
 from ocgis.test.base import attr, AbstractTestInterface
 from ocgis.variable.base import Variable
@@ -94,6 +95,24 @@ class TestGridSplitter(AbstractTestInterface):
         index_field = RequestDataset(index_path).get()
         self.assertTrue(len(list(index_field.keys())) > 2)
 
+    @attr('slow')
+    def test_get_subset_slices(self):
+        gs = self.get_grid_splitter()
+        actual = gs.get_subset_slices()
+        self.assertEqual([a[1] for a in actual], list(gs.iter_dst_grid_slices()))
+
+        # Test slices select the same source subsets as the per-split intersects.
+        for (src_slc, _), src_subset in zip(actual, gs.iter_src_grid_subsets()):
+            sub = gs.src_grid[src_slc]
+            self.assertEqual(sub.shape, src_subset.shape)
+            self.assertEqual(sub.extent, src_subset.extent)
+
+        # Test curvilinear grids produce the same slices.
+        expand_grid(gs.src_grid)
+        expand_grid(gs.dst_grid)
+        self.assertFalse(gs.src_grid.is_vectorized)
+        self.assertEqual(gs.get_subset_slices(), actual)
+
     @attr('slow')
     def test_insert_weighted(self):
         gs = self.get_grid_splitter()
@@ -107,11 +126,6 @@ class TestGridSplitter(AbstractTestInterface):
             dv_sum = data_variable.get_value().sum()
             desired_sums[data_variable.name] = dv_sum
             self.assertNotEqual(dv_sum, 0)
-            data_variable.get_value()[:] = 0
-        dst_master.write(dst_master_path, write_mode=MPIWriteMode.FILL)
-        dst_master = RequestDataset(dst_master_path).get()
-        for data_variable in dst_master.data_variables:
-            self.assertEqual(data_variable.get_value().sum(), 0)
 
         src_template = os.path.join(self.current_dir_output, 'src_{}.nc')
         dst_template = os.path.join(self.current_dir_output, 'dst_{}.nc')
@@ -120,13 +134,56 @@ class TestGridSplitter(AbstractTestInterface):
 
         gs.write_subsets(src_template, dst_template, wgt_template, index_path)
 
-        gs.insert_weighted(index_path, self.current_dir_output, dst_master_path)
+        # Test with serial and multiprocess split file reads.
+        for n_workers in [None, 2]:
+            dst_master = RequestDataset(dst_master_path).get()
+            for data_variable in dst_master.data_variables:
+                data_variable.get_value()[:] = 0
+            dst_master.write(dst_master_path, write_mode=MPIWriteMode.FILL)
+            dst_master = RequestDataset(dst_master_path).get()
+            for data_variable in dst_master.data_variables:
+                self.assertEqual(data_variable.get_value().sum(), 0)
+
+            gs.insert_weighted(index_path, self.current_dir_output, dst_master_path, n_workers=n_workers)
+
+            actual_sums = {}
+            dst_master_inserted = RequestDataset(dst_master_path).get()
+            for data_variable in dst_master_inserted.data_variables:
+                dv_value = data_variable.get_value()
+                dv_sum = dv_value.sum()
+                actual_sums[data_variable.name] = dv_sum
+            for k, v in list(actual_sums.items()):
+                self.assertAlmostEqual(v, desired_sums[k])
+
+        with self.assertRaises(ValueError):
+            gs.insert_weighted(index_path, self.current_dir_output, dst_master_path, n_workers=0)
+
+    @attr('slow')
+    def test_write_subsets_n_workers(self):
+        gs = self.get_grid_splitter()
+        index_path = os.path.join(self.current_dir_output, 'index_path.nc')
 
-        actual_sums = {}
-        dst_master_inserted = RequestDataset(dst_master_path).get()
-        for data_variable in dst_master_inserted.data_variables:
-            dv_value = data_variable.get_value()
-            dv_sum = dv_value.sum()
-            actual_sums[data_variable.name] = dv_sum
-        for k, v in list(actual_sums.items()):
-            self.assertAlmostEqual(v, desired_sums[k])
+        # Test independent split writes match the collective split writes.
+        desired_template = os.path.join(self.current_dir_output, 'desired_{}_{{}}.nc')
+        gs.write_subsets(desired_template.format('src'), desired_template.format('dst'), 'esmf_weights_{}.nc',
+                         index_path)
+        desired_index = RequestDataset(index_path).get()
+        desired_bounds = {name: desired_index[name].get_value() for name in ['x_bounds', 'y_bounds']}
+        for n_workers in [1, 2]:
+            template = os.path.join(self.current_dir_output, 'workers_{}_{{}}_{{{{}}}}.nc'.format(n_workers))
+            gs.write_subsets(template.format('src'), template.format('dst'), 'esmf_weights_{}.nc', index_path,
+                             n_workers=n_workers)
+            for ctr in range(1, gs.nsplits_dst[0] * gs.nsplits_dst[1] + 1):
+                for role in ['src', 'dst']:
+                    desired = RequestDataset(desired_template.format(role).format(ctr)).get()
+                    actual = RequestDataset(template.format(role).format(ctr)).get()
+                    self.assertEqual(actual.grid.shape, desired.grid.shape)
+                    self.assertEqual(actual.grid.extent, desired.grid.extent)
+                    self.assertNumpyAll(actual['data'].get_value(), desired['data'].get_value())
+            actual_index = RequestDataset(index_path).get()
+            for name in ['x_bounds', 'y_bounds']:
+                self.assertNumpyAll(actual_index[name].get_value(), desired_bounds[name])
+
+        with self.assertRaises(ValueError):
+            gs.write_subsets(desired_template.format('src'), desired_template.format('dst'), 'esmf_weights_{}.nc',
+                             index_path, n_workers=0)
@@ -0,0 +1,63 @@
+import itertools
+
+import numpy as np
+from shapely.geometry import Point, box, Polygon, MultiPolygon, LineString
+
+from ocgis.spatial.raster import get_rasterized_intersects, get_polygon_edges
+from ocgis.test.base import TestBase
+
+
+class Test(TestBase):
+    @property
+    def subset_geometries(self):
+        return [box(2, 3, 10, 9),
+                box(2.5, 3.5, 10.5, 9.5),
+                Polygon([(1, 1), (15, 2), (8, 13)], [[(6, 4), (9, 4), (8, 7)]]),
+                MultiPolygon([box(0, 0, 3, 3), box(5.2, 5.2, 12.7, 8.1)]),
+                Point(8.3, 6.7).buffer(5.1)]
+
+    def test_get_polygon_edges(self):
+        actual = get_polygon_edges(box(0, 0, 1, 2))
+        self.assertEqual(actual.shape, (4, 4))
+        self.assertNumpyAll(actual[:, 0:2], np.array(box(0, 0, 1, 2).exterior.coords)[:-1])
+
+        geom = Polygon([(1, 1), (15, 2), (8, 13)], [[(6, 4), (9, 4), (8, 7)]])
+        self.assertEqual(get_polygon_edges(geom).shape, (6, 4))
+
+        self.assertIsNone(get_polygon_edges(LineString([(0, 0), (1, 1)])))
+
+    def test_get_rasterized_intersects(self):
+        """Test rasterized intersects matches the Shapely predicates on cell geometries."""
+
+        # Decreasing x-coordinates test the coordinate sorting.
+        x_bounds = np.array([[ii + 1, ii] for ii in range(20)], dtype=float)[::-1]
+        y_bounds = np.array([[ii, ii + 1] for ii in range(15)], dtype=float)
+
+        keywords = {'keep_touches': [True, False], 'use_bounds': [True, False],
+                    'subset_geom': self.subset_geometries}
+        for k in self.iter_product_keywords(keywords):
+            if k.use_bounds:
+                xb, yb = x_bounds, y_bounds
+            else:
+                xb = np.repeat(x_bounds.mean(axis=1).reshape(-1, 1), 2, axis=1)
+                yb = np.repeat(y_bounds.mean(axis=1).reshape(-1, 1), 2, axis=1)
+
+            actual, boundary = get_rasterized_intersects(k.subset_geom, xb, yb, keep_touches=k.keep_touches,
+                                                         return_boundary=True)
+            self.assertEqual(actual.shape, (15, 20))
+
+            for row, col in itertools.product(range(yb.shape[0]), range(xb.shape[0])):
+                if k.use_bounds:
+                    cell = box(xb[col].min(), yb[row].min(), xb[col].max(), yb[row].max())
+                else:
+                    cell = Point(xb[col, 0], yb[row, 0])
+                desired = cell.intersects(k.subset_geom)
+                if not k.keep_touches:
+                    desired = desired and not cell.touches(k.subset_geom)
+                self.assertEqual(actual[row, col], desired)
+                self.assertEqual(boundary[row, col], cell.intersects(k.subset_geom.boundary))
+
+    def test_get_rasterized_intersects_exceptions(self):
+        bounds = np.array([[0., 1.]])
+        with self.assertRaises(ValueError):
+            get_rasterized_intersects(Point(0, 0), bounds, bounds)
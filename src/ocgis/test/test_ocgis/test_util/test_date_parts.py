@@ -0,0 +1,47 @@
+import numpy as np
+
+from ocgis.test.base import TestBase
+from ocgis.util.date_parts import get_date_parts_from_numtime, get_parsed_time_units, get_days_from_date
+
+
+class Test(TestBase):
+    def test_get_date_parts_from_numtime(self):
+        value = np.array([0, 58, 59, 365, 366])
+        desired = {'standard': [[2000, 1, 1], [2000, 2, 28], [2000, 2, 29], [2000, 12, 31], [2001, 1, 1]],
+                   'proleptic_gregorian': [[2000, 1, 1], [2000, 2, 28], [2000, 2, 29], [2000, 12, 31], [2001, 1, 1]],
+                   'julian': [[2000, 1, 1], [2000, 2, 28], [2000, 2, 29], [2000, 12, 31], [2001, 1, 1]],
+                   'noleap': [[2000, 1, 1], [2000, 2, 28], [2000, 3, 1], [2001, 1, 1], [2001, 1, 2]],
+                   'all_leap': [[2000, 1, 1], [2000, 2, 28], [2000, 2, 29], [2000, 12, 31], [2001, 1, 1]],
+                   '360_day': [[2000, 1, 1], [2000, 2, 29], [2000, 2, 30], [2001, 1, 6], [2001, 1, 7]]}
+        for calendar, d in desired.items():
+            actual = get_date_parts_from_numtime(value, 'days since 2000-01-01', calendar)
+            self.assertEqual(actual.shape, (5, 6))
+            self.assertEqual(actual[:, 0:3].tolist(), d)
+
+        # Test the Julian calendar has a leap day on centuries.
+        actual = get_date_parts_from_numtime(np.array([59]), 'days since 1900-01-01', 'julian')
+        self.assertEqual(actual[0, 0:3].tolist(), [1900, 2, 29])
+
+        # Test hours and negative offsets.
+        actual = get_date_parts_from_numtime(np.array([[-1.5, 25.75]]), 'hours since 2000-01-01 12:00:00', 'gregorian')
+        self.assertEqual(actual.shape, (1, 2, 6))
+        self.assertEqual(actual[0].tolist(), [[2000, 1, 1, 10, 30, 0], [2000, 1, 2, 13, 45, 0]])
+
+        # Test unsupported units and calendars.
+        self.assertIsNone(get_date_parts_from_numtime(np.array([1]), 'months since 2000-01-01', 'standard'))
+        self.assertIsNone(get_date_parts_from_numtime(np.array([1]), 'days since 2000-01-01', 'foo'))
+        self.assertIsNone(get_date_parts_from_numtime(np.array([1]), 'days since 1500-01-01', 'standard'))
+        self.assertIsNone(get_date_parts_from_numtime(np.array([1e20]), 'days since 2000-01-01', 'standard'))
+
+    def test_get_days_from_date(self):
+        actual = get_days_from_date(np.array([2000, 2000, 2001]), np.array([2, 3, 1]), np.array([28, 1, 1]))
+        self.assertEqual(np.diff(actual).tolist(), [2, 306])
+        actual = get_days_from_date(2001, 3, 1, calendar='noleap') - get_days_from_date(2000, 3, 1, calendar='noleap')
+        self.assertEqual(actual, 365)
+        with self.assertRaises(ValueError):
+            get_days_from_date(2000, 1, 1, calendar='foo')
+
+    def test_get_parsed_time_units(self):
+        self.assertEqual(get_parsed_time_units('days since 1850-1-1'), (86400, (1850, 1, 1, 0, 0, 0.)))
+        self.assertEqual(get_parsed_time_units('hours since 2000-01-01T06:30:15Z'), (3600, (2000, 1, 1, 6, 30, 15.)))
+        self.assertIsNone(get_parsed_time_units('day as %Y%m%d.%f'))
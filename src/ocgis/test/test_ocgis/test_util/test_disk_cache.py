@@ -0,0 +1,42 @@
+import os
+
+from ocgis.test.base import TestBase
+from ocgis.util.disk_cache import DiskCache
+
+
+class TestDiskCache(TestBase):
+    def test_get(self):
+        directory = os.path.join(self.current_dir_output, 'cache')
+        cache = DiskCache(directory, ['.a', '.b'], max_size=2)
+        self.assertTrue(os.path.isdir(directory))
+
+        def _create_(tmp_path):
+            for extension in cache.extensions:
+                with open(tmp_path + extension, 'w') as f:
+                    f.write(os.path.basename(tmp_path))
+
+        def _load_(path):
+            with open(path + '.b') as f:
+                return f.read()
+
+        def _create_fail_(_):
+            raise AssertionError('entry should be cached')
+
+        # Test the entry is loaded once moved into place if creation returns nothing.
+        created = cache.get('first', _create_, _load_)
+        self.assertTrue(created.startswith('.first.'))
+        for extension in cache.extensions:
+            self.assertTrue(os.path.exists(cache.get_path('first') + extension))
+        self.assertEqual(cache.get('first', _create_fail_, _load_), created)
+
+        # Test the created entry is returned.
+        def _create_value_(tmp_path):
+            _create_(tmp_path)
+            return 'value'
+
+        self.assertEqual(cache.get('second', _create_value_, _load_), 'value')
+
+        # Test least recently used entries are evicted with all their files.
+        os.utime(cache.get_path('first') + '.a', (0, 0))
+        cache.get('third', _create_, _load_)
+        self.assertEqual(sorted(os.listdir(directory)), ['second.a', 'second.b', 'third.a', 'third.b'])
@@ -9,7 +9,7 @@ from ocgis import RequestDataset
 from ocgis import Variable
 from ocgis.calc import tile
 from ocgis.test.base import TestBase, attr
-from ocgis.util.large_array import compute, set_variable_spatial_mask
+from ocgis.util.large_array import compute, set_variable_spatial_mask, compute_chunked, get_chunks_for_memory
 
 
 class Test(TestBase):
@@ -171,6 +171,109 @@ class Test(TestBase):
         self.assertNcEqual(ret_compute, ret_ocgis, check_fill_value=False, check_types=False,
                            ignore_attributes={'global': ['history'], 'mean': ['_FillValue']})
 
+    @attr('data')
+    def test_compute_n_workers(self):
+        percentages = []
+
+        def callback(a, b):
+            percentages.append(a)
+
+        rd = self.test_data.get_rd('cancm4_tas', kwds={'time_region': {'month': [3]}})
+        ops = ocgis.OcgOperations(dataset=rd, calc=[{'func': 'mean', 'name': 'mean'}], calc_grouping=['month'],
+                                  output_format='nc', geom='state_boundaries', select_ugid=[2, 9, 12, 23, 25],
+                                  add_auxiliary_files=False, callback=callback)
+        ret = compute(ops, 3, verbose=False, n_workers=3)
+        self.assertEqual(np.sum(np.array(percentages) >= 100.0), 1)
+
+        ops.prefix = 'ocgis'
+        ops.callback = None
+        ret_serial = compute(ops, 3, verbose=False)
+        self.assertNcEqual(ret, ret_serial, check_fill_value=False, check_types=False,
+                           ignore_attributes={'global': ['history'], 'mean': ['_FillValue']})
+
+        with self.assertRaises(ValueError):
+            compute(ops, 3, n_workers=0)
+
+    @attr('data')
+    def test_compute_chunked(self):
+        rd = self.test_data.get_rd('cancm4_tas')
+        calc = [{'func': 'mean', 'name': 'mean'}, {'func': 'max', 'name': 'max'}]
+        ops = ocgis.OcgOperations(dataset=rd, calc=calc, calc_grouping=['month'], output_format='nc',
+                                  geom='state_boundaries', select_ugid=[2, 9, 12, 23, 25], add_auxiliary_files=False,
+                                  calc_sample_size=True)
+        ret = ops.execute(chunks={'y': 4, 'x': 3})
+
+        ops.prefix = 'ocgis'
+        ret_ocgis = ops.execute()
+        self.assertNcEqual(ret, ret_ocgis, check_fill_value=False, check_types=False,
+                           ignore_attributes={'global': ['history'], 'mean': ['_FillValue'], 'max': ['_FillValue']})
+
+    @attr('data')
+    def test_compute_chunked_max_memory(self):
+        rd = self.test_data.get_rd('cancm4_tas', kwds={'time_region': {'month': [3]}})
+        ops = ocgis.OcgOperations(dataset=rd, calc=[{'func': 'mean', 'name': 'mean'}], calc_grouping=['month'],
+                                  output_format='nc', add_auxiliary_files=False)
+        percentages = []
+        ops.callback = lambda a, b: percentages.append(a)
+        ret = compute_chunked(ops, max_memory=2e6)
+        self.assertGreater(len(percentages), 2)
+        self.assertEqual(percentages[-1], 100.)
+
+        ops.prefix = 'ocgis'
+        ops.callback = None
+        ret_ocgis = ops.execute()
+        self.assertNcEqual(ret, ret_ocgis, check_fill_value=False, check_types=False,
+                           ignore_attributes={'global': ['history'], 'mean': ['_FillValue']})
+
+        # The ceiling is validated against explicit spatial chunks.
+        with self.assertRaises(ValueError):
+            compute_chunked(ops, chunks={'y': 64, 'x': 128}, max_memory=1000)
+
+    @attr('data')
+    def test_compute_chunked_multivariate_time(self):
+        rd = self.test_data.get_rd('cancm4_tas', kwds={'time_region': {'month': [3]}})
+        rd2 = deepcopy(rd)
+        rd2.field_name = 'tas2'
+        rd2.rename_variable = 'tas2'
+        calc = [{'func': 'divide', 'name': 'ln', 'kwds': {'arr1': 'tas', 'arr2': 'tas2'}}]
+        ops = ocgis.OcgOperations(dataset=[rd, rd2], calc=calc, output_format='nc', geom='state_boundaries',
+                                  select_ugid=[2, 9, 12, 23, 25], add_auxiliary_files=False)
+        ret = ops.execute(chunks={'time': 7, 'y': 5, 'x': 5})
+
+        ops.prefix = 'ocgis'
+        ret_ocgis = ops.execute()
+        self.assertNcEqual(ret, ret_ocgis, check_fill_value=False, check_types=False,
+                           ignore_attributes={'global': ['history'], 'ln': ['_FillValue']})
+
+    @attr('data')
+    def test_compute_chunked_exceptions(self):
+        rd = self.test_data.get_rd('cancm4_tas')
+        ops = ocgis.OcgOperations(dataset=rd, calc=[{'func': 'mean', 'name': 'mean'}], calc_grouping=['month'],
+                                  output_format='nc')
+        # Set functions may not be chunked in time.
+        with self.assertRaises(ValueError):
+            ops.execute(chunks={'time': 10})
+        # Only dimension map keys are chunked.
+        with self.assertRaises(ValueError):
+            ops.execute(chunks={'level': 10})
+
+    def test_get_chunks_for_memory(self):
+        field = self.get_field(ntime=10, nrow=8, ncol=6)
+        itemsize = field.data_variables[0].dtype.itemsize
+
+        # No ceiling returns the chunks unchanged.
+        self.assertEqual(get_chunks_for_memory(field, {'y': 3}, 1), {'y': 3})
+
+        bytes_per_element = 10 * (itemsize + 1) * 2
+        actual = get_chunks_for_memory(field, {}, 1, max_memory=bytes_per_element * 9)
+        self.assertEqual(actual, {'y': 3, 'x': 3})
+
+        actual = get_chunks_for_memory(field, {'y': 2}, 1, max_memory=bytes_per_element * 9)
+        self.assertEqual(actual, {'y': 2, 'x': 4})
+
+        with self.assertRaises(ValueError):
+            get_chunks_for_memory(field, {'y': 8, 'x': 6}, 1, max_memory=bytes_per_element)
+
     def test_set_variable_spatial_mask(self):
         value = np.random.rand(10, 3, 4)
         value = np.ma.array(value, mask=False)
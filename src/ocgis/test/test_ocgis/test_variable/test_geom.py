@@ -17,6 +17,7 @@ from ocgis.spatial.grid import Grid, get_geometry_variable
 from ocgis.test.base import attr, AbstractTestInterface
 from ocgis.variable.base import Variable, VariableCollection
 from ocgis.variable.crs import WGS84, Spherical, Cartesian
+from ocgis.variable import geom as geom_module
 from ocgis.variable.dimension import Dimension
 from ocgis.variable.geom import GeometryVariable, GeometryProcessor
 from ocgis.vmachine.mpi import OcgDist, MPI_RANK, variable_scatter, MPI_SIZE, variable_gather, MPI_COMM
@@ -358,6 +359,30 @@ class TestGeometryVariable(AbstractTestInterface):
             if return_indices:
                 self.assertEqual(pa.get_value()[slc][0], Point(1, 2))
 
+    def test_get_mask_from_intersects_bulk_spatial_index(self):
+        """Test the bulk spatial index is used without the "rtree" spatial index."""
+
+        if geom_module.STRtree is None:
+            raise SkipTest('"shapely>=2.0" is required')
+
+        queried = []
+
+        class _BulkSpatialIndex_(geom_module.BulkSpatialIndex):
+            def query(self, *args, **kwargs):
+                queried.append(True)
+                return super(_BulkSpatialIndex_, self).query(*args, **kwargs)
+
+        value = np.array([Point(1, 1), Point(2, 2), Point(3, 3)], dtype=object)
+        gvar = GeometryVariable(value=value, dimensions='ngeom')
+        original = geom_module.BulkSpatialIndex
+        geom_module.BulkSpatialIndex = _BulkSpatialIndex_
+        try:
+            actual = gvar.get_mask_from_intersects(box(1.5, 1.5, 5, 5), use_spatial_index=False)
+        finally:
+            geom_module.BulkSpatialIndex = original
+        self.assertEqual(queried, [True])
+        self.assertEqual(actual.tolist(), [True, False, False])
+
     @attr('mpi')
     def test_get_mask_from_intersects(self):
         poly = wkt.loads(
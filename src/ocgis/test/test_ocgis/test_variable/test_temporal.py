@@ -18,7 +18,7 @@ from ocgis.util.units import get_units_object, get_are_units_equal, get_are_unit
 from ocgis.variable.temporal import get_datetime_conversion_state, get_datetime_from_months_time_units, \
     get_datetime_from_template_time_units, get_difference_in_months, get_is_interannual, get_num_from_months_time_units, \
     get_origin_datetime_from_months_units, get_sorted_seasons, TemporalVariable, iter_boolean_groups_from_time_regions, \
-    TemporalGroupVariable, get_time_regions, get_datetime_or_netcdftime
+    TemporalGroupVariable, get_time_regions, get_datetime_or_netcdftime, get_is_date_part_between
 from ocgis.variable.temporal import get_datetime_or_netcdftime as dt
 
 
@@ -83,6 +83,13 @@ class Test(AbstractTestTemporal):
         distance = get_difference_in_months(datetime.datetime(1978, 12, 1), datetime.datetime(1978, 12, 1))
         self.assertEqual(distance, 0)
 
+    def test_get_is_date_part_between(self):
+        lower = np.array([12, 1, 3])
+        upper = np.array([1, 1, 4])
+        self.assertEqual(get_is_date_part_between(lower, upper, np.array([12])).tolist(), [True, False, False])
+        self.assertEqual(get_is_date_part_between(lower, upper, np.array([1])).tolist(), [False, True, False])
+        self.assertEqual(get_is_date_part_between(lower, upper, np.array([1, 3])).tolist(), [False, True, True])
+
     def test_get_is_interannual(self):
         self.assertTrue(get_is_interannual([11, 12, 1]))
         self.assertFalse(get_is_interannual([10, 11, 12]))
@@ -516,7 +523,7 @@ class TestTemporalVariable(AbstractTestTemporal):
     def test_get_grouping_other(self):
         tdim = self.get_temporalvariable()
         grouping = [[12, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10, 11], 'year']
-        new_bounds, date_parts, repr_dt, dgroups = tdim._get_grouping_other_(grouping)
+        new_bounds, date_parts, repr_dt, (indices, offsets) = tdim._get_grouping_other_(grouping)
 
         repr_dt = date2num(repr_dt, tdim.units, calendar=tdim.calendar).tolist()
         desired = [693247.0, 693337.0, 693428.0, 693520.0, 693612.0, 693702.0, 693793.0, 693885.0, 693977.0, 694067.0,
@@ -607,7 +614,11 @@ class TestTemporalVariable(AbstractTestTemporal):
                    False, False, False, False, False, False, False, False, False, False, False, False, False, False,
                    False, False, False, False, False, False, False, False, False, False, False, False, False, False,
                    False, False]
-        self.assertEqual(dgroups[4].tolist(), desired)
+        # Groups are returned as source time indices concatenated in group order.
+        self.assertEqual(offsets.shape[0], len(date_parts))
+        dgroup = np.zeros(tdim.shape[0], dtype=bool)
+        dgroup[indices[offsets[4]:offsets[5]]] = True
+        self.assertEqual(dgroup.tolist(), desired)
 
         desired = [([12, 1, 2], 1899), ([3, 4, 5], 1899), ([6, 7, 8], 1899), ([9, 10, 11], 1899), ([12, 1, 2], 1900),
                    ([3, 4, 5], 1900), ([6, 7, 8], 1900), ([9, 10, 11], 1900), ([12, 1, 2], 1901), ([3, 4, 5], 1901),
@@ -892,6 +903,18 @@ class TestTemporalVariable(AbstractTestTemporal):
         ret2 = td.get_subset_by_function(_func_, return_indices=True)
         self.assertNumpyAll(td[ret2[1]].value_datetime, ret.value_datetime)
 
+    def test_get_time_region_numeric_calendar(self):
+        # Numeric time is decoded directly to date parts using the calendar.
+        desired = {'noleap': 2, '360_day': 6, 'standard': 3, 'julian': 3}
+        for calendar, desired_size in desired.items():
+            value = np.arange(0, 720, dtype=float)
+            td = self.init_temporal_variable(value=value, units='days since 2000-01-01', calendar=calendar)
+            ret, indices = td.get_time_region({'month': [2], 'day': [28, 29, 30]}, return_indices=True)
+            self.assertEqual(ret.shape, (desired_size,))
+            for d in td.value_datetime[indices].flat:
+                self.assertEqual(d.month, 2)
+                self.assertIn(d.day, [28, 29, 30])
+
     def test_get_time_region_value_only(self):
         dates = get_date_list(dt(2002, 1, 31), dt(2009, 12, 31), 1)
         td = self.init_temporal_variable(value=dates)
@@ -1089,6 +1112,53 @@ class TestTemporalGroupVariable(AbstractTestInterface):
         tgd = self.get_tgv()
         self.assertIsInstance(tgd, TemporalGroupVariable)
 
+    def test_get_group_indices(self):
+        dates = get_date_list(datetime.datetime(2000, 1, 1), datetime.datetime(2000, 3, 31), 1)
+        tv = TemporalVariable(value=dates, dimensions='time')
+        tgv = tv.get_grouping(['month'])
+        indices, offsets = tgv.get_group_indices(tv.shape[0])
+        self.assertNumpyAll(indices, np.arange(tv.shape[0]))
+        self.assertEqual(offsets.tolist(), [0, 31, 60])
+
+        # Groups are concatenated in group order.
+        tgv = tv.get_grouping([[12, 1], [2, 3]])
+        indices, offsets = tgv.get_group_indices(tv.shape[0])
+        self.assertEqual(offsets.tolist(), [0, 31])
+        self.assertEqual(indices.shape[0], tv.shape[0])
+
+        # Empty groups are not supported for segment reductions.
+        tgv.dgroups = [np.zeros(tv.shape[0], dtype=bool)]
+        self.assertIsNone(tgv.get_group_indices(tv.shape[0]))
+
+    def test_dgroups(self):
+        dates = get_date_list(datetime.datetime(2000, 1, 1), datetime.datetime(2000, 3, 31), 1)
+        tv = TemporalVariable(value=dates, dimensions='time')
+        tgv = tv.get_grouping(['month'])
+        # Boolean groups are only created on access.
+        self.assertIsNone(tgv._dgroups)
+        self.assertIsNotNone(tgv.group_indices)
+        dgroups = tgv.dgroups
+        self.assertEqual(len(dgroups), 3)
+        for dgroup, group in zip(dgroups, tgv.iter_groups()):
+            self.assertEqual(dgroup.shape, (tv.shape[0],))
+            self.assertNumpyAll(np.nonzero(dgroup)[0], group)
+
+        # Setting boolean groups replaces the compact representation.
+        tgv.dgroups = [slice(None)]
+        self.assertIsNone(tgv.group_indices)
+        self.assertEqual(list(tgv.iter_groups()), [slice(None)])
+
+    def test_get_grouping_seasonal_year_missing_season(self):
+        dates = get_date_list(datetime.datetime(2012, 1, 1), datetime.datetime(2013, 3, 31), 1)
+        tv = TemporalVariable(value=dates, dimensions='time')
+        tgv = tv.get_grouping([[6, 7, 8], [1, 2], 'year'])
+        # The summer season is not present for the second year and does not define a group.
+        self.assertEqual(tgv.shape[0], 3)
+        self.assertEqual(tgv.date_parts['year'].tolist(), [2012, 2012, 2013])
+        groups = list(tgv.iter_groups())
+        self.assertEqual([g.shape[0] for g in groups], [60, 92, 59])
+        self.assertEqual(tgv.bounds.value_datetime[2, 0], datetime.datetime(2013, 1, 1))
+
     @attr('data')
     def test_write_netcdf(self):
         tgd = self.get_tgv()
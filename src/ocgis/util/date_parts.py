@@ -0,0 +1,188 @@
+"""
+Calendar-aware conversion of numeric time to integer date parts without creating ``datetime`` objects. Supports the
+CF calendars with fixed rules: ``standard``/``gregorian`` (for dates after the Gregorian reform),
+``proleptic_gregorian``, ``julian``, ``noleap``/``365_day``, ``all_leap``/``366_day``, and ``360_day``.
+
+Days are counted from an arbitrary calendar-specific epoch. Only differences between day counts in the same calendar are
+meaningful.
+"""
+import re
+
+import numpy as np
+
+#: Date part column order. Matches :attr:`ocgis.TemporalVariable._date_parts`.
+DATE_PARTS = ('year', 'month', 'day', 'hour', 'minute', 'second')
+
+_CALENDAR_ALIASES = {'standard': 'standard',
+                     'gregorian': 'standard',
+                     'proleptic_gregorian': 'proleptic_gregorian',
+                     'julian': 'julian',
+                     'noleap': 'noleap',
+                     '365_day': 'noleap',
+                     'all_leap': 'all_leap',
+                     '366_day': 'all_leap',
+                     '360_day': '360_day'}
+
+_UNIT_SECONDS = {'days': 86400, 'day': 86400, 'd': 86400,
+                 'hours': 3600, 'hour': 3600, 'hrs': 3600, 'hr': 3600, 'h': 3600,
+                 'minutes': 60, 'minute': 60, 'mins': 60, 'min': 60,
+                 'seconds': 1, 'second': 1, 'secs': 1, 'sec': 1, 's': 1}
+
+_RE_UNITS = re.compile(r'^\s*(\w+)\s+since\s+(-?\d+)-(\d{1,2})-(\d{1,2})'
+                       r'(?:[T\s]+(\d{1,2}):(\d{1,2})(?::(\d{1,2}(?:\.\d*)?))?)?'
+                       r'\s*(?:Z|UTC|GMT|[+-]0{1,2}(?::?00)?)?\s*$', re.IGNORECASE)
+
+_CUMULATIVE_DAYS = {'noleap': np.array([0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334, 365]),
+                    'all_leap': np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335, 366])}
+
+_MICROSECONDS_PER_DAY = 86400 * 10 ** 6
+
+# Offsets beyond this many seconds from the reference overflow 64-bit microsecond arithmetic.
+_MAXIMUM_SECONDS = 2 ** 62 // 10 ** 6
+
+# First day of the Gregorian calendar in the mixed "standard" calendar.
+_GREGORIAN_REFORM = (1582, 10, 15)
+
+
+def get_date_parts_from_numtime(value, units, calendar):
+    """
+    Convert numeric time to integer date parts.
+
+    :param value: Numeric time values.
+    :type value: :class:`numpy.ndarray`
+    :param str units: The CF time units string (i.e. ``'days since 1850-1-1'``).
+    :param str calendar: The CF calendar name.
+    :returns: An integer array with shape ``value.shape + (6,)``. The last axis is ordered as
+     :attr:`~ocgis.util.date_parts.DATE_PARTS`. ``None`` is returned if the units or calendar are not supported. This
+     includes dates preceding the Gregorian reform in the ``standard`` calendar and non-finite or out-of-range
+     values.
+    :rtype: :class:`numpy.ndarray` | None
+    """
+
+    calendar = _CALENDAR_ALIASES.get(str(calendar).lower())
+    parsed = get_parsed_time_units(units)
+    if calendar is None or parsed is None:
+        return None
+    seconds_per_unit, reference = parsed
+
+    if calendar == 'standard':
+        if reference[0:3] < _GREGORIAN_REFORM:
+            return None
+        reform_days = _get_days_from_date_('proleptic_gregorian', *[np.array(ii) for ii in _GREGORIAN_REFORM])
+
+    value = np.asarray(value, dtype=float)
+    if not np.all(np.abs(value) * seconds_per_unit < _MAXIMUM_SECONDS):
+        return None
+    year, month, day, hour, minute, second = reference
+    reference_days = _get_days_from_date_(calendar, np.array(year), np.array(month), np.array(day))
+    reference_microseconds = int(round(((hour * 60 + minute) * 60 + second) * 10 ** 6))
+
+    microseconds = np.round(value * (seconds_per_unit * 10 ** 6)).astype(np.int64) + reference_microseconds
+    days = np.floor_divide(microseconds, _MICROSECONDS_PER_DAY)
+    microseconds_of_day = microseconds - days * _MICROSECONDS_PER_DAY
+    days += reference_days
+
+    if calendar == 'standard' and np.any(days < reform_days):
+        return None
+
+    ret = np.empty(value.shape + (len(DATE_PARTS),), dtype=int)
+    ret[..., 0], ret[..., 1], ret[..., 2] = _get_date_from_days_(calendar, days)
+    seconds_of_day = microseconds_of_day // 10 ** 6
+    ret[..., 3] = seconds_of_day // 3600
+    ret[..., 4] = (seconds_of_day % 3600) // 60
+    ret[..., 5] = seconds_of_day % 60
+    return ret
+
+
+def get_parsed_time_units(units):
+    """
+    :param str units: The CF time units string.
+    :returns: A tuple ``(seconds per unit, (year, month, day, hour, minute, second))`` or ``None`` if the units are not
+     supported.
+    :rtype: tuple | None
+    """
+
+    match = _RE_UNITS.match(str(units))
+    if match is None:
+        return None
+    seconds_per_unit = _UNIT_SECONDS.get(match.group(1).lower())
+    if seconds_per_unit is None:
+        return None
+    year, month, day = [int(match.group(ii)) for ii in (2, 3, 4)]
+    hour, minute = [int(match.group(ii) or 0) for ii in (5, 6)]
+    second = float(match.group(7) or 0)
+    return seconds_per_unit, (year, month, day, hour, minute, second)
+
+
+def get_days_from_date(year, month, day, calendar='proleptic_gregorian'):
+    """
+    :param year: Years.
+    :type year: :class:`numpy.ndarray`
+    :param month: Months.
+    :type month: :class:`numpy.ndarray`
+    :param day: Days of the month.
+    :type day: :class:`numpy.ndarray`
+    :param str calendar: The CF calendar name.
+    :returns: Day counts from the calendar's epoch. Differences between day counts are elapsed days.
+    :rtype: :class:`numpy.ndarray`
+    :raises: ValueError
+    """
+
+    calendar_key = _CALENDAR_ALIASES.get(str(calendar).lower())
+    if calendar_key is None:
+        raise ValueError('Calendar not supported: {}'.format(calendar))
+    return _get_days_from_date_(calendar_key, np.asarray(year), np.asarray(month), np.asarray(day))
+
+
+def _get_days_from_date_(calendar, year, month, day):
+    if calendar in ('standard', 'proleptic_gregorian', 'julian'):
+        # Shift to March-based years so the leap day is the last day of the year.
+        year = year - (month <= 2)
+        month_from_march = (month + 9) % 12
+        day_of_year = (153 * month_from_march + 2) // 5 + day - 1
+        if calendar == 'julian':
+            era = np.floor_divide(year, 4)
+            year_of_era = year - era * 4
+            ret = era * 1461 + year_of_era * 365 + day_of_year
+        else:
+            era = np.floor_divide(year, 400)
+            year_of_era = year - era * 400
+            ret = era * 146097 + year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    elif calendar == '360_day':
+        ret = year * 360 + (month - 1) * 30 + day - 1
+    else:
+        cumulative_days = _CUMULATIVE_DAYS[calendar]
+        ret = year * cumulative_days[-1] + cumulative_days[month - 1] + day - 1
+    return ret
+
+
+def _get_date_from_days_(calendar, days):
+    if calendar in ('standard', 'proleptic_gregorian', 'julian'):
+        if calendar == 'julian':
+            era = np.floor_divide(days, 1461)
+            day_of_era = days - era * 1461
+            year_of_era = np.minimum(day_of_era // 365, 3)
+            year = year_of_era + era * 4
+            day_of_year = day_of_era - 365 * year_of_era
+        else:
+            era = np.floor_divide(days, 146097)
+            day_of_era = days - era * 146097
+            year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+            year = year_of_era + era * 400
+            day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+        month_from_march = (5 * day_of_year + 2) // 153
+        day = day_of_year - (153 * month_from_march + 2) // 5 + 1
+        month = np.where(month_from_march < 10, month_from_march + 3, month_from_march - 9)
+        year = year + (month <= 2)
+    elif calendar == '360_day':
+        year = np.floor_divide(days, 360)
+        day_of_year = days - year * 360
+        month = day_of_year // 30 + 1
+        day = day_of_year % 30 + 1
+    else:
+        cumulative_days = _CUMULATIVE_DAYS[calendar]
+        year = np.floor_divide(days, cumulative_days[-1])
+        day_of_year = days - year * cumulative_days[-1]
+        month = np.searchsorted(cumulative_days, day_of_year, side='right')
+        day = day_of_year - cumulative_days[month - 1] + 1
+    return year, month, day
@@ -0,0 +1,94 @@
+"""
+Persistent on-disk least recently used cache shared by the spatial index, percentile basis, and regrid weight caches.
+"""
+import os
+import uuid
+from glob import glob
+
+
+class DiskCache(object):
+    """
+    Persistent on-disk least recently used cache. An entry is keyed by a string and stored as one file per extension
+    sharing the key as its base name. The cache directory may be shared between processes. Entries are written to a
+    temporary location and moved into place so other processes only see complete entries. The least recently used
+    entries are evicted when the cache exceeds ``max_size`` entries.
+
+    :param str directory: The cache directory. It is created if it does not exist.
+    :param extensions: The file extensions of an entry including the leading period. The first extension's file is
+     moved into place last and tracks the entry's access time.
+    :type extensions: sequence
+    :param int max_size: The maximum number of entries to keep in the cache.
+    """
+
+    def __init__(self, directory, extensions, max_size=32):
+        self.directory = directory
+        self.extensions = tuple(extensions)
+        self.max_size = max_size
+
+        if not os.path.exists(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another process may have created the directory.
+                if not os.path.isdir(directory):
+                    raise
+
+    def get(self, key, create, load):
+        """
+        Get a cache entry loading it if it is available. Otherwise, create and persist the entry.
+
+        :param str key: The entry key.
+        :param create: A callable taking a temporary path without extension. It must write a file for each extension
+         and return the entry. If it returns ``None``, the entry is loaded once it is moved into place.
+        :type create: function
+        :param load: A callable taking the entry path without extension and returning the entry.
+        :type load: function
+        """
+
+        path = self.get_path(key)
+        if all([os.path.exists(path + extension) for extension in self.extensions]):
+            # Update the access time for least recently used eviction.
+            os.utime(path + self.extensions[0], None)
+            ret = load(path)
+        else:
+            # Hidden temporary files are not matched when listing entries for eviction.
+            tmp_path = os.path.join(self.directory, '.{}.{}'.format(key, uuid.uuid4().hex))
+            ret = create(tmp_path)
+            for extension in self.extensions[::-1]:
+                os.rename(tmp_path + extension, path + extension)
+            if ret is None:
+                ret = load(path)
+            self.evict()
+        return ret
+
+    def get_path(self, key):
+        """
+        :param str key: The entry key.
+        :returns: The entry path without extension.
+        :rtype: str
+        """
+
+        return os.path.join(self.directory, key)
+
+    def evict(self):
+        """Remove the least recently used entries exceeding the maximum cache size."""
+
+        paths = glob(os.path.join(self.directory, '*' + self.extensions[0]))
+        if len(paths) > self.max_size:
+            paths = sorted(paths, key=_get_mtime_, reverse=True)
+            for path in paths[self.max_size:]:
+                base = path[:-len(self.extensions[0])]
+                for extension in self.extensions:
+                    try:
+                        os.remove(base + extension)
+                    except OSError:
+                        # Another process may have evicted the entry.
+                        pass
+
+
+def _get_mtime_(path):
+    try:
+        ret = os.path.getmtime(path)
+    except OSError:
+        ret = 0
+    return ret
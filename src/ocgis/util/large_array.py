@@ -1,3 +1,6 @@
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
 
 import netCDF4 as nc
@@ -8,12 +11,13 @@ from ocgis import constants
 from ocgis.calc import tile
 from ocgis.calc.base import AbstractMultivariateFunction
 from ocgis.calc.engine import CalculationEngine
-from ocgis.constants import TagName
+from ocgis.collection.spatial import SpatialCollection
+from ocgis.constants import TagName, DimensionMapKey
 from ocgis.ops.core import OcgOperations
 from ocgis.util.helpers import ProgressBar
 
 
-def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
+def compute(ops, tile_dimension, verbose=False, use_optimizations=True, n_workers=None):
     """
     Used for computations on large arrays where memory limitations are a consideration. It is is also useful for
     extracting data from a server that has limitations on the size of requested data arrays. This function creates an
@@ -27,6 +31,8 @@ def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
     :param bool verbose: If ``True``, print more verbose information to terminal.
     :param bool use_optimizations: If ``True``, cache :class:`Field` and :class:`TemporalGroupDimension` objects for
      reuse during tile iteration.
+    :param int n_workers: If greater than one, execute tiles on a pool of ``n_workers`` local processes. Results are
+     written to the output file by the calling process only. MPI is not required.
     :raises: AssertionError, ValuError
     :returns: Path to the output NetCDF file.
     :rtype: str
@@ -43,6 +49,7 @@ def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
     assert ops.output_format == constants.OutputFormatName.NETCDF
 
     # Ensure that progress is not showing 100% at first.
+    orgcallback = None
     if ops.callback is not None:
         orgcallback = ops.callback
 
@@ -54,6 +61,8 @@ def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
     tile_dimension = int(tile_dimension)
     if tile_dimension <= 0:
         raise ValueError('"tile_dimension" must be greater than 0')
+    if n_workers is not None and int(n_workers) <= 0:
+        raise ValueError('"n_workers" must be greater than 0')
 
     # Determine if we are working with a multivariate function.
     if CalculationEngine._check_calculation_members_(ops.calc, AbstractMultivariateFunction):
@@ -162,53 +171,73 @@ def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
             print(('output file is: {0}'.format(fill_file)))
             print(('tile count: {0}'.format(lschema)))
 
+        # Operations for each tile. Geometry subsetting is replaced by an index slice.
+        tiles = []
+        for indices in schema.values():
+            # appropriate adjust the slices to account for the spatial subset
+            row = [ii + row_offset for ii in indices['row']]
+            col = [ii + col_offset for ii in indices['col']]
+            # we need to remove the offsets to adjust for the zero-based fill file.
+            slice_row = slice(row[0] - row_offset, row[1] - row_offset)
+            slice_col = slice(col[0] - col_offset, col[1] - col_offset)
+            tiles.append((row, col, slice_row, slice_col))
+
+        def _get_tile_ops_(row, col):
+            # copy the operations and modify arguments
+            ops_slice = deepcopy(ops)
+            ops_slice.geom = None
+            ops_slice.slice = [None, None, None, row, col]
+            ops_slice.output_format = constants.OutputFormatName.OCGIS
+            ops_slice.optimizations = optimizations
+            return ops_slice
+
         fds = nc.Dataset(fill_file, 'a')
         try:
             if verbose:
                 progress = ProgressBar('tiles progress')
             if ops.callback is not None and callback:
                 callback(0, "Initializing calculation")
-            for ctr, indices in enumerate(iter(schema.values()), start=1):
-                # appropriate adjust the slices to account for the spatial subset
-                row = [ii + row_offset for ii in indices['row']]
-                col = [ii + col_offset for ii in indices['col']]
-
-                # copy the operations and modify arguments
-                ops_slice = deepcopy(ops)
-                ops_slice.geom = None
-                ops_slice.slice = [None, None, None, row, col]
-                ops_slice.output_format = constants.OutputFormatName.OCGIS
-                ops_slice.optimizations = optimizations
-                # return the object slice
-                ret = ops_slice.execute()
-
-                for field in ret.iter_fields():
-                    for variable in field.data_variables:
-                        vref = fds.variables[variable.name]
-                        # we need to remove the offsets to adjust for the zero-based fill file.
-                        slice_row = slice(row[0] - row_offset, row[1] - row_offset)
-                        slice_col = slice(col[0] - col_offset, col[1] - col_offset)
-                        # if there is a spatial mask, update accordingly
-                        if mask_spatial is not None:
-                            set_variable_spatial_mask(variable, mask_spatial, slice_row, slice_col)
-                            fill_mask = field.grid.get_mask(create=True)
-                            fill_mask[:, :] = mask_spatial[slice_row, slice_col]
-                            fill_mask = np.ma.array(np.zeros(fill_mask.shape), mask=fill_mask)
-                            fds.variables[field.grid.mask_variable.name][slice_row, slice_col] = fill_mask
-                        fill_value = variable.get_masked_value()
-                        # fill the netCDF container variable adjusting for shape
-                        if len(vref.shape) == 3:
-                            vref[:, slice_row, slice_col] = fill_value
-                        elif len(vref.shape) == 4:
-                            vref[:, :, slice_row, slice_col] = fill_value
-                        else:
-                            raise NotImplementedError(vref.shape)
-
-                        fds.sync()
+
+            if n_workers is None or int(n_workers) == 1:
+                def _iter_results_():
+                    for row, col, slice_row, slice_col in tiles:
+                        yield _execute_tile_(_get_tile_ops_(row, col), mask_spatial, slice_row, slice_col)
+            else:
+                def _iter_results_():
+                    # Callbacks are local to the calling process and are not sent to the workers.
+                    ops.callback = None
+                    # Limit the number of tiles in flight to bound memory held by completed, unwritten tiles.
+                    max_pending = 2 * int(n_workers)
+                    pending = deque()
+                    with ProcessPoolExecutor(max_workers=int(n_workers)) as executor:
+                        for row, col, slice_row, slice_col in tiles:
+                            future = executor.submit(_execute_tile_, _get_tile_ops_(row, col), mask_spatial,
+                                                     slice_row, slice_col, env_optimize_for_calc=True)
+                            pending.append(future)
+                            if len(pending) >= max_pending:
+                                yield pending.popleft().result()
+                        while len(pending) > 0:
+                            yield pending.popleft().result()
+
+            for ctr, tile_result in enumerate(_iter_results_(), start=1):
+                for name, fill_value, slice_row, slice_col, grid_mask in tile_result:
+                    if grid_mask is not None:
+                        fds.variables[grid_mask[0]][slice_row, slice_col] = grid_mask[1]
+                    vref = fds.variables[name]
+                    # fill the netCDF container variable adjusting for shape
+                    if len(vref.shape) == 3:
+                        vref[:, slice_row, slice_col] = fill_value
+                    elif len(vref.shape) == 4:
+                        vref[:, :, slice_row, slice_col] = fill_value
+                    else:
+                        raise NotImplementedError(vref.shape)
                 if verbose:
                     progress.progress(int((float(ctr) / lschema) * 100))
-                if ops.callback is not None and callback:
-                    percentageDone = ((float(ctr) / lschema) * 100)
+                if orgcallback is not None:
+                    if n_workers is not None and int(n_workers) > 1:
+                        orgcallback((float(ctr) / lschema) * 100, 'Completed tile {} of {}'.format(ctr, lschema))
+                    else:
+                        percentageDone = ((float(ctr) / lschema) * 100)
         finally:
             fds.close()
     finally:
@@ -220,6 +249,216 @@ def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
     return fill_file
 
 
+def compute_chunked(ops, chunks=None, max_memory=None, verbose=False):
+    """
+    Execute calculations on blocks of the source data writing each calculated block directly into the output NetCDF
+    file. Unlike :func:`~ocgis.util.large_array.compute`, the operations are parsed and the subset is resolved once.
+    Source blocks are then loaded lazily and streamed through a single :class:`~ocgis.calc.engine.CalculationEngine`.
+
+    :param ops: The target operations. There must be a calculation associated with the operations and the output
+     format must be NetCDF.
+    :type ops: :class:`ocgis.OcgOperations`
+    :param dict chunks: Maps dimension map keys (``'time'``, ``'y'``, ``'x'``) to block sizes. A missing key means the
+     dimension is not chunked unless ``max_memory`` is set, in which case spatial block sizes are chosen to fit the
+     memory ceiling. Temporal chunking is only allowed if there is no calculation grouping and all calculations are
+     time independent (see :attr:`~ocgis.calc.base.AbstractFunction.time_independent`).
+
+    >>> chunks = {'time': 365, 'y': 50, 'x': 50}
+
+    :param int max_memory: Optional memory ceiling in bytes for the estimated size of an in-memory block (inputs and
+     calculation outputs).
+    :param bool verbose: If ``True``, print more verbose information to terminal.
+    :raises: ValueError
+    :returns: Path to the output NetCDF file.
+    :rtype: str
+
+    >>> from ocgis import RequestDataset, OcgOperations
+    >>> rd = RequestDataset(uri='/path/to/file', variable='tas')
+    >>> ops = OcgOperations(dataset=rd, calc=[{'func': 'mean', 'name': 'mean'}], calc_grouping=['month'],
+    >>>                     output_format='nc')
+    >>> ret = ops.execute(chunks={'y': 25, 'x': 25})
+    """
+
+    assert isinstance(ops, OcgOperations)
+    if ops.calc is None:
+        raise ValueError('Chunked execution requires a calculation.')
+    if ops.output_format != constants.OutputFormatName.NETCDF:
+        raise ValueError('Chunked execution requires a NetCDF output format.')
+    if ops.aggregate:
+        raise ValueError('Chunked execution does not support spatial aggregation.')
+
+    chunks = {k: int(v) for k, v in (chunks or {}).items()}
+    chunk_keys = (DimensionMapKey.TIME, DimensionMapKey.Y, DimensionMapKey.X)
+    for k, v in chunks.items():
+        if k not in chunk_keys:
+            raise ValueError('Chunk keys must be one of {}. Got "{}".'.format(chunk_keys, k))
+        if v <= 0:
+            raise ValueError('Chunk sizes must be greater than 0.')
+
+    if DimensionMapKey.TIME in chunks:
+        funcs_time_independent = all([getattr(f['ref'], 'time_independent', False) for f in ops.calc])
+        if ops.calc_grouping is not None or not funcs_time_independent:
+            raise ValueError('Temporal chunking requires no calculation grouping and time independent calculations.')
+
+    has_multivariate = CalculationEngine._check_calculation_members_(ops.calc, AbstractMultivariateFunction)
+    if not has_multivariate and len(list(ops.dataset)) != 1:
+        raise ValueError('Only one dataset allowed for chunked execution without a multivariate calculation.')
+
+    orig_oc = ocgis.env.OPTIMIZE_FOR_CALC
+    try:
+        ocgis.env.OPTIMIZE_FOR_CALC = True
+
+        # Write the template file. Calculation output variables are allocated but not filled.
+        if verbose:
+            print('getting fill file...')
+        ops_file_only = deepcopy(ops)
+        ops_file_only.file_only = True
+        ops_file_only.callback = None
+        fill_file = ops_file_only.execute()
+
+        # Resolve the subset once. Data variables are not loaded by the subset.
+        if verbose:
+            print('resolving subset...')
+        field = _get_chunked_subset_field_(ops, has_multivariate)
+        y_name, x_name = [d.name for d in field.grid.dimensions]
+        time_name = field.time.dimensions[0].name
+        mask_spatial = field.grid.get_mask()
+
+        # Temporal groups are computed once from the full time dimension.
+        if ops.calc_grouping is not None:
+            tgds = {field.name: field.time.get_grouping(deepcopy(ops.calc_grouping))}
+        else:
+            tgds = None
+        cengine = CalculationEngine(ops.calc_grouping, ops.calc, calc_sample_size=ops.calc_sample_size)
+
+        chunks = get_chunks_for_memory(field, chunks, len(ops.calc), max_memory=max_memory)
+        slices = {}
+        for key, size in zip(chunk_keys, [field.time.shape[0]] + list(field.grid.shape)):
+            schema = np.arange(0, size + chunks.get(key, size), chunks.get(key, size))
+            schema[-1] = size
+            slices[key] = [slice(start, stop) for start, stop in tile.get_slices(np.unique(schema))]
+        blocks = list(itertools.product(*[slices[k] for k in chunk_keys]))
+        n_blocks = len(blocks)
+        if verbose:
+            print('output file is: {}'.format(fill_file))
+            print('block count: {}'.format(n_blocks))
+
+        fds = nc.Dataset(fill_file, 'a')
+        try:
+            if ops.callback is not None:
+                ops.callback(0., 'Initializing chunked calculation')
+            for ctr, (slice_time, slice_row, slice_col) in enumerate(blocks, start=1):
+                dslice = {DimensionMapKey.TIME: slice_time, DimensionMapKey.Y: slice_row, DimensionMapKey.X: slice_col}
+                block = field.get_field_slice(dslice)
+                coll = SpatialCollection()
+                coll.add_field(block, None)
+                coll = cengine.execute(coll, tgds=tgds)
+
+                slice_map = {y_name: slice_row, x_name: slice_col}
+                if DimensionMapKey.TIME in chunks:
+                    slice_map[time_name] = slice_time
+                for calculated in coll.iter_fields():
+                    for variable in calculated.data_variables:
+                        if mask_spatial is not None:
+                            set_variable_spatial_mask(variable, mask_spatial, slice_row, slice_col)
+                        vref = fds.variables[variable.name]
+                        vslice = tuple([slice_map.get(dname, slice(None)) for dname in vref.dimensions])
+                        vref[vslice] = variable.get_masked_value()
+
+                if ops.callback is not None:
+                    ops.callback((float(ctr) / n_blocks) * 100, 'Calculated block {} of {}'.format(ctr, n_blocks))
+
+            # Persist the spatial mask once for the whole grid.
+            if mask_spatial is not None and field.grid.mask_variable.name in fds.variables:
+                fill_mask = np.ma.array(np.zeros(mask_spatial.shape), mask=mask_spatial)
+                fds.variables[field.grid.mask_variable.name][:] = fill_mask
+        finally:
+            fds.close()
+    finally:
+        ocgis.env.OPTIMIZE_FOR_CALC = orig_oc
+
+    if verbose:
+        print('complete.')
+
+    return fill_file
+
+
+def get_chunks_for_memory(field, chunks, n_calculations, max_memory=None):
+    """
+    Fill in spatial chunk sizes so the estimated block memory footprint is less than or equal to ``max_memory``.
+
+    :param field: The subsetted field to chunk.
+    :type field: :class:`~ocgis.Field`
+    :param dict chunks: The requested chunk sizes. See :func:`~ocgis.util.large_array.compute_chunked`.
+    :param int n_calculations: The number of calculation outputs held in memory for a block.
+    :param int max_memory: The memory ceiling in bytes. If ``None``, return ``chunks`` unmodified.
+    :raises: ValueError
+    :rtype: dict
+    """
+
+    if max_memory is None:
+        return chunks
+
+    ret = deepcopy(chunks)
+    spatial_names = [d.name for d in field.grid.dimensions]
+    time_name = field.time.dimensions[0].name
+    ntime = min(ret.get(DimensionMapKey.TIME, field.time.shape[0]), field.time.shape[0])
+
+    # Bytes required for a single spatial element of a block. Each data variable and calculation output is assumed to
+    # have the full block shape (a conservative estimate for calculations reducing the time dimension). The extra byte
+    # accounts for the boolean mask.
+    bytes_per_element = 0
+    for variable in field.data_variables:
+        other = [d.size for d in variable.dimensions if d.name not in spatial_names and d.name != time_name]
+        nelements = ntime * int(np.prod(other))
+        bytes_per_element += nelements * (variable.dtype.itemsize + 1) * (1 + n_calculations)
+    if bytes_per_element == 0:
+        return ret
+
+    if DimensionMapKey.Y in ret and DimensionMapKey.X in ret:
+        estimate = bytes_per_element * ret[DimensionMapKey.Y] * ret[DimensionMapKey.X]
+        if estimate > max_memory:
+            msg = 'Estimated block memory ({} bytes) exceeds the memory ceiling ({} bytes).'.format(estimate,
+                                                                                                  max_memory)
+            raise ValueError(msg)
+    else:
+        n_spatial = max(1, max_memory // bytes_per_element)
+        if DimensionMapKey.Y in ret:
+            ret[DimensionMapKey.X] = max(1, n_spatial // ret[DimensionMapKey.Y])
+        elif DimensionMapKey.X in ret:
+            ret[DimensionMapKey.Y] = max(1, n_spatial // ret[DimensionMapKey.X])
+        else:
+            side = max(1, int(np.sqrt(n_spatial)))
+            ret[DimensionMapKey.Y] = side
+            ret[DimensionMapKey.X] = side
+    return ret
+
+
+def _execute_tile_(ops_slice, mask_spatial, slice_row, slice_col, env_optimize_for_calc=None):
+    # Execute the operations for a single tile. Returns a sequence of tuples containing the data needed to write the
+    # tile into the fill file. This is also the entry point for worker processes.
+    if env_optimize_for_calc is not None:
+        ocgis.env.OPTIMIZE_FOR_CALC = env_optimize_for_calc
+
+    # return the object slice
+    ret = ops_slice.execute()
+
+    tile_result = []
+    for field in ret.iter_fields():
+        for variable in field.data_variables:
+            # if there is a spatial mask, update accordingly
+            if mask_spatial is not None:
+                set_variable_spatial_mask(variable, mask_spatial, slice_row, slice_col)
+                fill_mask = field.grid.get_mask(create=True)
+                fill_mask[:, :] = mask_spatial[slice_row, slice_col]
+                fill_mask = np.ma.array(np.zeros(fill_mask.shape), mask=fill_mask)
+                grid_mask = (field.grid.mask_variable.name, fill_mask)
+            else:
+                grid_mask = None
+            tile_result.append((variable.name, variable.get_masked_value(), slice_row, slice_col, grid_mask))
+    return tile_result
+
+
 def set_variable_spatial_mask(variable, mask_spatial, slice_row, slice_col):
     """
     Update the mask on ``variable`` in-place to match ``mask_spatial``. The array slice updated is constrained by
@@ -241,3 +480,24 @@ def set_variable_spatial_mask(variable, mask_spatial, slice_row, slice_col):
     vmask = variable.get_mask(create=True)
     vmask = np.logical_or(fill_mask, vmask[:, :])
     variable.set_mask(vmask)
+
+
+def _get_chunked_subset_field_(ops, has_multivariate):
+    # Subset without calculations. Data variable values are loaded lazily from source for each block.
+    ops_subset = deepcopy(ops)
+    ops_subset.output_format = constants.OutputFormatName.OCGIS
+    ops_subset.calc = None
+    ops_subset.calc_grouping = None
+    ops_subset.agg_selection = True
+    ops_subset.snippet = False
+    ops_subset.callback = None
+    coll = ops_subset.execute()
+
+    fields = list(coll.iter_fields())
+    field = fields[0]
+    # Multivariate calculations require all inputs on the same field.
+    if has_multivariate:
+        for other in fields[1:]:
+            for variable in other.data_variables:
+                field.add_variable(variable.extract(), is_data=True)
+    return field
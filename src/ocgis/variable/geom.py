@@ -21,6 +21,7 @@ from ocgis.base import AbstractOcgisObject
 from ocgis.constants import WrapAction, KeywordArgument, HeaderName
 from ocgis.environment import ogr
 from ocgis.exc import EmptySubsetError
+from ocgis.spatial.index import BulkSpatialIndex, STRtree
 from ocgis.util.helpers import iter_array, get_trimmed_array_by_mask, get_swap_chain
 from ocgis.variable.base import AbstractContainer, get_dimension_lengths
 from ocgis.variable.crs import Cartesian
@@ -541,7 +542,8 @@ class GeometryVariable(AbstractSpatialVariable):
         """
         :param geometry_or_bounds: A Shapely geometry or bounds tuple used for the masking.
         :type geometry_or_bounds: :class:`shapely.geometry.base.BaseGeometry` | :class:`tuple`
-        :param bool use_spatial_index: If ``True``, use a spatial index for the operation.
+        :param bool use_spatial_index: If ``True``, use an ``rtree`` spatial index for the operation. The bulk spatial
+         index (see :class:`~ocgis.spatial.index.BulkSpatialIndex`) is always used when it is available.
         :param bool keep_touches: If ``True``, keep geometries that only touch.
         :param original_mask: A hint mask for the spatial operation. ``True`` values will be skipped.
         :type original_mask: :class:`numpy.ndarray`
@@ -1010,7 +1012,13 @@ def geometryvariable_get_mask_from_intersects(gvar, geometry, use_spatial_index=
     # area for intersects operations. Useful for speeding up grid subsetting operations.
     geometry_target = np.ma.array(gvar.get_value(), mask=original_mask).compressed()
 
-    if use_spatial_index:
+    if STRtree is not None:
+        # Query the bulk-loaded index and update the mask using the returned index array. This index does not require
+        # "rtree" and is always used when available.
+        si = BulkSpatialIndex(geometry_target)
+        indices = si.query(geometry, keep_touches=keep_touches)
+        ref_fill_mask[global_index[indices]] = False
+    elif use_spatial_index:
         si = gvar.get_spatial_index(target=geometry_target)
         # Return the indices of the geometries intersecting the target geometry, and update the mask accordingly.
         for idx in si.iter_intersects(geometry, geometry_target, keep_touches=keep_touches):
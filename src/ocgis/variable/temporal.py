@@ -10,9 +10,11 @@ import numpy as np
 import six
 
 from ocgis import constants, env
+from ocgis.calc.segment import get_segment_lengths, iter_segments
 from ocgis.constants import HeaderName, KeywordArgument
 from ocgis.exc import EmptySubsetError, IncompleteSeasonError, CannotFormatTimeError, ResolutionError
-from ocgis.util.helpers import get_is_date_between, iter_array, get_none_or_slice
+from ocgis.util.date_parts import get_date_parts_from_numtime
+from ocgis.util.helpers import iter_array, get_none_or_slice
 from ocgis.variable.base import SourcedVariable, get_attribute_property, set_attribute_property
 
 
@@ -239,6 +241,7 @@ class TemporalVariable(SourcedVariable):
         """
 
         # There is no need to go through the process of breaking out datetime parts when the grouping is 'all'.
+        group_indices = None
         if grouping == 'all':
             new_bounds, date_parts, repr_dt, dgroups = self._get_grouping_all_()
         # The process for getting "unique" seasons is also specialized.
@@ -246,7 +249,8 @@ class TemporalVariable(SourcedVariable):
             new_bounds, date_parts, repr_dt, dgroups = self._get_grouping_seasonal_unique_(grouping)
         # For standard groups ("['month']") or seasons across entire time range.
         else:
-            new_bounds, date_parts, repr_dt, dgroups = self._get_grouping_other_(grouping)
+            new_bounds, date_parts, repr_dt, group_indices = self._get_grouping_other_(grouping)
+            dgroups = None
 
         new_name = 'climatology_bounds'
         if self.has_bounds:
@@ -258,8 +262,9 @@ class TemporalVariable(SourcedVariable):
         new_attrs = deepcopy(self.attrs)
         # new_attrs['climatology'] = new_bounds.name
         tgv = TemporalGroupVariable(grouping=grouping, date_parts=date_parts, bounds=new_bounds, dgroups=dgroups,
-                                    value=repr_dt, units=self.units, calendar=self.calendar, name=self.name,
-                                    attrs=new_attrs, dimensions=new_dimensions[0])
+                                    group_indices=group_indices, source_size=self.shape[0], value=repr_dt,
+                                    units=self.units, calendar=self.calendar, name=self.name, attrs=new_attrs,
+                                    dimensions=new_dimensions[0])
         tgv.attrs.pop(TemporalVariable._bounds_attribute_name, None)
 
         return tgv
@@ -384,15 +389,11 @@ class TemporalVariable(SourcedVariable):
 
         assert isinstance(time_region, dict)
 
-        # return the values to use for the temporal region subsetting.
-        value = self.value_datetime
+        # Integer date parts for the values or bounds. Bounds are given preference.
         if self.has_bounds:
-            bounds = self.bounds.value_datetime
+            parts = self.bounds._get_date_parts_()
         else:
-            bounds = None
-
-        # switch to indicate if bounds or centroid datetimes are to be used.
-        use_bounds = False if bounds is None else True
+            parts = self._get_date_parts_()
 
         # remove any none values in the time_region dictionary. this will save
         # time in iteration.
@@ -400,32 +401,15 @@ class TemporalVariable(SourcedVariable):
         time_region = {k: v for k, v in time_region.items() if v is not None}
         assert len(time_region) > 0
 
-        # this is the boolean selection array.
-        select = np.zeros(self.shape[0], dtype=bool)
-
-        # for each row, determine if the date criterion are met updating the
-        # select matrix accordingly.
-        row_check = np.zeros(len(time_region), dtype=bool)
-
-        for idx_row in range(select.shape[0]):
-            # do the comparison for each time_region element.
-            if use_bounds:
-                row = bounds[idx_row, :]
+        # this is the boolean selection array. each time region element must be satisfied.
+        select = np.ones(self.shape[0], dtype=bool)
+        for k, v in time_region.items():
+            part = parts[..., self._date_parts.index(k)]
+            v = np.array(v, dtype=int)
+            if self.has_bounds:
+                select = np.logical_and(select, get_is_date_part_between(part[:, 0], part[:, 1], v))
             else:
-                row = value[idx_row]
-            for ii, (k, v) in enumerate(time_region.items()):
-                if use_bounds:
-                    to_include = []
-                    for element in v:
-                        kwds = {k: element}
-                        to_include.append(get_is_date_between(row[0], row[1], **kwds))
-                    fill = any(to_include)
-                else:
-                    part = getattr(row, k)
-                    fill = True if part in v else False
-                row_check[ii] = fill
-            if row_check.all():
-                select[idx_row] = True
+                select = np.logical_and(select, np.in1d(part, v))
 
         if not select.any():
             raise EmptySubsetError(origin='temporal')
@@ -460,71 +444,28 @@ class TemporalVariable(SourcedVariable):
 
     def _get_grouping_other_(self, grouping):
         """
-        Applied to groups other than 'all'.
+        Applied to groups other than 'all'. Groups are identified on integer date part arrays and returned in a compact
+        representation. See :meth:`~ocgis.variable.temporal.TemporalGroupVariable.get_group_indices`.
         """
 
-        # map date parts to index positions in date part storage array and flip
-        # they key-value pairs
-        group_map = dict(list(zip(list(range(0, len(self._date_parts))), self._date_parts, )))
         group_map_rev = dict(list(zip(self._date_parts, list(range(0, len(self._date_parts))), )))
 
-        # this array will hold the value data constructed differently depending
-        # on if temporal bounds are present
-        value = np.empty((self.get_value().shape[0], 3), dtype=object)
-
-        # reference the value and bounds datetime object arrays
-        value_datetime = self.value_datetime
-        if self.has_bounds:
-            value_datetime_bounds = self.bounds.value_datetime
-        else:
-            value_datetime_bounds = None
-
-        # populate the value array depending on the presence of bounds
-        if value_datetime_bounds is None:
-            value[:, :] = value_datetime.reshape(-1, 1)
-        # bounds are currently not used for the grouping mechanism
-        else:
-            value[:, 0] = value_datetime_bounds[:, 0]
-            value[:, 1] = value_datetime
-            value[:, 2] = value_datetime_bounds[:, 1]
-
-        def _get_attrs_(dt):
-            return ([dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second])
-
         # extract the date parts
-        parts = np.empty((len(self.get_value()), len(self._date_parts)), dtype=int)
-        for row in range(parts.shape[0]):
-            parts[row, :] = _get_attrs_(value[row, 1])
+        parts = self._get_date_parts_()
 
         # grouping is different for date part combinations v. seasonal
         # aggregation.
         if all([isinstance(ii, six.string_types) for ii in grouping]):
-            unique = deque()
-            for idx in range(parts.shape[1]):
-                if group_map[idx] in grouping:
-                    fill = np.unique(parts[:, idx])
-                else:
-                    fill = [None]
-                unique.append(fill)
-
-            select = deque()
-            idx2_seq = list(range(len(self._date_parts)))
-            for idx in itertools.product(*[list(range(len(u))) for u in unique]):
-                select.append([unique[idx2][idx[idx2]] for idx2 in idx2_seq])
-            select = np.array(select)
-            dgroups = deque()
+            # Date part columns in storage order so unique groups sort by year, month, etc.
+            idx_cmp = sorted([group_map_rev[group] for group in grouping])
+            unique, group_ids = np.unique(parts[:, idx_cmp], axis=0, return_inverse=True)
+            group_ids = group_ids.reshape(-1)
+            indices = np.argsort(group_ids, kind='mergesort')
+            lengths = np.bincount(group_ids, minlength=unique.shape[0])
 
-            idx_cmp = [group_map_rev[group] for group in grouping]
-
-            keep_select = []
-            for idx in range(select.shape[0]):
-                match = select[idx, idx_cmp] == parts[:, idx_cmp]
-                dgrp = match.all(axis=1)
-                if dgrp.any():
-                    keep_select.append(idx)
-                    dgroups.append(dgrp)
-            select = select[keep_select, :]
-            assert (len(dgroups) == select.shape[0])
+            # Date parts not part of the grouping are None.
+            select = np.empty((unique.shape[0], len(self._date_parts)), dtype=object)
+            select[:, idx_cmp] = unique
 
             dtype = [(dp, object) for dp in self._date_parts]
         # this is for seasonal aggregations
@@ -543,32 +484,39 @@ class TemporalVariable(SourcedVariable):
                 has_year = False
                 years = [None]
 
-            dgroups = deque()
-            grouping_season = deque()
-
             # sort the arrays to ensure the ordered in ascending order
-            years.sort()
             grouping = get_sorted_seasons(grouping, method='min')
 
-            for year, season in itertools.product(years, grouping):
-                subgroup = np.zeros(value.shape[0], dtype=bool)
-                for idx in range(value.shape[0]):
-                    if has_year:
-                        if parts[idx, 1] in season and year == parts[idx, 0]:
-                            subgroup[idx] = True
-                    else:
-                        if parts[idx, 1] in season:
-                            subgroup[idx] = True
-                dgroups.append(subgroup)
-                grouping_season.append([season, year])
+            # Seasons may overlap so collect the group membership of each time index season by season.
+            group_ids = deque()
+            time_indices = deque()
+            n_seasons = len(grouping)
+            for idx_season, season in enumerate(grouping):
+                in_season = np.nonzero(np.in1d(parts[:, 1], season))[0]
+                if has_year:
+                    year_index = np.searchsorted(years, parts[in_season, 0])
+                else:
+                    year_index = np.zeros(in_season.shape[0], dtype=int)
+                group_ids.append(year_index * n_seasons + idx_season)
+                time_indices.append(in_season)
+            group_ids = np.concatenate(group_ids)
+            time_indices = np.concatenate(time_indices)
+            order = np.argsort(group_ids, kind='mergesort')
+            indices = time_indices[order]
+            lengths = np.bincount(group_ids, minlength=len(years) * n_seasons)
+
+            grouping_season = [[season, year] for year, season in itertools.product(years, grouping)]
+            # Seasons without data for a year do not define a group.
+            grouping = [gs for gs, length in zip(grouping_season, lengths) if length > 0]
+            lengths = lengths[lengths > 0]
             dtype = [('months', object), ('year', int)]
-            grouping = grouping_season
 
-        # init arrays to hold values and bounds for the grouped data
-        new_value = np.empty((len(dgroups),), dtype=dtype)
-        new_bounds = np.empty((len(dgroups), 2), dtype=object)
+        offsets = np.zeros(lengths.shape[0], dtype=int)
+        offsets[1:] = np.cumsum(lengths)[:-1]
 
-        for idx, dgrp in enumerate(dgroups):
+        # init arrays to hold values and bounds for the grouped data
+        new_value = np.empty((lengths.shape[0],), dtype=dtype)
+        for idx in range(new_value.shape[0]):
             # Tuple conversion is required for structure arrays: http://docs.scipy.org/doc/numpy/user/basics.rec.html#filling-structured-arrays
             try:
                 new_value[idx] = tuple(select[idx])
@@ -580,15 +528,72 @@ class TemporalVariable(SourcedVariable):
                 # and it is a Nonetype
                 except TypeError:
                     new_value[idx]['months'] = grouping[idx][0]
-            sel = value[dgrp][:, (0, 2)]
-            new_bounds[idx, :] = [sel.min(), sel.max()]
 
-        new_bounds = np.atleast_2d(new_bounds).reshape(-1, 2)
+        new_bounds = self._get_grouping_bounds_(indices, offsets)
         date_parts = np.atleast_1d(new_value)
         # This is the representative center time for the temporal group.
         repr_dt = self._get_grouping_representative_datetime_(grouping, new_bounds, date_parts)
 
-        return new_bounds, date_parts, repr_dt, dgroups
+        return new_bounds, date_parts, repr_dt, (indices, offsets)
+
+    def _get_grouping_bounds_(self, indices, offsets):
+        """
+        :param indices: Time indices of all groups concatenated in group order.
+        :type indices: :class:`numpy.ndarray`
+        :param offsets: Start of each group in ``indices``.
+        :type offsets: :class:`numpy.ndarray`
+        :returns: The minimum and maximum ``datetime`` for each group using bounds if available.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        target = self.bounds if self.has_bounds else self
+        numtime = np.ma.getdata(target.value_numtime)
+        if self.has_bounds:
+            lower_numtime, upper_numtime = numtime[:, 0], numtime[:, 1]
+        else:
+            lower_numtime = upper_numtime = numtime
+        # Keep the full arrays to convert only the selected extremes to datetimes.
+        full_lower_numtime, full_upper_numtime = lower_numtime, upper_numtime
+        lower_numtime = lower_numtime[indices]
+        upper_numtime = upper_numtime[indices]
+
+        # Numeric time orders the same as datetimes. Sort within each group to find the extreme elements.
+        segment_ids = np.repeat(np.arange(offsets.shape[0]), get_segment_lengths(offsets, indices.shape[0]))
+        stops = np.append(offsets[1:], indices.shape[0]) - 1
+        argmin = indices[np.lexsort((lower_numtime, segment_ids))[offsets]]
+        argmax = indices[np.lexsort((upper_numtime, segment_ids))[stops]]
+
+        new_bounds = np.empty((offsets.shape[0], 2), dtype=object)
+        if get_datetime_conversion_state(target.get_value().flatten()[0]):
+            new_bounds[:, 0] = self.get_datetime(full_lower_numtime[argmin])
+            new_bounds[:, 1] = self.get_datetime(full_upper_numtime[argmax])
+        else:
+            value_datetime = np.ma.getdata(target.value_datetime)
+            if self.has_bounds:
+                new_bounds[:, 0] = value_datetime[argmin, 0]
+                new_bounds[:, 1] = value_datetime[argmax, 1]
+            else:
+                new_bounds[:, 0] = value_datetime[argmin]
+                new_bounds[:, 1] = value_datetime[argmax]
+        return new_bounds
+
+    def _get_date_parts_(self):
+        """
+        :returns: Integer date parts for each time value with shape ``self.shape + (6,)``. The last axis is ordered as
+         ``TemporalVariable._date_parts``. Numeric time is decoded directly using the units and calendar. Datetime
+         objects are only created if the decoder does not support the units or calendar.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        ret = None
+        value = self.get_value()
+        if get_datetime_conversion_state(value.flatten()[0]) and not self._has_months_units:
+            ret = get_date_parts_from_numtime(value, self.units, self.calendar)
+        if ret is None:
+            value_datetime = np.ma.getdata(self.value_datetime)
+            parts = [(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second) for dt in value_datetime.flat]
+            ret = np.array(parts, dtype=int).reshape(value_datetime.shape + (len(self._date_parts),))
+        return ret
 
     def _get_grouping_representative_datetime_(self, grouping, bounds, value):
         ref_value = value
@@ -746,6 +751,11 @@ class TemporalGroupVariable(TemporalVariable):
     :keyword grouping: (``=None``) See :meth:`~ocgis.TemporalVariable.get_grouping`.
     :keyword dgroups: (``=None``) Sequence of boolean arrays defining each unique temporal group.
     :type dgroups: `sequence` of :class:`numpy.ndarray`
+    :keyword group_indices: (``=None``) Compact alternative to ``dgroups``. See
+     :meth:`~ocgis.variable.temporal.TemporalGroupVariable.get_group_indices`. Boolean arrays are only created if
+     ``dgroups`` is accessed.
+    :type group_indices: tuple(:class:`numpy.ndarray`, :class:`numpy.ndarray`)
+    :keyword int source_size: (``=None``) Length of the source time dimension. Required with ``group_indices``.
     :keyword date_parts: (``=None``) Sequence of date part tuples.
     :type date_parts: `sequence` of :class:`tuple`
     """
@@ -753,11 +763,78 @@ class TemporalGroupVariable(TemporalVariable):
 
     def __init__(self, *args, **kwargs):
         self.grouping = kwargs.pop('grouping', None)
-        self.dgroups = kwargs.pop('dgroups', None)
+        self._dgroups = kwargs.pop('dgroups', None)
+        self.group_indices = kwargs.pop('group_indices', None)
+        self.source_size = kwargs.pop('source_size', None)
         self.date_parts = kwargs.pop('date_parts', None)
 
         super(TemporalGroupVariable, self).__init__(*args, **kwargs)
 
+    @property
+    def dgroups(self):
+        """
+        :returns: Boolean selection arrays or slices for each temporal group.
+        :rtype: `sequence` of :class:`numpy.ndarray`
+        """
+        if self._dgroups is None and self.group_indices is not None:
+            dgroups = deque()
+            for group in self.iter_groups():
+                dgroup = np.zeros(self.source_size, dtype=bool)
+                dgroup[group] = True
+                dgroups.append(dgroup)
+            self._dgroups = dgroups
+        return self._dgroups
+
+    @dgroups.setter
+    def dgroups(self, value):
+        self._dgroups = value
+        self.group_indices = None
+
+    def get_group_indices(self, n_time):
+        """
+        Convert the temporal groups into a compact representation suitable for segment reductions.
+
+        :param int n_time: Length of the source time dimension.
+        :returns: A tuple ``(indices, offsets)`` where ``indices`` are the source time indices of all groups concatenated
+         in group order and ``offsets`` are the start of each group in ``indices``. ``None`` is returned if any group is
+         empty as segment reductions are not defined for empty segments.
+        :rtype: tuple(:class:`numpy.ndarray`, :class:`numpy.ndarray`) or None
+        """
+
+        if self.group_indices is not None:
+            indices, offsets = self.group_indices
+            if len(offsets) == 0 or np.any(get_segment_lengths(offsets, indices.shape[0]) == 0):
+                ret = None
+            else:
+                ret = self.group_indices
+        else:
+            source_indices = np.arange(n_time)
+            groups = [source_indices[dgroup] for dgroup in self.dgroups]
+            lengths = np.array([g.shape[0] for g in groups], dtype=int)
+            if len(groups) == 0 or np.any(lengths == 0):
+                ret = None
+            else:
+                offsets = np.zeros(lengths.shape[0], dtype=int)
+                offsets[1:] = np.cumsum(lengths)[:-1]
+                ret = np.concatenate(groups), offsets
+        return ret
+
+    def iter_groups(self):
+        """
+        Yield the source time selection for each temporal group. This is an integer index array if the compact group
+        representation is available. Otherwise, it is the boolean array or slice from ``dgroups``.
+
+        :rtype: :class:`numpy.ndarray` | :class:`slice`
+        """
+
+        if self.group_indices is not None:
+            indices, offsets = self.group_indices
+            for group in iter_segments(indices, offsets):
+                yield group
+        else:
+            for dgroup in self.dgroups:
+                yield dgroup
+
 
 def get_datetime_conversion_state(archetype):
     """
@@ -774,6 +851,30 @@ def get_datetime_conversion_state(archetype):
     return ret
 
 
+def get_is_date_part_between(lower, upper, to_test):
+    """
+    Vectorized :func:`~ocgis.util.helpers.get_is_date_between` for integer date part arrays.
+
+    :param lower: Lower bound date parts.
+    :type lower: :class:`numpy.ndarray`
+    :param upper: Upper bound date parts.
+    :type upper: :class:`numpy.ndarray`
+    :param to_test: Date part values to check. An interval is selected if any value occurs in it.
+    :type to_test: :class:`numpy.ndarray`
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    lower = lower.reshape(-1, 1)
+    upper = upper.reshape(-1, 1)
+    to_test = to_test.reshape(1, -1)
+    # In the case of a year overlap, increment the upper into another year by adding 12 months.
+    upper = np.where(lower > upper, upper + 12, upper)
+    ret = np.where(lower != upper,
+                   np.logical_and(to_test >= lower, to_test < upper),
+                   np.logical_and(to_test >= lower, to_test <= upper))
+    return ret.any(axis=1)
+
+
 def get_datetime_from_months_time_units(vec, units, month_centroid=16):
     """
     Convert a vector of months offsets into :class:``datetime.datetime`` objects.